@@ -0,0 +1,209 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH", "analytics.sqlite3")
+ANALYTICS_FLUSH_INTERVAL_S = float(os.getenv("ANALYTICS_FLUSH_INTERVAL_S", "2"))
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "200"))
+# Oldest buffered events are dropped (and counted) if SQLite falls this far behind
+ANALYTICS_MAX_BUFFER = int(os.getenv("ANALYTICS_MAX_BUFFER", "10000"))
+
+SEARCH_KINDS = ("search", "browse", "show_more", "similar")
+
+def normalize_query(query) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", str(query or "").lower()).split())
+
+class AnalyticsStore:
+    """
+    Append-only event log with write-behind persistence.
+
+    `record()` only appends to an in-memory buffer; a daemon thread writes the
+    buffer to SQLite in batches, so the chat path never waits on analytics I/O.
+    Aggregates run as SQL over indexed columns.
+    """
+
+    def __init__(self, path: str = ANALYTICS_DB_PATH,
+                 flush_interval_s: float = ANALYTICS_FLUSH_INTERVAL_S,
+                 batch_size: int = ANALYTICS_BATCH_SIZE,
+                 max_buffer: int = ANALYTICS_MAX_BUFFER):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self._buffer = deque(maxlen=max_buffer)
+        self._buffer_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                day TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                query TEXT,
+                normalized_query TEXT,
+                result_count INTEGER,
+                success INTEGER,
+                latency_ms REAL,
+                username TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_kind_day ON events (kind, day)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_day ON events (day)")
+        self._conn.commit()
+
+        self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, kind: str, query: str = None, result_count: int = None,
+               success: bool = None, latency_ms: float = None, username: str = None):
+        """Queue an event; never touches the database."""
+        now = time.time()
+        event = (
+            now,
+            time.strftime("%Y-%m-%d", time.localtime(now)),
+            kind,
+            query,
+            normalize_query(query) if query else None,
+            result_count,
+            None if success is None else int(success),
+            latency_ms,
+            username,
+        )
+        with self._buffer_lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(event)
+            self.recorded += 1
+            pending = len(self._buffer)
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Analytics flush failed: {e}")
+
+    def flush(self) -> int:
+        """
+        Write buffered events to SQLite in one transaction; returns how many were
+        written. If the write fails (e.g. "database is locked" while another
+        container holds the file) the batch goes back in front of the buffer for
+        the next flush; only what no longer fits in max_buffer is dropped.
+        """
+        with self._buffer_lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        if not batch:
+            return 0
+        try:
+            with self._db_lock:
+                try:
+                    self._conn.executemany(
+                        "INSERT INTO events (created_at, day, kind, query, normalized_query, result_count, "
+                        "success, latency_ms, username) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        batch
+                    )
+                    self._conn.commit()
+                except BaseException:
+                    self._conn.rollback()
+                    raise
+        except Exception:
+            with self._buffer_lock:
+                # Events recorded during the write are newer than the batch; drop the oldest on overflow
+                pending = batch + list(self._buffer)
+                overflow = max(len(pending) - self._buffer.maxlen, 0)
+                self._buffer.clear()
+                self._buffer.extend(pending[overflow:])
+                self.dropped += overflow
+                self.failed_flushes += 1
+            raise
+        self.flushed += len(batch)
+        return len(batch)
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _since_day(days: int) -> str:
+        return time.strftime("%Y-%m-%d", time.localtime(time.time() - (days - 1) * 86400))
+
+    def top_searches(self, days: int = 7, limit: int = 10) -> list:
+        """[(normalized query, count, avg results)] for product searches."""
+        return self._query(
+            "SELECT normalized_query, COUNT(*), AVG(result_count) FROM events "
+            "WHERE kind = 'search' AND day >= ? GROUP BY normalized_query "
+            "ORDER BY COUNT(*) DESC LIMIT ?",
+            (self._since_day(days), limit)
+        )
+
+    def zero_result_rate(self, days: int = 7) -> float:
+        placeholders = ", ".join("?" for _ in SEARCH_KINDS)
+        total, zero = self._query(
+            f"SELECT COUNT(*), COALESCE(SUM(result_count = 0), 0) FROM events "
+            f"WHERE kind IN ({placeholders}) AND day >= ?",
+            (*SEARCH_KINDS, self._since_day(days))
+        )[0]
+        return zero / total if total else 0.0
+
+    def searches_per_day(self, days: int = 14) -> dict:
+        placeholders = ", ".join("?" for _ in SEARCH_KINDS)
+        rows = self._query(
+            f"SELECT day, COUNT(*) FROM events WHERE kind IN ({placeholders}) AND day >= ? "
+            f"GROUP BY day ORDER BY day",
+            (*SEARCH_KINDS, self._since_day(days))
+        )
+        return dict(rows)
+
+    def tracking_summary(self, days: int = 7) -> dict:
+        total, succeeded, avg_ms = self._query(
+            "SELECT COUNT(*), COALESCE(SUM(success), 0), AVG(latency_ms) FROM events "
+            "WHERE kind = 'tracking' AND day >= ?",
+            (self._since_day(days),)
+        )[0]
+        return {
+            "total": total,
+            "success_rate": succeeded / total if total else 0.0,
+            "avg_ms": avg_ms or 0.0,
+        }
+
+    def active_users(self, days: int = 1) -> int:
+        return self._query(
+            "SELECT COUNT(DISTINCT username) FROM events WHERE day >= ? AND username IS NOT NULL",
+            (self._since_day(days),)
+        )[0][0]
+
+    def stats(self) -> dict:
+        with self._buffer_lock:
+            pending = len(self._buffer)
+        return {
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "pending": pending,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
@@ -0,0 +1,148 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from weaviate import WeaviateClient
+from weaviate.classes.query import Filter
+from weaviate.connect import ConnectionParams
+
+from embedding_utils import get_embeddings_batch
+from product_hits import PRODUCT_HIT_PROPERTIES, to_product_hits
+from reranker import RERANK_OVERFETCH, rerank_products
+
+WEAVIATE_CLASS_NAME = "MercadoLibreProduct"
+WEAVIATE_HOST = "localhost"
+WEAVIATE_PORT = 8090
+BATCH_QUERY_WORKERS = 8
+
+def connect_weaviate(host: str = WEAVIATE_HOST, port: int = WEAVIATE_PORT) -> WeaviateClient:
+    client = WeaviateClient(
+        ConnectionParams.from_params(
+            http_host=host,
+            http_port=port,
+            http_secure=False,
+            grpc_host=host,
+            grpc_port=50051,
+            grpc_secure=False
+        )
+    )
+    client.connect()
+    return client
+
+def build_filters(filters):
+    """
+    Turn a {"property": value} dict into an AND of equality filters.
+    Weaviate Filter objects (or None) are passed through unchanged.
+    """
+    if not filters or not isinstance(filters, dict):
+        return filters or None
+
+    conditions = [Filter.by_property(prop).equal(value) for prop, value in filters.items()]
+    return conditions[0] if len(conditions) == 1 else Filter.all_of(conditions)
+
+def search_products_batch(queries: list, limit: int = 8, filters=None, client=None,
+                          rerank: bool = False, max_workers: int = BATCH_QUERY_WORKERS) -> dict:
+    """
+    Run many searches at once: one batched embedding call per 100 queries,
+    then the Weaviate near_vector queries concurrently.
+
+    Returns {"results": [{"query", "hits", "error"}, ...], "stats": {...}} in input order.
+    """
+    own_client = client is None
+    if own_client:
+        client = connect_weaviate()
+
+    try:
+        collection = client.collections.get(WEAVIATE_CLASS_NAME)
+        weaviate_filters = build_filters(filters)
+        fetch_limit = max(limit, RERANK_OVERFETCH) if rerank else limit
+
+        start = time.perf_counter()
+        vectors = get_embeddings_batch(list(queries))
+        embed_s = time.perf_counter() - start
+
+        def run_query(query, vector):
+            if not vector:
+                return {"query": query, "hits": [], "error": "no embedding"}
+            try:
+                response = collection.query.near_vector(
+                    near_vector=vector,
+                    limit=fetch_limit,
+                    filters=weaviate_filters,
+                    return_properties=PRODUCT_HIT_PROPERTIES,
+                    return_metadata=["distance"]
+                )
+                hits = to_product_hits(response.objects)
+                if rerank and hits:
+                    hits = rerank_products(query, hits, limit)
+                return {"query": query, "hits": hits[:limit], "error": None}
+            except Exception as e:
+                return {"query": query, "hits": [], "error": str(e)}
+
+        query_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(run_query, queries, vectors))
+        query_s = time.perf_counter() - query_start
+
+        total_s = time.perf_counter() - start
+        stats = {
+            "queries": len(queries),
+            "errors": sum(1 for r in results if r["error"]),
+            "zero_results": sum(1 for r in results if not r["error"] and not r["hits"]),
+            "embed_s": round(embed_s, 3),
+            "query_s": round(query_s, 3),
+            "total_s": round(total_s, 3),
+            "qps": round(len(queries) / total_s, 2) if total_s > 0 else 0.0,
+        }
+        return {"results": results, "stats": stats}
+
+    finally:
+        if own_client:
+            client.close()
+
+def read_queries_jsonl(path: str) -> list:
+    """Each line is either {"query": "..."} or a bare JSON string."""
+    queries = []
+    with open(path, encoding="utf-8") if path != "-" else sys.stdin as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            queries.append(item["query"] if isinstance(item, dict) else str(item))
+    return queries
+
+def write_results_jsonl(path: str, results: list):
+    with open(path, "w", encoding="utf-8") if path != "-" else sys.stdout as f:
+        for result in results:
+            record = {
+                "query": result["query"],
+                "error": result["error"],
+                "hits": [asdict(hit) for hit in result["hits"]],
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run product searches in batch from a JSONL file")
+    parser.add_argument("input", help="JSONL file with one query per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--filters", default=None, help='JSON object, e.g. \'{"category": "Morrales"}\'')
+    parser.add_argument("--rerank", action="store_true")
+    parser.add_argument("--workers", type=int, default=BATCH_QUERY_WORKERS)
+    args = parser.parse_args()
+
+    queries = read_queries_jsonl(args.input)
+    filters = json.loads(args.filters) if args.filters else None
+
+    batch = search_products_batch(
+        queries, limit=args.limit, filters=filters, rerank=args.rerank, max_workers=args.workers
+    )
+    write_results_jsonl(args.output, batch["results"])
+
+    stats = batch["stats"]
+    print(f"\n📊 {stats['queries']} queries in {stats['total_s']}s "
+          f"(embeddings {stats['embed_s']}s, Weaviate {stats['query_s']}s) → {stats['qps']} queries/s", file=sys.stderr)
+    print(f"   • Errors: {stats['errors']}  • Zero results: {stats['zero_results']}", file=sys.stderr)
@@ -0,0 +1,119 @@
+"""
+Throughput vs added latency of cross-session embedding micro-batching.
+
+N client threads each embed M distinct queries, once with a direct call per
+query and once per batching window. The simulated backend models an embedding
+API as a fixed round-trip plus a small per-text cost; --backend gemini calls
+the real API (needs GEMINI_API_KEY and spends quota).
+
+    python benchmarks/bench_embedding_batching.py --clients 16 --requests 20 --windows 0 5 10 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from micro_batcher import MicroBatcher
+
+class SimulatedEmbeddingBackend:
+    def __init__(self, round_trip_ms: float, per_text_ms: float, max_concurrent_calls: int, dim: int = 768):
+        self.round_trip_s = round_trip_ms / 1000
+        self.per_text_s = per_text_ms / 1000
+        self.dim = dim
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(max_concurrent_calls)
+
+    def embed_batch(self, texts: list) -> list:
+        with self._lock:
+            self.calls += 1
+        with self._slots:
+            time.sleep(self.round_trip_s + self.per_text_s * len(texts))
+        return [[0.0] * self.dim for _ in texts]
+
+class GeminiEmbeddingBackend:
+    def __init__(self):
+        from embedding_utils import get_embeddings_batch
+        self._embed = get_embeddings_batch
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_batch(self, texts: list) -> list:
+        with self._lock:
+            self.calls += 1
+        return self._embed(texts)
+
+def run(backend, embed_one, clients: int, requests_per_client: int) -> dict:
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client(client_id):
+        barrier.wait()
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            embed_one(f"client {client_id} query {i} batman action figure")
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    backend.calls = 0
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_s = time.perf_counter() - start
+
+    values = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "backend_calls": backend.calls,
+        "throughput_rps": len(latencies) / wall_s,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding micro-batching windows")
+    parser.add_argument("--backend", choices=["simulated", "gemini"], default="simulated")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 5, 10, 20],
+                        help="Batching windows in ms (0 = direct call per query)")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--round-trip-ms", type=float, default=120, help="Simulated API round trip")
+    parser.add_argument("--per-text-ms", type=float, default=1.5, help="Simulated cost per text")
+    parser.add_argument("--max-concurrent-calls", type=int, default=4,
+                        help="Simulated limit on concurrent API calls")
+    args = parser.parse_args()
+
+    if args.backend == "gemini":
+        backend = GeminiEmbeddingBackend()
+    else:
+        backend = SimulatedEmbeddingBackend(args.round_trip_ms, args.per_text_ms, args.max_concurrent_calls)
+
+    print(f"📊 {args.clients} clients x {args.requests} requests, backend {args.backend}")
+    print(f"{'window':>8} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'calls':>7} {'avg batch':>10}")
+
+    for window_ms in args.windows:
+        if window_ms <= 0:
+            result = run(backend, lambda text: backend.embed_batch([text])[0], args.clients, args.requests)
+            label = "direct"
+        else:
+            batcher = MicroBatcher(backend.embed_batch, window_s=window_ms / 1000, max_batch=args.max_batch)
+            result = run(backend, batcher.submit, args.clients, args.requests)
+            label = f"{window_ms:g}ms"
+
+        avg_batch = result["requests"] / result["backend_calls"] if result["backend_calls"] else 0
+        print(f"{label:>8} {result['throughput_rps']:8.1f} {result['p50_ms']:8.1f} "
+              f"{result['p95_ms']:8.1f} {result['backend_calls']:7d} {avg_batch:10.1f}")
+
+if __name__ == "__main__":
+    main()
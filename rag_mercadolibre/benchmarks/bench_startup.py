@@ -0,0 +1,175 @@
+"""
+Startup and rerun profile of the Streamlit app.
+
+Measures, each in a fresh interpreter:
+  import   - `import main_workflow` wall time plus the slowest top-level imports
+             (python -X importtime), i.e. what a cold container pays first; fails
+             if the import loads any of DEFERRED_MODULES
+  compile  - Streamlit's one-off parse + magic + compile of main_workflow.py
+  script   - AppTest timings against that cached bytecode (as the server runs
+             it): first script run (login page), first run after login, idle
+             reruns and chat-message reruns; chat_message is what the server does per
+             message: a fragment-scoped rerun when the app defines the "chat"
+             fragment, otherwise the same full rerun as chat_rerun
+
+Weaviate, Gemini and Servientrega do not need to be reachable; the numbers then
+include the (fast-failing) connection probes. Save a profile and compare later:
+
+    python benchmarks/bench_startup.py --repeats 5 --output startup_before.json
+    python benchmarks/bench_startup.py --repeats 5 --compare startup_before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies the app imports inside the functions that use them
+DEFERRED_MODULES = ["requests", "psutil", "pandas", "weaviate", "selenium", "google.genai"]
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import main_workflow
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_s": elapsed, "loaded": [name for name in sys.argv[1:] if name in sys.modules]}))
+"""
+
+SCRIPT_SNIPPET = """
+import json, os, sys, time
+import streamlit.testing.v1.local_script_runner as local_script_runner
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+reruns = int(sys.argv[1])
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+# The server compiles the script once per process; AppTest alone would recompile on every run
+script_cache = ScriptCache()
+local_script_runner.ScriptCache = lambda: script_cache
+result = {"compile_s": timed(lambda: script_cache.get_bytecode(os.path.abspath("main_workflow.py")))}
+
+# AppTest always reruns the whole script; queueing fragment ids reproduces a widget event inside a fragment
+fragment_queue = []
+_RerunData = local_script_runner.RerunData
+local_script_runner.RerunData = lambda **kwargs: _RerunData(fragment_id_queue=list(fragment_queue), **kwargs)
+
+at = AppTest.from_file("main_workflow.py", default_timeout=120)
+result["first_run_s"] = timed(at.run)
+at.session_state.authenticated = True
+at.session_state.username = "admin"
+at.session_state.role = "admin"
+at.session_state.login_time = time.time()
+result["first_app_run_s"] = timed(at.run)
+result["idle_rerun_s"] = [timed(at.run) for _ in range(reruns)]
+result["chat_rerun_s"] = [timed(at.chat_input[0].set_value(f"hello {i}").run) for i in range(reruns)]
+try:
+    fragment_queue[:] = at._fragment_storage.resolve_target("chat")
+except Exception:
+    pass
+result["chat_fragment"] = bool(fragment_queue)
+result["chat_message_s"] = [timed(at.chat_input[0].set_value(f"again {i}").run) for i in range(reruns)]
+fragment_queue.clear()
+result["exception"] = [str(e.value) for e in at.exception]
+print(json.dumps(result))
+"""
+
+def isolated_env(tmp_dir: str) -> dict:
+    # Keep the benchmark's chat/analytics/job rows out of the real stores
+    return {
+        **os.environ,
+        "CHAT_DB_PATH": os.path.join(tmp_dir, "chat.sqlite3"),
+        "ANALYTICS_DB_PATH": os.path.join(tmp_dir, "analytics.sqlite3"),
+        "INGEST_JOBS_DB_PATH": os.path.join(tmp_dir, "jobs.sqlite3"),
+    }
+
+def run_python(args: list, env: dict) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+
+def slowest_imports(env: dict, top: int) -> list:
+    """Top-level imports of main_workflow by cumulative time, from -X importtime."""
+    stderr = run_python(["-X", "importtime", "-c", "import main_workflow"], env).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nesting adds two spaces of indent: depth 1 ("|   name") are main_workflow's own imports
+        if not name.startswith("   ") or name.startswith("     "):
+            continue
+        imports.append({"module": name.strip(), "ms": int(cumulative) / 1000})
+    return sorted(imports, key=lambda item: item["ms"], reverse=True)[:top]
+
+def median_ms(values) -> float:
+    return round(statistics.median(values) * 1000, 1)
+
+def profile(repeats: int, reruns: int, top: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = isolated_env(tmp_dir)
+        imports = [json.loads(run_python(["-c", IMPORT_SNIPPET, *DEFERRED_MODULES], env).stdout.strip().splitlines()[-1])
+                   for _ in range(repeats)]
+        loaded = sorted({name for run in imports for name in run["loaded"]})
+        if loaded:
+            raise SystemExit(f"❌ import main_workflow loaded deferred modules: {', '.join(loaded)}")
+        import_s = [run["import_s"] for run in imports]
+        runs = [json.loads(run_python(["-c", SCRIPT_SNIPPET, str(reruns)], env).stdout.strip().splitlines()[-1])
+                for _ in range(repeats)]
+        heavy = slowest_imports(env, top)
+
+    return {
+        "import_ms": median_ms(import_s),
+        "compile_ms": median_ms([run["compile_s"] for run in runs]),
+        "first_run_ms": median_ms([run["first_run_s"] for run in runs]),
+        "first_app_run_ms": median_ms([run["first_app_run_s"] for run in runs]),
+        "idle_rerun_ms": median_ms([s for run in runs for s in run["idle_rerun_s"]]),
+        "chat_rerun_ms": median_ms([s for run in runs for s in run["chat_rerun_s"]]),
+        "chat_message_ms": median_ms([s for run in runs for s in run["chat_message_s"]]),
+        "chat_fragment": all(run["chat_fragment"] for run in runs),
+        "slowest_imports": heavy,
+        "exceptions": sorted({e for run in runs for e in run["exception"]}),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per measurement")
+    parser.add_argument("--reruns", type=int, default=10, help="Idle and chat reruns per interpreter")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports to list")
+    parser.add_argument("--output", help="Write the profile as JSON")
+    parser.add_argument("--compare", help="Previous profile JSON to diff against")
+    args = parser.parse_args()
+
+    result = profile(args.repeats, args.reruns, args.top)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print(f"{'metric':<18} {'median ms':>10}" + (f" {'before':>10} {'change':>8}" if baseline else ""))
+    for key in ("import_ms", "compile_ms", "first_run_ms", "first_app_run_ms", "idle_rerun_ms", "chat_rerun_ms", "chat_message_ms"):
+        line = f"{key:<18} {result[key]:>10.1f}"
+        if baseline:
+            before = baseline.get(key)
+            line += f" {before:>10.1f} {(result[key] - before) / before:>+8.0%}" if before else ""
+        print(line)
+    print(f"chat_message is {'a fragment' if result['chat_fragment'] else 'a full'} rerun")
+    print("\nSlowest imports of main_workflow:")
+    for item in result["slowest_imports"]:
+        print(f"  {item['module']:<28} {item['ms']:>8.1f} ms")
+    if result["exceptions"]:
+        print(f"\n⚠️ App raised: {result['exceptions']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Per-lookup latency and peak browser memory: fresh Chrome per lookup vs the warm pool.
+
+N client threads each run M tracking lookups through the provider chain
+(--providers, default TRACKING_PROVIDERS), once with BROWSER_POOL_SIZE=0
+semantics for the browser (start + quit Chrome per lookup, the old behaviour)
+and once per pool size. Pages come from a local HTTP server that fills the
+status label client-side after --page-delay-ms, so the numbers measure browser
+cost rather than Servientrega. The http provider scrapes that page (and falls
+through to the browser, as on the live site) unless --http-api points it at the
+server's JSON endpoint, the equivalent of setting SERVIENTREGA_API_URL. The
+table shows how many lookups each provider answered.
+Needs Chrome + chromedriver for the selenium provider; memory is the peak
+summed RSS of this process's chrome/chromedriver children (psutil).
+
+    python benchmarks/bench_tracking_pool.py --clients 4 --lookups 5 --pool-sizes 0 2 4
+    python benchmarks/bench_tracking_pool.py --providers http selenium --http-api
+"""
+import json
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_pool import PSUTIL_AVAILABLE, BrowserPool
+from servientrega_checker import STATUS_LABEL_ID, read_tracking_status
+from tracking_providers import TRACKING_PROVIDERS, HttpTrackingProvider, TrackingProviderChain
+
+if PSUTIL_AVAILABLE:
+    import psutil
+
+PAGE = """<html><body><div class="tittle_cotizador"><div><h1>
+<span id="{label}" style="display:none"></span></h1></div></div>
+<script>setTimeout(function () {{
+  var label = document.getElementById("{label}");
+  label.textContent = "ENTREGADO"; label.style.display = "inline";
+}}, {delay_ms});</script></body></html>"""
+
+def start_tracking_site(delay_ms: int) -> ThreadingHTTPServer:
+    body = PAGE.format(label=STATUS_LABEL_ID, delay_ms=delay_ms).encode()
+
+    api_body = json.dumps({"Results": [{"EstadoActual": "ENTREGADO"}]}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/api/tracking/"):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(api_body)))
+                self.end_headers()
+                self.wfile.write(api_body)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class BrowserMemorySampler:
+    """Peak summed RSS and count of chrome/chromedriver children while running."""
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.peak_mb = 0.0
+        self.peak_processes = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        if PSUTIL_AVAILABLE:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        me = psutil.Process()
+        while not self._stopped.is_set():
+            rss = processes = 0
+            for child in me.children(recursive=True):
+                try:
+                    if "chrom" in child.name().lower():
+                        rss += child.memory_info().rss
+                        processes += 1
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            self.peak_mb = max(self.peak_mb, rss / (1024 * 1024))
+            self.peak_processes = max(self.peak_processes, processes)
+            self._stopped.wait(self.interval_s)
+
+class PoolBrowserProvider:
+    """The selenium provider bound to the pool under test and the local page."""
+    name = "selenium"
+
+    def __init__(self, pool: BrowserPool, url: str):
+        self.pool = pool
+        self.url = url
+
+    def lookup(self, tracking_number) -> str:
+        with self.pool.lease() as driver:
+            return read_tracking_status(driver, f"{self.url}?Guia={tracking_number}", timeout=30)
+
+def build_chain(providers: list, pool: BrowserPool, base_url: str, http_api: bool) -> TrackingProviderChain:
+    chain = []
+    for name in providers:
+        if name == "http":
+            chain.append(HttpTrackingProvider(
+                page_url=f"{base_url}/RastreoEnvioDetalle.html?Guia={{tracking_number}}",
+                api_url=f"{base_url}/api/tracking/{{tracking_number}}" if http_api else "",
+            ))
+        elif name == "selenium":
+            chain.append(PoolBrowserProvider(pool, f"{base_url}/RastreoEnvioDetalle.html"))
+        else:
+            raise SystemExit(f"Unknown provider {name}")
+    return TrackingProviderChain(chain)
+
+def run(chain: TrackingProviderChain, clients: int, lookups_per_client: int) -> dict:
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client(client_id):
+        barrier.wait()
+        for i in range(lookups_per_client):
+            start = time.perf_counter()
+            try:
+                status = chain.lookup(f"{client_id:05d}{i:05d}")
+                if status.startswith("ERROR:"):
+                    raise RuntimeError(status)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    with BrowserMemorySampler() as memory:
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_s = time.perf_counter() - start
+
+    values = np.array(latencies or [np.nan]) * 1000
+    return {
+        "lookups": len(latencies),
+        "errors": errors,
+        "throughput_lps": len(latencies) / wall_s,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "peak_mb": memory.peak_mb if PSUTIL_AVAILABLE else float("nan"),
+        "peak_processes": memory.peak_processes,
+        "answered_by": {name: stats["answered"] for name, stats in chain.stats().items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tracking lookups: fresh Chrome vs warm pool")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=5, help="Lookups per client")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 2, 4],
+                        help="0 = fresh browser per lookup (previous behaviour)")
+    parser.add_argument("--max-uses", type=int, default=50)
+    parser.add_argument("--page-delay-ms", type=int, default=200, help="Delay before the status label appears")
+    parser.add_argument("--providers", nargs="+", default=TRACKING_PROVIDERS, help="Provider chain, in order")
+    parser.add_argument("--http-api", action="store_true",
+                        help="Point the http provider at the JSON endpoint (as with SERVIENTREGA_API_URL set)")
+    args = parser.parse_args()
+
+    server = start_tracking_site(args.page_delay_ms)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    if not PSUTIL_AVAILABLE:
+        print("⚠️ psutil not installed: peak memory is not measured")
+
+    http_mode = (" (JSON API)" if args.http_api else " (page scrape)") if "http" in args.providers else ""
+    print(f"📊 {args.clients} clients x {args.lookups} lookups, page delay {args.page_delay_ms} ms, "
+          f"providers {' -> '.join(args.providers)}{http_mode}")
+    print(f"{'pool':>6} {'warm s':>7} {'lps':>6} {'p50 ms':>8} {'p95 ms':>8} {'peak MB':>8} {'procs':>6} {'errors':>6}  answered by")
+
+    for size in args.pool_sizes:
+        pool = BrowserPool(size=size, max_uses=args.max_uses)
+        start = time.perf_counter()
+        if "selenium" in args.providers:
+            pool.warm(wait=True)
+        warm_s = time.perf_counter() - start
+        try:
+            result = run(build_chain(args.providers, pool, base_url, args.http_api), args.clients, args.lookups)
+        finally:
+            pool.close()
+        label = str(size) if size else "fresh"
+        answered = ", ".join(f"{name} {count}" for name, count in result["answered_by"].items())
+        print(f"{label:>6} {warm_s:7.1f} {result['throughput_lps']:6.2f} {result['p50_ms']:8.0f} "
+              f"{result['p95_ms']:8.0f} {result['peak_mb']:8.0f} {result['peak_processes']:6d} {len(result['errors']):6d}  {answered}")
+        for error in sorted(set(result["errors"]))[:3]:
+            print(f"       ⚠️ {error.splitlines()[0][:120]}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Bounded pool of warm headless Chrome drivers for the tracking lookups.
+
+Starting Chrome costs seconds and hundreds of MB, so drivers are started
+ahead of time and reused:
+  - at most BROWSER_POOL_SIZE drivers exist; extra lookups wait for a lease
+  - a driver is health-checked before each lease and reset (cookies, storage,
+    extra windows, about:blank) when it comes back
+  - it is recycled after BROWSER_MAX_USES leases, or when the lookup raised a
+    WebDriver/session error (a page timeout leaves the driver usable)
+  - a watchdog kills the process tree of any lease held longer than
+    BROWSER_LEASE_TIMEOUT_S, which unblocks the hung lookup with an error
+
+BROWSER_POOL_SIZE=0 disables pooling: every lookup starts and quits its own
+browser, as before.
+"""
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+
+PSUTIL_AVAILABLE = False
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    pass
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "50"))
+BROWSER_ACQUIRE_TIMEOUT_S = float(os.getenv("BROWSER_ACQUIRE_TIMEOUT_S", "60"))
+# Longer than the 45s status wait in servientrega_checker
+BROWSER_LEASE_TIMEOUT_S = float(os.getenv("BROWSER_LEASE_TIMEOUT_S", "90"))
+BROWSER_WATCHDOG_INTERVAL_S = 5
+
+# WebDriverExceptions about the page, not the browser: the driver is reset and reused
+PAGE_ERRORS = (TimeoutException, NoSuchElementException, StaleElementReferenceException)
+
+class BrowserPoolTimeout(RuntimeError):
+    pass
+
+def driver_broken(error: BaseException) -> bool:
+    """Whether an error raised during a lease leaves the driver in an unknown state (crash, lost session)."""
+    return isinstance(error, WebDriverException) and not isinstance(error, PAGE_ERRORS)
+
+def new_chrome_driver():
+    options = ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument("--window-size=1920,1080")
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(BROWSER_LEASE_TIMEOUT_S)
+    return driver
+
+def _driver_pid(driver):
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return process.pid if process is not None else None
+
+def kill_driver(driver):
+    """Kill chromedriver and its Chrome children without talking to them (they may be hung)."""
+    pid = _driver_pid(driver)
+    if pid is None:
+        return
+    try:
+        if PSUTIL_AVAILABLE:
+            parent = psutil.Process(pid)
+            for child in parent.children(recursive=True):
+                child.kill()
+            parent.kill()
+        else:
+            driver.service.process.kill()
+    except Exception:
+        pass
+
+def quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        kill_driver(driver)
+
+class _PooledDriver:
+    __slots__ = ("driver", "uses", "leased_at", "reaped")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.leased_at = None
+        self.reaped = False
+
+class BrowserPool:
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = BROWSER_MAX_USES,
+                 lease_timeout_s: float = BROWSER_LEASE_TIMEOUT_S, factory=new_chrome_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self.lease_timeout_s = lease_timeout_s
+        self.factory = factory
+        self._slots = threading.BoundedSemaphore(max(size, 1))
+        self._lock = threading.Lock()
+        self._idle = []
+        self._leased = set()
+        self._starting = 0
+        self._retiring = 0
+        self._direct = 0
+        self._closed = False
+        self._watchdog = None
+        self.created = 0
+        self.leases = 0
+        self.recycled = 0
+        self.health_failures = 0
+        self.reaped = 0
+        self.acquire_s = 0.0
+
+    def warm(self, wait: bool = False):
+        """Start the idle drivers (in the background unless wait) so the first lookups don't pay for Chrome startup."""
+        if self.size and wait:
+            self._fill()
+        elif self.size:
+            threading.Thread(target=self._fill, name="browser-pool-warm", daemon=True).start()
+        return self
+
+    def _fill(self):
+        # Hold a slot while starting so warm-up never races a lookup past the bound
+        while self._slots.acquire(blocking=False):
+            try:
+                with self._lock:
+                    if self._closed or len(self._idle) + len(self._leased) + self._starting >= self.size:
+                        return
+                    self._starting += 1
+                try:
+                    item = self._create()
+                except Exception as e:
+                    with self._lock:
+                        self._starting -= 1
+                    print(f"⚠️ Browser warm-up failed: {e}")
+                    return
+                with self._lock:
+                    self._starting -= 1
+                    self._idle.append(item)
+            finally:
+                self._slots.release()
+
+    def _create(self) -> _PooledDriver:
+        driver = self.factory()
+        with self._lock:
+            self.created += 1
+        return _PooledDriver(driver)
+
+    def _healthy(self, item: _PooledDriver) -> bool:
+        process = getattr(getattr(item.driver, "service", None), "process", None)
+        if process is not None and process.poll() is not None:
+            return False
+        try:
+            return item.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _reset(self, item: _PooledDriver):
+        driver = item.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def _retire(self, item: _PooledDriver):
+        with self._lock:
+            self.recycled += 1
+            self._retiring += 1
+        # quit() can take a second or hang on a broken driver; never block the lookup on it
+        threading.Thread(target=self._quit_retired, args=(item.driver,), name="browser-pool-quit", daemon=True).start()
+
+    def _quit_retired(self, driver):
+        try:
+            quit_driver(driver)
+        finally:
+            with self._lock:
+                self._retiring -= 1
+
+    def _acquire(self, timeout: float) -> _PooledDriver:
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            raise BrowserPoolTimeout(f"No tracking browser free after {timeout:.0f}s")
+        started = False
+        try:
+            while True:
+                with self._lock:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed")
+                    item = self._idle.pop() if self._idle else None
+                    if item is None:
+                        self._starting += 1
+                        started = True
+                if item is None:
+                    item = self._create()
+                    break
+                if self._healthy(item):
+                    break
+                with self._lock:
+                    self.health_failures += 1
+                self._retire(item)
+        except BaseException:
+            if started:
+                with self._lock:
+                    self._starting -= 1
+            self._slots.release()
+            raise
+
+        with self._lock:
+            if started:
+                self._starting -= 1
+            item.leased_at = time.monotonic()
+            self._leased.add(item)
+            self.leases += 1
+            self.acquire_s += time.perf_counter() - start
+        self._start_watchdog()
+        return item
+
+    def _release(self, item: _PooledDriver, failed: bool):
+        try:
+            reuse = not (failed or item.reaped or self._closed) and item.uses + 1 < self.max_uses
+            if reuse:
+                # Still counted as leased, so the watchdog also covers a reset that hangs
+                try:
+                    self._reset(item)
+                except Exception:
+                    reuse = False
+            with self._lock:
+                self._leased.discard(item)
+                item.leased_at = None
+                item.uses += 1
+                reuse = reuse and not item.reaped and not self._closed
+                if reuse:
+                    self._idle.append(item)
+            if not reuse:
+                self._retire(item)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def lease(self, timeout: float = BROWSER_ACQUIRE_TIMEOUT_S):
+        """
+        Borrow a driver for one lookup. If the body raises a WebDriver or
+        session error the driver is recycled rather than returned, since its
+        state is unknown; page timeouts and other errors only reset it.
+        """
+        if not self.size:
+            driver = self.factory()
+            with self._lock:
+                self._direct += 1
+            try:
+                yield driver
+            finally:
+                quit_driver(driver)
+                with self._lock:
+                    self._direct -= 1
+            return
+
+        item = self._acquire(timeout)
+        failed = False
+        try:
+            yield item.driver
+        except BaseException as e:
+            failed = driver_broken(e)
+            raise
+        finally:
+            self._release(item, failed)
+
+    def _start_watchdog(self):
+        if self._watchdog is None:
+            with self._lock:
+                if self._watchdog is None:
+                    self._watchdog = threading.Thread(target=self._watch, name="browser-pool-watchdog", daemon=True)
+                    self._watchdog.start()
+
+    def _watch(self):
+        while not self._closed:
+            time.sleep(BROWSER_WATCHDOG_INTERVAL_S)
+            self.reap()
+
+    def reap(self) -> int:
+        """Kill drivers leased for longer than lease_timeout_s; their lookups then fail and recycle them."""
+        now = time.monotonic()
+        with self._lock:
+            hung = [item for item in self._leased
+                    if not item.reaped and item.leased_at is not None and now - item.leased_at > self.lease_timeout_s]
+            for item in hung:
+                item.reaped = True
+            self.reaped += len(hung)
+        for item in hung:
+            print(f"⚠️ Killing tracking browser stuck for over {self.lease_timeout_s:.0f}s")
+            kill_driver(item.driver)
+        return len(hung)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for item in idle:
+            quit_driver(item.driver)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "starting": self._starting,
+                "retiring": self._retiring,
+                "direct": self._direct,
+                "created": self.created,
+                "leases": self.leases,
+                "recycled": self.recycled,
+                "health_failures": self.health_failures,
+                "reaped": self.reaped,
+                "avg_acquire_ms": self.acquire_s / self.leases * 1000 if self.leases else 0.0,
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide pool shared by every Streamlit session, warmed on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool().warm()
+            atexit.register(_pool.close)
+        return _pool
+
+def browser_pool_stats() -> dict:
+    return _pool.stats() if _pool is not None else {}
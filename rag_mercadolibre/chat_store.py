@@ -0,0 +1,77 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CHAT_DB_PATH = os.getenv("CHAT_DB_PATH", "chat_history.sqlite3")
+
+class ConversationStore:
+    """Append-only SQLite store for chat turns; the UI keeps only a small window in memory."""
+
+    def __init__(self, path: str = CHAT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                extra TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, id)"
+        )
+        self._conn.commit()
+
+    def append(self, conversation_id: str, message: dict) -> int:
+        """Persist a message and return its row id."""
+        extra = {k: v for k, v in message.items() if k not in ("id", "role", "content")}
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO messages (conversation_id, role, content, extra, created_at) VALUES (?, ?, ?, ?, ?)",
+                (conversation_id, message["role"], message["content"],
+                 json.dumps(extra) if extra else None, time.time())
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def load_before(self, conversation_id: str, before_id: int, limit: int) -> list:
+        """Return up to `limit` messages older than `before_id`, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, role, content, extra FROM messages "
+                "WHERE conversation_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (conversation_id, before_id, limit)
+            ).fetchall()
+        return [self._to_message(row) for row in reversed(rows)]
+
+    def has_before(self, conversation_id: str, before_id: int) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM messages WHERE conversation_id = ? AND id < ? LIMIT 1",
+                (conversation_id, before_id)
+            ).fetchone()
+        return row is not None
+
+    def count(self, conversation_id: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()[0]
+
+    @staticmethod
+    def _to_message(row) -> dict:
+        message_id, role, content, extra = row
+        message = {"id": message_id, "role": role, "content": content}
+        if extra:
+            message.update(json.loads(extra))
+        return message
@@ -0,0 +1,308 @@
+"""
+Streaming snapshots of the Weaviate collection (properties + vectors).
+
+A backup is a directory with:
+  properties.parquet  zstd-compressed Parquet, one row per object (uuid + properties)
+  vectors.f32         raw float32 matrix, row i belongs to Parquet row i
+  meta.json           count, dim, property types, timings
+
+Backups are written by streaming the cursor iterator in fixed-size row groups
+(constant memory) and restored through the Weaviate batch writer with the
+stored vectors, so a cold start never calls the embedding API.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from importlib.util import find_spec
+
+import numpy as np
+
+from local_index import object_vector
+
+# pyarrow is imported on first backup/restore/export, not when the UI imports this module
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_BATCH_SIZE = 1000
+RESTORE_CONCURRENCY = int(os.getenv("RESTORE_CONCURRENCY", "4"))
+BACKUP_FORMAT_VERSION = 1
+
+PROPERTIES_FILE = "properties.parquet"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+
+def _arrow_type(data_type: str):
+    import pyarrow as pa
+
+    return {
+        "text": pa.string(),
+        "number": pa.float64(),
+        "int": pa.int64(),
+        "boolean": pa.bool_(),
+    }.get(data_type, pa.string())
+
+def _collection_property_types(collection) -> dict:
+    """{property name: weaviate data type} from the live schema, in schema order."""
+    return {prop.name: prop.data_type.value for prop in collection.config.get().properties}
+
+def _to_arrow_value(value, data_type: str):
+    if value is None:
+        return None
+    if data_type not in ("number", "int", "boolean") and not isinstance(value, str):
+        return value.isoformat() if isinstance(value, datetime) else json.dumps(value, default=str)
+    return value
+
+class _RowGroupWriter:
+    """Buffers rows and writes them as Parquet row groups plus the matching vector block."""
+
+    def __init__(self, directory: str, property_types: dict, with_vectors: bool, batch_size: int):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.property_types = property_types
+        self.batch_size = batch_size
+        self.schema = pa.schema(
+            [("uuid", pa.string()), ("has_vector", pa.bool_())]
+            + [(name, _arrow_type(data_type)) for name, data_type in property_types.items()]
+        )
+        self.parquet = pq.ParquetWriter(os.path.join(directory, PROPERTIES_FILE), self.schema, compression="zstd")
+        self.vectors_out = open(os.path.join(directory, VECTORS_FILE), "wb") if with_vectors else None
+        self.rows = []
+        self.vectors = []
+        self.count = 0
+        self.missing_vectors = 0
+        self.pending_zero_rows = 0
+        self.dim = None
+
+    def add(self, obj):
+        row = {"uuid": str(obj.uuid)}
+        for name, data_type in self.property_types.items():
+            row[name] = _to_arrow_value(obj.properties.get(name), data_type)
+
+        if self.vectors_out is not None:
+            vector = object_vector(obj)
+            if vector and self.dim is None:
+                self.dim = len(vector)
+            has_vector = bool(vector) and len(vector) == self.dim
+            # Keep row i <-> vector i aligned: objects without a usable vector get a zero row
+            self.vectors.append(np.asarray(vector, dtype=np.float32) if has_vector else None)
+            row["has_vector"] = has_vector
+            self.missing_vectors += not has_vector
+        else:
+            row["has_vector"] = False
+
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        import pyarrow as pa
+
+        self.parquet.write_table(pa.Table.from_pylist(self.rows, schema=self.schema))
+        if self.vectors_out is not None:
+            if self.dim is None:
+                # No vector seen yet, so the row width is unknown; write these zero rows later
+                self.pending_zero_rows += len(self.vectors)
+            else:
+                block = np.zeros((self.pending_zero_rows + len(self.vectors), self.dim), dtype=np.float32)
+                for i, vector in enumerate(self.vectors, start=self.pending_zero_rows):
+                    if vector is not None:
+                        block[i] = vector
+                self.vectors_out.write(block.tobytes())
+                self.pending_zero_rows = 0
+        self.count += len(self.rows)
+        self.rows = []
+        self.vectors = []
+
+    def close(self):
+        self.flush()
+        self.parquet.close()
+        if self.vectors_out is not None:
+            self.vectors_out.close()
+
+def backup_collection(collection, directory: str = None, batch_size: int = BACKUP_BATCH_SIZE) -> dict:
+    """
+    Stream the whole collection into a new backup directory and return its meta.
+
+    Memory stays bounded by one row group; the backup is written to a temp
+    directory and renamed into place only once complete.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for backups (pip install pyarrow)")
+
+    directory = directory or os.path.join(BACKUP_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    start = time.time()
+    property_types = _collection_property_types(collection)
+    writer = _RowGroupWriter(tmp_dir, property_types, with_vectors=True, batch_size=batch_size)
+    try:
+        for obj in collection.iterator(include_vector=True):
+            writer.add(obj)
+            if writer.count and writer.count % 10000 == 0 and not writer.rows:
+                print(f"📦 Backup: {writer.count} objects")
+    finally:
+        writer.close()
+
+    meta = {
+        "format_version": BACKUP_FORMAT_VERSION,
+        "collection": collection.name,
+        "count": writer.count,
+        "dim": writer.dim,
+        "missing_vectors": writer.missing_vectors,
+        "properties": property_types,
+        "created_at": time.time(),
+        "seconds": round(time.time() - start, 2),
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    meta["path"] = directory
+    meta["size_bytes"] = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"✅ Backup {directory}: {meta['count']} objects in {meta['seconds']}s")
+    return meta
+
+def load_backup_meta(directory: str) -> dict:
+    with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    meta["path"] = directory
+    return meta
+
+def list_backups(base_dir: str = BACKUP_DIR) -> list:
+    """Complete backups under base_dir, newest first."""
+    if not os.path.isdir(base_dir):
+        return []
+    backups = []
+    for name in sorted(os.listdir(base_dir), reverse=True):
+        directory = os.path.join(base_dir, name)
+        if name.endswith(".tmp") or not os.path.exists(os.path.join(directory, META_FILE)):
+            continue
+        try:
+            backups.append(load_backup_meta(directory))
+        except (OSError, ValueError):
+            continue
+    return backups
+
+def _ensure_collection(client, name: str, property_types: dict):
+    if client.collections.exists(name):
+        return client.collections.get(name)
+
+    from weaviate.classes.config import Configure, DataType, Property
+
+    client.collections.create(
+        name=name,
+        properties=[Property(name=prop, data_type=DataType(data_type)) for prop, data_type in property_types.items()],
+        vectorizer_config=Configure.Vectorizer.none(),
+    )
+    print(f"✅ Collection '{name}' created from backup schema")
+    return client.collections.get(name)
+
+def restore_collection(client, directory: str, batch_size: int = BACKUP_BATCH_SIZE, progress=None) -> dict:
+    """
+    Load a backup into Weaviate through the batch writer, reusing the stored vectors.
+
+    Objects keep their uuids, so restoring over a live collection upserts rather
+    than duplicates. progress(processed, total) is called once per row group.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for backups (pip install pyarrow)")
+
+    meta = load_backup_meta(directory)
+    count, dim = meta["count"], meta["dim"]
+    if count and not dim:
+        raise ValueError(f"Backup {directory} has no vectors")
+
+    vectors_path = os.path.join(directory, VECTORS_FILE)
+    if os.path.getsize(vectors_path) != count * (dim or 0) * 4:
+        raise ValueError(f"Backup {directory} is incomplete: vector file does not match {count} x {dim}")
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(count, dim)) if count else None
+
+    start = time.time()
+    collection = _ensure_collection(client, meta["collection"], meta["properties"])
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(os.path.join(directory, PROPERTIES_FILE))
+
+    position = 0
+    with collection.batch.fixed_size(batch_size=batch_size, concurrent_requests=RESTORE_CONCURRENCY) as batch:
+        for record_batch in parquet.iter_batches(batch_size=batch_size):
+            for row in record_batch.to_pylist():
+                object_uuid = row.pop("uuid")
+                has_vector = row.pop("has_vector")
+                batch.add_object(
+                    properties={key: value for key, value in row.items() if value is not None},
+                    uuid=object_uuid,
+                    vector=vectors[position].tolist() if has_vector else None,
+                )
+                position += 1
+            if progress:
+                progress(position, count)
+
+    failed = collection.batch.failed_objects
+    for failure in failed[:5]:
+        print(f"⚠️ {failure.message}")
+
+    summary = {
+        "total": count,
+        "succeeded": position - len(failed),
+        "failed": len(failed),
+        "seconds": round(time.time() - start, 2),
+    }
+    print(f"✅ Restored {summary['succeeded']}/{count} objects in {summary['seconds']}s")
+    return summary
+
+def export_properties(collection, path: str, batch_size: int = BACKUP_BATCH_SIZE) -> dict:
+    """Stream the catalog (no vectors) into a single zstd Parquet file, e.g. for spreadsheets or pandas."""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for exports (pip install pyarrow)")
+
+    directory = f"{path}.tmp"
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    writer = _RowGroupWriter(directory, _collection_property_types(collection), with_vectors=False, batch_size=batch_size)
+    try:
+        for obj in collection.iterator():
+            writer.add(obj)
+    finally:
+        writer.close()
+
+    os.replace(os.path.join(directory, PROPERTIES_FILE), path)
+    shutil.rmtree(directory, ignore_errors=True)
+    return {"path": path, "count": writer.count, "size_bytes": os.path.getsize(path)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Back up and restore the Weaviate collection with its vectors")
+    parser.add_argument("command", choices=["create", "restore", "list"])
+    parser.add_argument("--dir", help="Backup directory (restore defaults to the newest backup)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for meta in list_backups():
+            print(f"{meta['path']}: {meta['count']} objects, dim {meta['dim']}, {meta['seconds']}s")
+    else:
+        from batch_search import WEAVIATE_CLASS_NAME, connect_weaviate
+
+        client = connect_weaviate()
+        try:
+            if args.command == "create":
+                backup_collection(client.collections.get(WEAVIATE_CLASS_NAME), args.dir)
+            else:
+                backups = list_backups()
+                directory = args.dir or (backups[0]["path"] if backups else None)
+                if directory is None:
+                    print(f"❌ No backups found in {BACKUP_DIR}")
+                else:
+                    summary = restore_collection(client, directory)
+                    from ingest_jobs import JobStore
+                    JobStore().record_completed("restore", f"Restore {directory}", f"{summary['succeeded']} restored")
+        finally:
+            client.close()
@@ -0,0 +1,321 @@
+"""
+Consistency validator: the Weaviate collection against the source Excel catalog.
+
+Both sides are streamed in parallel (cursor iterator / one sheet at a time) into
+two temporary SQLite tables, so memory stays flat no matter how large the
+catalog gets; every check is then a SQL query over indexed columns. The result
+is report.json plus repair.jsonl, one repair action per title, which
+ingest_weaviate.apply_repairs (the "repair" ingest job) consumes.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+import numpy as np
+
+from embedding_cache import content_hash
+from local_index import object_vector
+
+VALIDATION_DIR = os.getenv("VALIDATION_DIR", "validation_reports")
+# Expected embedding size; by default the most common dimension in the collection
+EXPECTED_VECTOR_DIM = int(os.getenv("EXPECTED_VECTOR_DIM", "0")) or None
+VALIDATION_BATCH_SIZE = 1000
+MAX_SAMPLES = 10
+
+NAN_STRINGS = ("nan", "none", "nat")
+REPORT_FILE = "report.json"
+REPAIR_FILE = "repair.jsonl"
+
+def title_key(title) -> str:
+    """Join key between catalog rows and stored objects."""
+    return " ".join(str(title or "").lower().split())
+
+def iter_source_catalog(file_path: str = None):
+    """Yield (title, category, content_hash) for every catalog row, one sheet in memory at a time."""
+    import ingest_weaviate
+
+    for _, sheet_df in ingest_weaviate.iter_catalog_sheets(file_path or ingest_weaviate.EXCEL_FILE_PATH):
+        for _, row in sheet_df.iterrows():
+            yield row.get("title"), row.get("category"), content_hash(ingest_weaviate.build_embedding_text(row))
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    return conn
+
+def _load_objects(collection, path: str, batch_size: int) -> int:
+    conn = _connect(path)
+    conn.execute(
+        "CREATE TABLE objects (uuid TEXT, title TEXT, title_key TEXT, category TEXT, content_hash TEXT, "
+        "vector_state TEXT, dim INTEGER, nan_props TEXT)"
+    )
+    count = 0
+    rows = []
+    for obj in collection.iterator(include_vector=True):
+        properties = obj.properties
+        vector = object_vector(obj)
+        if not vector:
+            vector_state, dim = "missing", None
+        else:
+            dim = len(vector)
+            vector_state = "ok" if np.any(np.asarray(vector, dtype=np.float32)) else "zero"
+        nan_props = [
+            name for name, value in properties.items()
+            if isinstance(value, str) and value.strip().lower() in NAN_STRINGS
+        ]
+        rows.append((
+            str(obj.uuid), properties.get("title"), title_key(properties.get("title")), properties.get("category"),
+            properties.get("content_hash"), vector_state, dim, ",".join(sorted(nan_props)) or None,
+        ))
+        if len(rows) >= batch_size:
+            conn.executemany("INSERT INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            count += len(rows)
+            rows = []
+    conn.executemany("INSERT INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    count += len(rows)
+    conn.execute("CREATE INDEX idx_objects_title ON objects (title_key)")
+    conn.commit()
+    conn.close()
+    return count
+
+def _load_source(source_rows, path: str, batch_size: int) -> int:
+    conn = _connect(path)
+    conn.execute("CREATE TABLE source (title TEXT, title_key TEXT, category TEXT, content_hash TEXT)")
+    count = 0
+    rows = []
+    for title, category, text_hash in source_rows:
+        rows.append((title, title_key(title), category, text_hash))
+        if len(rows) >= batch_size:
+            conn.executemany("INSERT INTO source VALUES (?, ?, ?, ?)", rows)
+            count += len(rows)
+            rows = []
+    conn.executemany("INSERT INTO source VALUES (?, ?, ?, ?)", rows)
+    count += len(rows)
+    conn.execute("CREATE INDEX idx_source_title ON source (title_key, content_hash)")
+    conn.commit()
+    conn.close()
+    return count
+
+def _check(conn, where: str, params=()) -> dict:
+    """Count and sample objects matching a condition on the joined `o` (objects) alias."""
+    count = conn.execute(f"SELECT COUNT(*) FROM objects o WHERE {where}", params).fetchone()[0]
+    samples = [
+        {"uuid": uuid, "title": title}
+        for uuid, title in conn.execute(f"SELECT uuid, title FROM objects o WHERE {where} LIMIT {MAX_SAMPLES}", params)
+    ]
+    return {"count": count, "samples": samples}
+
+def _category_counts(conn) -> list:
+    rows = conn.execute(
+        """
+        SELECT category, SUM(in_collection), SUM(in_source) FROM (
+            SELECT category, 1 AS in_collection, 0 AS in_source FROM objects
+            UNION ALL
+            SELECT category, 0, 1 FROM source
+        ) GROUP BY category ORDER BY category
+        """
+    ).fetchall()
+    return [
+        {"category": category, "collection": collection, "source": source, "diff": collection - source}
+        for category, collection, source in rows
+    ]
+
+def _object_problems(expected_dim) -> str:
+    """SQL expression listing why an object must be re-ingested (NULL when it is fine)."""
+    return f"""
+        NULLIF(
+            CASE WHEN o.vector_state = 'missing' THEN 'missing_vector,' ELSE '' END ||
+            CASE WHEN o.vector_state = 'zero' THEN 'zero_vector,' ELSE '' END ||
+            CASE WHEN o.dim IS NOT NULL AND o.dim != {int(expected_dim or 0)} AND {int(bool(expected_dim))}
+                 THEN 'dimension_mismatch,' ELSE '' END ||
+            CASE WHEN o.content_hash IS NULL THEN 'missing_content_hash,'
+                 WHEN NOT EXISTS (SELECT 1 FROM source s WHERE s.title_key = o.title_key AND s.content_hash = o.content_hash)
+                 THEN 'stale_content_hash,' ELSE '' END ||
+            CASE WHEN o.nan_props IS NOT NULL THEN 'nan_strings,' ELSE '' END,
+        '')
+    """
+
+def _write_repairs(conn, expected_dim, path: str) -> int:
+    """
+    One action per title present in the catalog:
+      reingest - some object is broken or the title has fewer objects than catalog rows;
+                 all its objects are deleted and its catalog rows re-ingested
+      delete   - surplus duplicates beyond the catalog's row count for that title
+    Titles not in the catalog (e.g. PDF imports) are only reported, never touched.
+    """
+    cursor = conn.execute(
+        f"""
+        SELECT t.title_key, t.title, t.source_rows, o.uuid, {_object_problems(expected_dim)}
+        FROM (SELECT title_key, MIN(title) AS title, COUNT(*) AS source_rows FROM source GROUP BY title_key) t
+        LEFT JOIN objects o ON o.title_key = t.title_key
+        ORDER BY t.title_key, o.rowid
+        """
+    )
+    actions = 0
+    with open(path, "w", encoding="utf-8") as out:
+        for key, group in groupby(cursor, key=lambda row: row[0]):
+            group = list(group)
+            title, source_rows = group[0][1], group[0][2]
+            uuids = [row[3] for row in group if row[3]]
+            reasons = sorted({reason for row in group if row[4] for reason in row[4].strip(",").split(",")})
+
+            if len(uuids) < source_rows:
+                reasons.append("missing_from_collection")
+            if reasons:
+                action = {"action": "reingest", "title_key": key, "title": title, "uuids": uuids, "reasons": reasons}
+            elif len(uuids) > source_rows:
+                action = {"action": "delete", "title_key": key, "title": title,
+                          "uuids": uuids[source_rows:], "reasons": ["duplicate_title"]}
+            else:
+                continue
+            out.write(json.dumps(action, ensure_ascii=False) + "\n")
+            actions += 1
+    return actions
+
+def validate_collection(collection, source_rows, output_dir: str = None,
+                        batch_size: int = VALIDATION_BATCH_SIZE) -> dict:
+    """
+    Compare the collection with the source catalog and write report.json + repair.jsonl.
+
+    source_rows yields (title, category, content_hash), e.g. iter_source_catalog().
+    Returns the report dict (also written to disk).
+    """
+    start = time.time()
+    output_dir = output_dir or os.path.join(VALIDATION_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(output_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="validate-")
+    objects_db = os.path.join(work_dir, "objects.sqlite3")
+    source_db = os.path.join(work_dir, "source.sqlite3")
+
+    try:
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="validate") as executor:
+            objects_future = executor.submit(_load_objects, collection, objects_db, batch_size)
+            source_future = executor.submit(_load_source, source_rows, source_db, batch_size)
+            object_count, source_count = objects_future.result(), source_future.result()
+        stream_s = time.time() - start
+
+        conn = sqlite3.connect(objects_db)
+        conn.execute("ATTACH DATABASE ? AS src", (source_db,))
+        conn.execute("CREATE TEMP VIEW source AS SELECT * FROM src.source")
+
+        expected_dim = EXPECTED_VECTOR_DIM or (conn.execute(
+            "SELECT dim FROM objects WHERE vector_state = 'ok' GROUP BY dim ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone() or (None,))[0]
+
+        categories = _category_counts(conn)
+        nan_by_property = {}
+        for (nan_props,) in conn.execute("SELECT nan_props FROM objects WHERE nan_props IS NOT NULL"):
+            for name in nan_props.split(","):
+                nan_by_property[name] = nan_by_property.get(name, 0) + 1
+
+        duplicate_titles = conn.execute(
+            """
+            SELECT o.title, COUNT(*), (SELECT COUNT(*) FROM source s WHERE s.title_key = o.title_key) AS source_rows
+            FROM objects o GROUP BY o.title_key
+            HAVING COUNT(*) > MAX(source_rows, 1)
+            ORDER BY COUNT(*) DESC
+            """
+        ).fetchall()
+        missing_titles = conn.execute(
+            """
+            SELECT s.title FROM source s
+            WHERE NOT EXISTS (SELECT 1 FROM objects o WHERE o.title_key = s.title_key)
+            """
+        ).fetchall()
+        in_source = "EXISTS (SELECT 1 FROM source s WHERE s.title_key = o.title_key)"
+
+        checks = {
+            "missing_vectors": _check(conn, "o.vector_state = 'missing'"),
+            "zero_vectors": _check(conn, "o.vector_state = 'zero'"),
+            "dimension_mismatch": _check(conn, "o.dim IS NOT NULL AND o.dim != ?", (expected_dim or 0,))
+            if expected_dim else {"count": 0, "samples": []},
+            "missing_content_hash": _check(conn, "o.content_hash IS NULL"),
+            "stale_content_hash": _check(
+                conn,
+                f"o.content_hash IS NOT NULL AND {in_source} AND NOT EXISTS "
+                "(SELECT 1 FROM source s WHERE s.title_key = o.title_key AND s.content_hash = o.content_hash)"
+            ),
+            "nan_strings": {**_check(conn, "o.nan_props IS NOT NULL"), "by_property": nan_by_property},
+            "duplicate_titles": {
+                "count": len(duplicate_titles),
+                "samples": [
+                    {"title": title, "objects": objects, "source_rows": source_rows}
+                    for title, objects, source_rows in duplicate_titles[:MAX_SAMPLES]
+                ],
+            },
+            "missing_from_collection": {
+                "count": len(missing_titles),
+                "samples": [{"title": title} for (title,) in missing_titles[:MAX_SAMPLES]],
+            },
+            "not_in_source": _check(conn, f"NOT {in_source}"),
+        }
+
+        repair_path = os.path.join(output_dir, REPAIR_FILE)
+        repair_count = _write_repairs(conn, expected_dim, repair_path)
+        conn.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "generated_at": time.time(),
+        "seconds": round(time.time() - start, 2),
+        "stream_seconds": round(stream_s, 2),
+        "collection_count": object_count,
+        "source_count": source_count,
+        "expected_dim": expected_dim,
+        "category_mismatches": sum(1 for row in categories if row["diff"]),
+        "categories": categories,
+        "checks": checks,
+        "repair_count": repair_count,
+        "repair_path": repair_path,
+        "ok": repair_count == 0 and not any(
+            check["count"] for name, check in checks.items() if name != "not_in_source"
+        ),
+    }
+    report_path = os.path.join(output_dir, REPORT_FILE)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    report["report_path"] = report_path
+    print(f"{'✅' if report['ok'] else '⚠️'} Validation: {object_count} objects vs {source_count} catalog rows, "
+          f"{repair_count} repairs in {report['seconds']}s")
+    return report
+
+def load_repairs(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def latest_report(base_dir: str = VALIDATION_DIR) -> dict:
+    """Most recent report.json under base_dir, or None."""
+    if not os.path.isdir(base_dir):
+        return None
+    for name in sorted(os.listdir(base_dir), reverse=True):
+        path = os.path.join(base_dir, name, REPORT_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                report = json.load(f)
+            report["report_path"] = path
+            return report
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate the Weaviate collection against the source catalog")
+    parser.add_argument("--excel", help="Catalog file (defaults to ingest_weaviate.EXCEL_FILE_PATH)")
+    parser.add_argument("--out", help="Output directory for report.json and repair.jsonl")
+    args = parser.parse_args()
+
+    from batch_search import WEAVIATE_CLASS_NAME, connect_weaviate
+
+    client = connect_weaviate()
+    try:
+        report = validate_collection(client.collections.get(WEAVIATE_CLASS_NAME), iter_source_catalog(args.excel), args.out)
+        print(json.dumps({name: check["count"] for name, check in report["checks"].items()}, indent=2))
+        print(f"📄 {report['report_path']}\n🔧 {report['repair_path']}")
+    finally:
+        client.close()
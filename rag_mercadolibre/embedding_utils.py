@@ -1,20 +1,55 @@
+import asyncio
 import os
+import threading
 import time
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+from micro_batcher import MicroBatcher
+from single_flight import get_single_flight
+
 load_dotenv()
 
 EMBEDDING_MODEL = "models/embedding-001"
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
+if not GEMINI_API_KEY:
     print(" ADVERTENCIA: GEMINI_API_KEY no encontrada en embedding_utils")
 
+_genai = None
+_genai_lock = threading.Lock()
+
+def get_genai():
+    """Importa y configura google.generativeai en el primer embedding (la importación tarda ~1 s)."""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+_embedding_flight = get_single_flight("embedding")
+
+# Micro-batching: las consultas de todas las sesiones que llegan dentro de la ventana
+# se envían juntas en una sola llamada embed_content. Una consulta sola, sin otra
+# llamada en curso, se envía de inmediato (no espera la ventana)
+EMBEDDING_MICROBATCH_ENABLED = os.getenv("EMBEDDING_MICROBATCH", "true").lower() == "true"
+EMBEDDING_MICROBATCH_WINDOW_MS = float(os.getenv("EMBEDDING_MICROBATCH_WINDOW_MS", "10"))
+EMBEDDING_MICROBATCH_MAX = int(os.getenv("EMBEDDING_MICROBATCH_MAX", "32"))
+
 def get_embedding(text: str, retries=3) -> list[float]:
-    """Genera el embedding para un texto dado, con reintentos."""
+    """Genera el embedding para un texto dado, con reintentos.
+    Las llamadas concurrentes con el mismo texto comparten una sola petición a Gemini."""
+    return _embedding_flight.do(text, _embed_query, text, retries)
+
+def _embed_query(text: str, retries=3) -> list[float]:
+    if EMBEDDING_MICROBATCH_ENABLED:
+        return _query_batcher.submit((text, retries))
+    return _generate_embedding(text, retries)
+
+def _generate_embedding(text: str, retries=3) -> list[float]:
     if not GEMINI_API_KEY:
         print(" Error: No hay API key de Gemini configurada")
         return None
@@ -23,7 +58,7 @@ def get_embedding(text: str, retries=3) -> list[float]:
         try:
             print(f"🔄 Generando embedding para: '{text[:50]}...'")
             
-            result = genai.embed_content(
+            result = get_genai().embed_content(
                 model=EMBEDDING_MODEL,
                 content=text
             )
@@ -45,4 +80,101 @@ def get_embedding(text: str, retries=3) -> list[float]:
                 time.sleep(2)
     
     print(f" Fallo después de {retries} intentos")
-    return None
\ No newline at end of file
+    return None
+
+# Gemini acepta hasta 100 textos por llamada de embed_content
+EMBEDDING_BATCH_SIZE = 100
+
+def get_embeddings_batch(texts: list[str], batch_size: int = EMBEDDING_BATCH_SIZE, retries=3) -> list:
+    """Genera embeddings para varios textos en llamadas agrupadas. Devuelve None en las posiciones que fallen."""
+    if not GEMINI_API_KEY:
+        print(" Error: No hay API key de Gemini configurada")
+        return [None] * len(texts)
+
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        chunk_embeddings = None
+
+        for attempt in range(retries):
+            try:
+                print(f"🔄 Generando {len(chunk)} embeddings en lote ({start + 1}-{start + len(chunk)} de {len(texts)})")
+                result = get_genai().embed_content(
+                    model=EMBEDDING_MODEL,
+                    content=chunk
+                )
+                chunk_embeddings = result['embedding'] if isinstance(result, dict) else result.embedding
+                break
+            except Exception as e:
+                print(f" Error en lote, intento {attempt + 1}: {e}")
+                if attempt < retries - 1:
+                    time.sleep(2)
+
+        if chunk_embeddings is None or len(chunk_embeddings) != len(chunk):
+            print(f" Fallo el lote de {len(chunk)} textos después de {retries} intentos")
+            chunk_embeddings = [None] * len(chunk)
+        embeddings.extend(chunk_embeddings)
+
+    return embeddings
+
+def _embed_query_batch(queries: list) -> list:
+    """Lote del micro-batcher: (texto, reintentos) por consulta; se aplica el mayor número de reintentos pedido."""
+    return get_embeddings_batch([text for text, _ in queries], retries=max(retries for _, retries in queries))
+
+_query_batcher = MicroBatcher(
+    _embed_query_batch,
+    window_s=EMBEDDING_MICROBATCH_WINDOW_MS / 1000,
+    max_batch=min(EMBEDDING_MICROBATCH_MAX, EMBEDDING_BATCH_SIZE),
+    name="embedding-batcher",
+)
+
+def get_embedding_batcher_stats() -> dict:
+    return {"enabled": EMBEDDING_MICROBATCH_ENABLED, **_query_batcher.stats()}
+
+async def get_embedding_async(text: str, retries=3) -> list[float]:
+    """Versión asíncrona de get_embedding para el servicio ASGI (no bloquea el event loop)."""
+    if not GEMINI_API_KEY:
+        print(" Error: No hay API key de Gemini configurada")
+        return None
+
+    for attempt in range(retries):
+        try:
+            result = await get_genai().embed_content_async(
+                model=EMBEDDING_MODEL,
+                content=text
+            )
+            return result['embedding'] if isinstance(result, dict) else result.embedding
+        except Exception as e:
+            print(f" Error en intento {attempt + 1}: {e}")
+            if attempt < retries - 1:
+                await asyncio.sleep(2)
+
+    print(f" Fallo después de {retries} intentos")
+    return None
+
+async def get_embeddings_batch_async(texts: list[str], batch_size: int = EMBEDDING_BATCH_SIZE, retries=3) -> list:
+    """Versión asíncrona de get_embeddings_batch: los lotes se envían en paralelo."""
+    if not GEMINI_API_KEY:
+        print(" Error: No hay API key de Gemini configurada")
+        return [None] * len(texts)
+
+    async def embed_chunk(chunk):
+        for attempt in range(retries):
+            try:
+                result = await get_genai().embed_content_async(
+                    model=EMBEDDING_MODEL,
+                    content=chunk
+                )
+                chunk_embeddings = result['embedding'] if isinstance(result, dict) else result.embedding
+                if len(chunk_embeddings) == len(chunk):
+                    return chunk_embeddings
+            except Exception as e:
+                print(f" Error en lote, intento {attempt + 1}: {e}")
+            if attempt < retries - 1:
+                await asyncio.sleep(2)
+        print(f" Fallo el lote de {len(chunk)} textos después de {retries} intentos")
+        return [None] * len(chunk)
+
+    chunks = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*(embed_chunk(chunk) for chunk in chunks))
+    return [embedding for chunk_embeddings in results for embedding in chunk_embeddings]
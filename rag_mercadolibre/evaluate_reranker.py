@@ -0,0 +1,132 @@
+import argparse
+import json
+import math
+import time
+
+from weaviate import WeaviateClient
+from weaviate.connect import ConnectionParams
+
+from embedding_utils import get_embedding
+from product_hits import PRODUCT_HIT_PROPERTIES, to_product_hits
+from reranker import RERANK_OVERFETCH, get_rerank_stats, rerank_products
+
+WEAVIATE_CLASS_NAME = "MercadoLibreProduct"
+WEAVIATE_HOST = "localhost"
+WEAVIATE_PORT = 8090
+GOLDEN_QUERIES_PATH = "data/golden_queries.jsonl"
+
+def load_golden_queries(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def is_relevant(product, relevant_terms: list) -> bool:
+    haystack = f"{product.title} {product.character or ''}".lower()
+    return any(term.lower() in haystack for term in relevant_terms)
+
+def precision_at_k(products, relevant_terms, k):
+    top = products[:k]
+    if not top:
+        return 0.0
+    return sum(is_relevant(p, relevant_terms) for p in top) / len(top)
+
+def ndcg_at_k(products, relevant_terms, k):
+    gains = [1.0 if is_relevant(p, relevant_terms) else 0.0 for p in products[:k]]
+    dcg = sum(g / math.log2(i + 2) for i, g in enumerate(gains))
+    ideal = sorted(
+        (1.0 if is_relevant(p, relevant_terms) else 0.0 for p in products),
+        reverse=True
+    )[:k]
+    idcg = sum(g / math.log2(i + 2) for i, g in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def evaluate(client, golden, k, overfetch, budget_s):
+    collection = client.collections.get(WEAVIATE_CLASS_NAME)
+    rows = []
+
+    for item in golden:
+        query = item["query"]
+        terms = item["relevant_terms"]
+
+        query_vector = get_embedding(query)
+        if not query_vector:
+            print(f"⚠️ Skipping '{query}': no embedding")
+            continue
+
+        response = collection.query.near_vector(
+            near_vector=query_vector,
+            limit=overfetch,
+            return_properties=PRODUCT_HIT_PROPERTIES,
+            return_metadata=["distance"]
+        )
+        candidates = to_product_hits(response.objects)
+
+        start = time.perf_counter()
+        reranked = rerank_products(query, candidates, k, time_budget_s=budget_s)
+        rerank_ms = (time.perf_counter() - start) * 1000
+
+        rows.append({
+            "query": query,
+            "vector_p@k": precision_at_k(candidates, terms, k),
+            "rerank_p@k": precision_at_k(reranked, terms, k),
+            "vector_ndcg@k": ndcg_at_k(candidates, terms, k),
+            "rerank_ndcg@k": ndcg_at_k(reranked, terms, k),
+            "rerank_ms": rerank_ms,
+        })
+
+    return rows
+
+def print_report(rows, k):
+    if not rows:
+        print("❌ No queries evaluated")
+        return
+
+    print(f"\n{'query':40} {'P@k vec':>8} {'P@k rr':>8} {'nDCG vec':>9} {'nDCG rr':>8} {'ms':>7}")
+    for row in rows:
+        print(f"{row['query'][:40]:40} {row['vector_p@k']:8.2f} {row['rerank_p@k']:8.2f} "
+              f"{row['vector_ndcg@k']:9.2f} {row['rerank_ndcg@k']:8.2f} {row['rerank_ms']:7.1f}")
+
+    n = len(rows)
+    latencies = [row["rerank_ms"] for row in rows]
+    stats = get_rerank_stats()
+    print(f"\n📊 Summary over {n} golden queries (k={k}):")
+    print(f"   • Mean P@{k}:    vector {sum(r['vector_p@k'] for r in rows) / n:.3f} → rerank {sum(r['rerank_p@k'] for r in rows) / n:.3f}")
+    print(f"   • Mean nDCG@{k}: vector {sum(r['vector_ndcg@k'] for r in rows) / n:.3f} → rerank {sum(r['rerank_ndcg@k'] for r in rows) / n:.3f}")
+    print(f"   • Added latency: p50 {percentile(latencies, 50):.1f}ms, p95 {percentile(latencies, 95):.1f}ms")
+    print(f"   • Budget fallbacks: {stats['budget_fallbacks']}, errors: {stats['error_fallbacks']}")
+    print(f"   • Score cache hit rate: {stats['cache_hit_rate']:.1%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare vector order vs cross-encoder rerank on a golden query set")
+    parser.add_argument("--golden", default=GOLDEN_QUERIES_PATH)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--overfetch", type=int, default=RERANK_OVERFETCH)
+    parser.add_argument("--budget", type=float, default=5.0, help="Per-query rerank budget in seconds")
+    parser.add_argument("--passes", type=int, default=2, help="Repeat the set to measure warm-cache latency")
+    args = parser.parse_args()
+
+    client = WeaviateClient(
+        ConnectionParams.from_params(
+            http_host=WEAVIATE_HOST,
+            http_port=WEAVIATE_PORT,
+            http_secure=False,
+            grpc_host=WEAVIATE_HOST,
+            grpc_port=50051,
+            grpc_secure=False
+        )
+    )
+    client.connect()
+
+    try:
+        golden = load_golden_queries(args.golden)
+        for run in range(args.passes):
+            print(f"\n--- Pass {run + 1}/{args.passes} ---")
+            print_report(evaluate(client, golden, args.k, args.overfetch, args.budget), args.k)
+    finally:
+        client.close()
@@ -0,0 +1,189 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+
+FACET_TEXT_PROPERTIES = ['category', 'character', 'materials']
+FACET_BOOL_PROPERTIES = [
+    'is_articulated',
+    'is_collectible',
+    'is_bobblehead',
+    'includes_batteries',
+    'has_laptop_compartment',
+    'has_wheels',
+    'is_waterproof',
+]
+FACET_GROUP_LIMIT = 200
+FACET_TTL_S = float(os.getenv("FACET_TTL_S", "900"))
+
+# English / colloquial names users type for the Spanish sheet categories
+CATEGORY_SYNONYMS = {
+    "Figuras de accion": ["action figure", "figure", "figura", "muneco"],
+    "Calzoncillos": ["boxer", "underwear", "brief", "calzoncillo"],
+    "Medias": ["sock", "media", "calcetin"],
+    "Panties": ["panty", "panties"],
+    "Morrales": ["backpack", "mochila", "morral"],
+    "Pijamas": ["pajama", "pyjama", "pijama"],
+    "Relojes de pulso": ["watch", "wristwatch", "reloj"],
+    "Cangureras": ["fanny pack", "waist bag", "rinonera", "canguro"],
+    "Bolsos": ["bag", "handbag", "bolso"],
+    "Vehiculos a escala": ["scale vehicle", "scale model", "vehiculo"],
+    "Anillos": ["ring", "anillo"],
+    "Gafas de sol": ["sunglasses", "gafas"],
+    "Termos": ["thermos", "bottle", "termo"],
+    "Maletas": ["suitcase", "luggage", "maleta"],
+    "Buzos": ["sweatshirt", "buzo"],
+    "Pantalones deportivos": ["sweatpants", "joggers", "pantalon"],
+}
+
+BROWSE_PATTERN = re.compile(
+    r"^\s*(?:what|which)\b.*\b(?:do you (?:have|sell|carry)|are (?:there|available))"
+    r"|^\s*(?:list|browse|show(?: me)? all|show(?: me)? every)\b"
+    r"|^\s*(?:que|cuales)\b.*\b(?:tienen|tienes|hay|venden)\b"
+)
+CATEGORY_LIST_PATTERN = re.compile(r"\b(?:categories|categorias|categorías)\b")
+# Browse phrasing and filler; any other word in a browse prompt narrows the listing into a search
+BROWSE_STOPWORDS = frozenset("""
+    what which do you have sell carry are is there available list browse show me all every any some
+    the a an of for in with your products product items item que cuales tienen tienes hay venden
+    de del el la los las un una unos unas con para productos articulos
+""".split())
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+def is_browse_request(prompt: str) -> bool:
+    return bool(BROWSE_PATTERN.search(_normalize(prompt)))
+
+def is_category_list_request(prompt: str) -> bool:
+    return is_browse_request(prompt) and bool(CATEGORY_LIST_PATTERN.search(_normalize(prompt)))
+
+def _word_forms(word: str) -> set:
+    """A word and its singular candidates: "watches" -> watch/watche, "relojes" -> reloj/reloje, "boxers" -> boxer."""
+    forms = {word}
+    if word.endswith("es"):
+        forms.add(word[:-2])
+    if word.endswith("s"):
+        forms.add(word[:-1])
+    return forms
+
+def _prompt_words(text: str) -> list:
+    return re.findall(r"[^\W\d_]+", text)
+
+def _category_words(category: str) -> set:
+    words = set()
+    for name in [category, *CATEGORY_SYNONYMS.get(category, [])]:
+        for word in _prompt_words(_normalize(name)):
+            words |= _word_forms(word)
+    return words
+
+def extra_terms(prompt: str, category: str = None) -> list:
+    """
+    Words of a browse prompt beyond the browse phrasing and the category name,
+    e.g. ["batman"] for "what Batman figures do you have?". Empty means a plain
+    category listing; otherwise the prompt is a search within the category.
+    """
+    category_words = _category_words(category) if category else set()
+    return [
+        word for word in _prompt_words(_normalize(prompt))
+        if word not in BROWSE_STOPWORDS and not _word_forms(word) & category_words
+    ]
+
+class FacetService:
+    """
+    Precomputed aggregate counts per category, character, materials and boolean
+    attributes. Counts are refreshed on a TTL or explicitly after an ingest.
+    """
+
+    def __init__(self, ttl_s: float = FACET_TTL_S):
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._facets = None
+        self._refreshed_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._facets = None
+
+    def cached(self):
+        """Last computed facets without touching Weaviate (None before the first refresh)."""
+        with self._lock:
+            return self._facets
+
+    def get(self, collection) -> dict:
+        """Return cached facets, recomputing them when stale."""
+        with self._lock:
+            if self._facets is not None and time.time() - self._refreshed_at < self.ttl_s:
+                return self._facets
+        facets = self.compute(collection)
+        with self._lock:
+            self._facets = facets
+            self._refreshed_at = time.time()
+        return facets
+
+    @staticmethod
+    def compute(collection) -> dict:
+        from weaviate.classes.aggregate import GroupByAggregate
+        from weaviate.classes.query import Metrics
+
+        start = time.perf_counter()
+        schema_properties = {prop.name for prop in collection.config.get().properties}
+
+        facets = {"total": collection.aggregate.over_all(total_count=True).total_count}
+
+        for prop in FACET_TEXT_PROPERTIES:
+            if prop not in schema_properties:
+                continue
+            response = collection.aggregate.over_all(
+                group_by=GroupByAggregate(prop=prop, limit=FACET_GROUP_LIMIT),
+                total_count=True
+            )
+            counts = {
+                str(group.grouped_by.value): group.total_count
+                for group in response.groups
+                if group.grouped_by.value not in (None, "", "nan", "None")
+            }
+            facets[prop] = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+        bool_properties = [prop for prop in FACET_BOOL_PROPERTIES if prop in schema_properties]
+        if bool_properties:
+            response = collection.aggregate.over_all(
+                return_metrics=[Metrics(prop).boolean(total_true=True, total_false=True) for prop in bool_properties]
+            )
+            facets["boolean"] = {
+                prop: {
+                    "true": response.properties[prop].total_true or 0,
+                    "false": response.properties[prop].total_false or 0,
+                }
+                for prop in bool_properties
+            }
+
+        facets["seconds"] = round(time.perf_counter() - start, 3)
+        return facets
+
+def match_category(prompt: str, categories) -> str:
+    """Find the catalog category a browse prompt refers to, by name or synonym."""
+    text = _normalize(prompt)
+    words = set()
+    for word in _prompt_words(text):
+        words |= _word_forms(word)
+
+    for category in categories:
+        normalized = _normalize(category)
+        if normalized in text:
+            return category
+        for synonym in CATEGORY_SYNONYMS.get(category, []):
+            if " " in synonym:
+                if synonym in text:
+                    return category
+            elif synonym in words:
+                return category
+
+    for category in categories:
+        # Head word of the category in singular or plural, e.g. "morral" / "morrales"
+        head = _normalize(category).split()[0]
+        if _word_forms(head) & words:
+            return category
+    return None
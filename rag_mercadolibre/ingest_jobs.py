@@ -0,0 +1,367 @@
+"""
+Background ingestion jobs: a small SQLite job table plus a detached worker process.
+
+The UI (or the search service) only inserts a job row and spawns
+`python ingest_jobs.py run <job_id>`; the worker reports progress, rows/sec,
+ETA and errors back into the row and polls it for cancellation. Jobs keep
+running across Streamlit reruns and tab reloads.
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+INGEST_JOBS_DB_PATH = os.getenv("INGEST_JOBS_DB_PATH", "ingest_jobs.sqlite3")
+INGEST_JOBS_DIR = os.getenv("INGEST_JOBS_DIR", "ingest_jobs")
+# Progress is written to SQLite at most this often
+PROGRESS_INTERVAL_S = 0.5
+MAX_JOB_ERRORS = 20
+# Workers touch updated_at this often; a job silent for JOB_STALE_S is considered dead
+JOB_HEARTBEAT_S = float(os.getenv("JOB_HEARTBEAT_S", "10"))
+JOB_STALE_S = float(os.getenv("JOB_STALE_S", "120"))
+# PIDs are only meaningful inside one PID namespace: the container hostname qualifies them
+HOST_ID = os.getenv("HOSTNAME") or socket.gethostname()
+
+JOB_KINDS = ("excel", "pdf", "repair")
+ACTIVE_STATUSES = ("queued", "running")
+
+class IngestCancelled(Exception):
+    pass
+
+class JobStore:
+    """SQLite job table shared by the UI, the search service and the workers."""
+
+    def __init__(self, path: str = INGEST_JOBS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload_path TEXT,
+                label TEXT,
+                status TEXT NOT NULL,
+                total INTEGER DEFAULT 0,
+                processed INTEGER DEFAULT 0,
+                succeeded INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                rows_per_s REAL DEFAULT 0,
+                eta_s REAL,
+                errors TEXT,
+                message TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                pid INTEGER,
+                host TEXT,
+                log_path TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at)")
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "host" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN host TEXT")
+        self._conn.commit()
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def create(self, kind: str, payload_path: str = None, label: str = None, exclusive: bool = False) -> str:
+        """
+        Insert a queued job. With exclusive=True the active-job check and the
+        insert run in one BEGIN IMMEDIATE transaction, so two processes sharing
+        the table cannot both start a job; raises RuntimeError if one is active.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if exclusive:
+                    placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+                    active = self._conn.execute(
+                        f"SELECT COUNT(*) FROM jobs WHERE status IN ({placeholders})", ACTIVE_STATUSES
+                    ).fetchone()[0]
+                    if active:
+                        raise RuntimeError("An ingestion job is already running")
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, payload_path, label, status, errors, created_at) "
+                    "VALUES (?, ?, ?, ?, 'queued', '[]', ?)",
+                    (job_id, kind, payload_path, label, time.time())
+                )
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        return job_id
+
+    def get(self, job_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def list(self, limit: int = 10) -> list:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def active(self) -> list:
+        return [job for job in self.list(50) if job["status"] in ACTIVE_STATUSES]
+
+    def mark_running(self, job_id: str, pid: int, total: int = 0):
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET status = 'running', pid = ?, host = ?, total = ?, started_at = ?, updated_at = ? WHERE id = ?",
+            (pid, HOST_ID, total, now, now, job_id)
+        )
+
+    def set_log(self, job_id: str, pid: int, log_path: str):
+        self._execute(
+            "UPDATE jobs SET pid = ?, host = ?, log_path = ?, updated_at = ? WHERE id = ?",
+            (pid, HOST_ID, log_path, time.time(), job_id)
+        )
+
+    def heartbeat(self, job_id: str):
+        self._execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def update_progress(self, job_id: str, total: int, processed: int, succeeded: int, failed: int,
+                        errors: list, started_at: float):
+        now = time.time()
+        elapsed = max(now - started_at, 1e-6)
+        rate = processed / elapsed
+        eta = (total - processed) / rate if rate > 0 and total else None
+        self._execute(
+            "UPDATE jobs SET total = ?, processed = ?, succeeded = ?, failed = ?, rows_per_s = ?, eta_s = ?, "
+            "errors = ?, updated_at = ? WHERE id = ?",
+            (total, processed, succeeded, failed, rate, eta, json.dumps(errors[-MAX_JOB_ERRORS:]), now, job_id)
+        )
+
+    def finish(self, job_id: str, status: str, message: str = None):
+        now = time.time()
+        self._execute(
+            "UPDATE jobs SET status = ?, message = ?, eta_s = NULL, finished_at = ?, updated_at = ? WHERE id = ?",
+            (status, message, now, now, job_id)
+        )
+
+    def record_completed(self, kind: str, label: str = None, message: str = None) -> str:
+        """Log a catalog change made outside a worker (CLI ingest, restore) so every process sees it."""
+        job_id = self.create(kind, label=label)
+        self.finish(job_id, "completed", message)
+        return job_id
+
+    def catalog_generation(self) -> float:
+        """Finish time of the latest job that may have changed the collection; catalog-derived caches key on it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(finished_at) FROM jobs WHERE status IN ('completed', 'cancelled', 'failed')"
+            ).fetchone()
+        return row[0] or 0.0
+
+    def request_cancel(self, job_id: str) -> bool:
+        cursor = self._execute(
+            "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')", (job_id,)
+        )
+        return cursor.rowcount > 0
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def reap_dead_workers(self, stale_s: float = JOB_STALE_S):
+        """
+        Mark jobs whose worker disappeared (crash, container restart) as failed.
+        The PID is probed only for workers started on this host; jobs of other
+        containers are reaped when their heartbeat is older than stale_s.
+        """
+        now = time.time()
+        for job in self.active():
+            if job["pid"] and job["host"] == HOST_ID:
+                dead = not _pid_alive(job["pid"])
+            else:
+                dead = now - (job["updated_at"] or job["created_at"]) > stale_s
+            if dead:
+                self.finish(job["id"], "failed", "Worker process exited unexpectedly")
+
+    @staticmethod
+    def _to_job(row) -> dict:
+        job = dict(row)
+        job["errors"] = json.loads(job["errors"] or "[]")
+        return job
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # A finished child we spawned stays a zombie until reaped
+    try:
+        finished, _ = os.waitpid(pid, os.WNOHANG)
+        return finished == 0
+    except ChildProcessError:
+        return True
+
+class JobProgress:
+    """
+    Progress callback handed to the ingest functions: progress(processed, total,
+    succeeded, failed, error=None). Writes are throttled; raises IngestCancelled
+    once a cancel has been requested.
+    """
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self.started_at = time.time()
+        self.errors = []
+        self._last_write = 0.0
+        self._last = (0, 0, 0, 0)
+
+    def __call__(self, processed: int, total: int, succeeded: int, failed: int, error: str = None):
+        if error:
+            self.errors.append(error)
+            del self.errors[:-MAX_JOB_ERRORS]
+        self._last = (processed, total, succeeded, failed)
+
+        now = time.time()
+        if now - self._last_write < PROGRESS_INTERVAL_S and processed < total:
+            return
+        self._last_write = now
+        self.flush()
+        if self.store.cancel_requested(self.job_id):
+            raise IngestCancelled()
+
+    def flush(self):
+        processed, total, succeeded, failed = self._last
+        self.store.update_progress(self.job_id, total, processed, succeeded, failed, self.errors, self.started_at)
+
+def start_ingest_job(kind: str, dataframe=None, label: str = None, store: JobStore = None) -> str:
+    """Register a job and launch its detached worker; returns the job id."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    store = store or JobStore()
+
+    os.makedirs(INGEST_JOBS_DIR, exist_ok=True)
+    payload_path = os.path.join(INGEST_JOBS_DIR, f"{uuid.uuid4().hex}.pkl") if dataframe is not None else None
+    # Claims the single job slot atomically; the payload is only written once the slot is ours
+    job_id = store.create(kind, payload_path, label, exclusive=True)
+    if dataframe is not None:
+        try:
+            dataframe.to_pickle(payload_path)
+        except Exception as e:
+            store.finish(job_id, "failed", f"Could not save the payload: {e}")
+            raise
+
+    log_path = os.path.join(INGEST_JOBS_DIR, f"{job_id}.log")
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "run", job_id],
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            # The worker runs next to ingest_weaviate.py (relative data paths) but must open the same job table
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, "INGEST_JOBS_DB_PATH": os.path.abspath(store.path)},
+            start_new_session=True,
+        )
+    store.set_log(job_id, process.pid, log_path)
+    return job_id
+
+def run_job(job_id: str, store: JobStore = None):
+    """Worker entry point: run one job to completion, failure or cancellation."""
+    import pandas as pd
+
+    store = store or JobStore()
+    job = store.get(job_id)
+    if job is None:
+        print(f"❌ Job {job_id} no encontrado")
+        return
+    if job["cancel_requested"]:
+        store.finish(job_id, "cancelled", "Cancelled before start")
+        return
+
+    store.mark_running(job_id, os.getpid())
+    progress = JobProgress(store, job_id)
+    # Keeps the job alive for reapers in other containers during phases without progress (load, schema)
+    heartbeat_stop = threading.Event()
+
+    def beat():
+        while not heartbeat_stop.wait(JOB_HEARTBEAT_S):
+            store.heartbeat(job_id)
+
+    threading.Thread(target=beat, name="job-heartbeat", daemon=True).start()
+    client = None
+    try:
+        import ingest_weaviate
+
+        client = ingest_weaviate.initialize_clients()
+        if job["kind"] == "excel":
+            data_df = ingest_weaviate.load_and_preprocess_data(ingest_weaviate.EXCEL_FILE_PATH)
+            ingest_weaviate.create_schema(client, interactive=False)
+            summary = ingest_weaviate.batch_ingest(client, data_df, progress=progress)
+        elif job["kind"] == "repair":
+            # Payload is the data_validator repair list; catalog rows come from the Excel file
+            repairs = pd.read_pickle(job["payload_path"])
+            data_df = ingest_weaviate.load_and_preprocess_data(ingest_weaviate.EXCEL_FILE_PATH)
+            summary = ingest_weaviate.apply_repairs(client, data_df, repairs, progress=progress)
+        else:
+            data_df = pd.read_pickle(job["payload_path"])
+            summary = ingest_weaviate.ingest_pdf_rows(client, data_df, progress=progress)
+        progress.flush()
+        store.finish(job_id, "completed", f"{summary['succeeded']} ingested, {summary['failed']} failed")
+    except IngestCancelled:
+        progress.flush()
+        store.finish(job_id, "cancelled", "Cancelled by user")
+    except SystemExit as e:
+        # ingest_weaviate exits on missing dependencies / connection failures; details are in the log
+        progress.flush()
+        store.finish(job_id, "failed", f"Ingest exited with code {e.code}, see {job['log_path']}")
+    except Exception as e:
+        progress.flush()
+        store.finish(job_id, "failed", str(e) or type(e).__name__)
+    finally:
+        heartbeat_stop.set()
+        if client is not None:
+            client.close()
+        if job["payload_path"] and os.path.exists(job["payload_path"]):
+            os.remove(job["payload_path"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion job worker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run")
+    run_parser.add_argument("job_id")
+    start_parser = subparsers.add_parser("start")
+    start_parser.add_argument("--kind", choices=["excel"], default="excel")
+    subparsers.add_parser("list")
+    cancel_parser = subparsers.add_parser("cancel")
+    cancel_parser.add_argument("job_id")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_job(args.job_id)
+    elif args.command == "start":
+        print(start_ingest_job(args.kind))
+    elif args.command == "cancel":
+        print("✅ Cancel requested" if JobStore().request_cancel(args.job_id) else "❌ Job not active")
+    else:
+        for job in JobStore().list():
+            print(f"{job['id'][:8]} {job['kind']:6} {job['status']:10} {job['processed']}/{job['total']} "
+                  f"{job['rows_per_s']:.1f} rows/s {job['message'] or ''}")
@@ -4,7 +4,10 @@ import pandas as pd
 from dotenv import load_dotenv
 from tqdm import tqdm
 import time 
-from embedding_utils import get_embedding
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from data_validator import title_key
+from embedding_cache import EmbeddingCache, content_hash
+from embedding_utils import get_embedding, get_embeddings_batch
 
 # --- 1. CONFIGURACIÓN DE DEPENDENCIAS EXTERNAS ---
 try:
@@ -12,6 +15,8 @@ try:
     from weaviate import WeaviateClient 
     from weaviate.connect import ConnectionParams
     from weaviate.collections.classes.config import Configure, DataType, Property, VectorDistances 
+    from weaviate.classes.data import DataObject
+    from weaviate.classes.query import Filter
 except ImportError as e:
     print(f"❌ Error de importación: {e}") 
     sys.exit(1)
@@ -23,6 +28,10 @@ WEAVIATE_PORT = 8090
 EMBEDDING_MODEL = "models/embedding-001"
 EXCEL_FILE_PATH = "data/Fichas_tecnicas-2025_10_30-22_24.xlsx" 
 
+# Ingesta masiva: productos por bloque (límite de embed_content) y bloques en paralelo
+INGEST_CHUNK_SIZE = 100
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+
 # Campos más importantes para embeddings (reduce costos)
 IMPORTANT_FIELDS = ['Título', 'Categoria', 'Materiales', 'Personaje', 'Composición', 'Tipo de calzoncillo', 'Tipo de medias', 'Capacidad de la mochila']
 
@@ -191,8 +200,9 @@ def get_embedding(text: str, retries=3) -> list[float]:
     print(f"❌ Fallo después de {retries} intentos")
     return None
 
-def create_schema(client: WeaviateClient):
-    """Crea la clase de Weaviate si no existe - VERSIÓN SEGURA que NUNCA borra datos."""
+def create_schema(client: WeaviateClient, interactive: bool = True):
+    """Crea la clase de Weaviate si no existe - VERSIÓN SEGURA que NUNCA borra datos.
+    Sin modo interactivo (workers en segundo plano) un esquema vacío se conserva."""
     
     if client.collections.exists(WEAVIATE_CLASS_NAME):
         try:
@@ -205,6 +215,8 @@ def create_schema(client: WeaviateClient):
                 return True
             else:
                 print("ℹ️ Esquema existe pero vacío - Se puede recrear si es necesario")
+                if not interactive:
+                    return True
                 # Preguntar antes de borrar
                 response = input("¿Borrar esquema vacío? (s/N): ")
                 if response.lower() != 's':
@@ -217,6 +229,8 @@ def create_schema(client: WeaviateClient):
         Property(name=prop_config['name'], data_type=prop_config['data_type'])
         for prop_config in SCHEMA_MAP.values()
     ]
+    # Hash del texto vectorizado: permite detectar vectores desactualizados y reutilizar la caché
+    properties_list.append(Property(name='content_hash', data_type=DataType.TEXT))
 
     client.collections.create(
         name=WEAVIATE_CLASS_NAME,
@@ -226,55 +240,59 @@ def create_schema(client: WeaviateClient):
     print(f"✅ Esquema '{WEAVIATE_CLASS_NAME}' creado")
     return False
 
+def iter_catalog_sheets(file_path: str):
+    """Genera (nombre_hoja, DataFrame) hoja por hoja, ya limpias y con los nombres de SCHEMA_MAP."""
+    with pd.ExcelFile(file_path) as xls:
+        sheet_names = xls.sheet_names
+        
+        for sheet_name in tqdm(sheet_names, desc="Procesando hojas"):
+            
+            if sheet_name.lower() in ["hidden", "presentacion"]:
+                continue
+                
+            try:
+                df = pd.read_excel(xls, sheet_name=sheet_name, header=3)
+                
+                if 'Título' not in df.columns:
+                    print(f"⚠️ Saltando {sheet_name}: falta la columna 'Título'.")
+                    continue
+
+                df['Categoria'] = sheet_name.split('(')[0].strip()
+                
+                valid_cols = [col for col in df.columns if col in SCHEMA_MAP or col == 'Categoria']
+                df = df[valid_cols].copy()
+                
+                # Limpieza: Convertir booleanos
+                bool_cols = ['Es articulada', 'Es coleccionable', 'Es bobblehead', 'Incluye pilas', 'Con compartimento para portátil', 'Con ruedas', 'Es a prueba de agua']
+                for col in bool_cols:
+                    if col in df.columns:
+                        df[col] = df[col].astype(str).str.strip().str.lower().map({'sí': True, 'sì': True, 'no': False, 'nan': pd.NA, 'none': pd.NA, '': pd.NA})
+                
+                # CONVERSIÓN CRÍTICA: Convertir columnas numéricas a string para Weaviate
+                text_columns = ['height_cm', 'width_cm', 'depth_cm', 'capacity_liters', 'weight_g']
+                for col in text_columns:
+                    if col in df.columns:
+                        df[col] = df[col].astype(str)
+                        
+                df = df.dropna(subset=['Título'])
+
+                rename_map = {k: v['name'] for k, v in SCHEMA_MAP.items() if k in df.columns}
+                df = df.rename(columns=rename_map)
+
+                print(f"✅ Hoja procesada: {sheet_name} ({len(df)} filas)")
+                yield sheet_name, df
+                
+            except Exception as e:
+                if "Data Validation extension is not supported" not in str(e):
+                    print(f"❌ Error al procesar la hoja '{sheet_name}': {e}")
+                continue
+
 def load_and_preprocess_data(file_path: str) -> pd.DataFrame:
     """Carga el archivo Excel, combina hojas y prepara los datos."""
     print("⚙️ Analizando y combinando hojas de cálculo...")
-    
-    all_data = []
 
     try:
-        with pd.ExcelFile(file_path) as xls:
-            sheet_names = xls.sheet_names
-            
-            for sheet_name in tqdm(sheet_names, desc="Procesando hojas"):
-                
-                if sheet_name.lower() in ["hidden", "presentacion"]:
-                    continue
-                    
-                try:
-                    df = pd.read_excel(xls, sheet_name=sheet_name, header=3)
-                    
-                    if 'Título' not in df.columns:
-                        print(f"⚠️ Saltando {sheet_name}: falta la columna 'Título'.")
-                        continue
-
-                    df['Categoria'] = sheet_name.split('(')[0].strip()
-                    
-                    valid_cols = [col for col in df.columns if col in SCHEMA_MAP or col == 'Categoria']
-                    df = df[valid_cols].copy()
-                    
-                    # Limpieza: Convertir booleanos
-                    bool_cols = ['Es articulada', 'Es coleccionable', 'Es bobblehead', 'Incluye pilas', 'Con compartimento para portátil', 'Con ruedas', 'Es a prueba de agua']
-                    for col in bool_cols:
-                        if col in df.columns:
-                            df[col] = df[col].astype(str).str.strip().str.lower().map({'sí': True, 'sì': True, 'no': False, 'nan': pd.NA, 'none': pd.NA, '': pd.NA})
-                    
-                    # CONVERSIÓN CRÍTICA: Convertir columnas numéricas a string para Weaviate
-                    text_columns = ['height_cm', 'width_cm', 'depth_cm', 'capacity_liters', 'weight_g']
-                    for col in text_columns:
-                        if col in df.columns:
-                            df[col] = df[col].astype(str)
-                            
-                    df = df.dropna(subset=['Título'])
-
-                    print(f"✅ Hoja procesada: {sheet_name} ({len(df)} filas)")
-                    all_data.append(df)
-                    
-                except Exception as e:
-                    if "Data Validation extension is not supported" not in str(e):
-                        print(f"❌ Error al procesar la hoja '{sheet_name}': {e}")
-                    continue
-
+        all_data = [df for _, df in iter_catalog_sheets(file_path)]
     except FileNotFoundError:
         print(f"❌ ERROR: Archivo no encontrado en la ruta: {file_path}")
         sys.exit(1)
@@ -287,9 +305,6 @@ def load_and_preprocess_data(file_path: str) -> pd.DataFrame:
         sys.exit(1)
 
     combined_df = pd.concat(all_data, ignore_index=True)
-    
-    rename_map = {k: v['name'] for k, v in SCHEMA_MAP.items() if k in combined_df.columns}
-    combined_df = combined_df.rename(columns=rename_map)
 
     print(f"\n📊 Data combinada final: {len(combined_df)} productos.")
     return combined_df
@@ -337,7 +352,9 @@ def clean_object_for_weaviate(obj: dict) -> dict:
         elif isinstance(value, bool):
             cleaned[key] = value
         else:
-            cleaned[key] = str(value).strip() if str(value).strip() != "" else None
+            # Las columnas numéricas pasan por astype(str): las celdas vacías llegan como 'nan'
+            value = str(value).strip()
+            cleaned[key] = value if value.lower() not in ("", "nan", "none", "nat") else None
     return cleaned
 
 def calculate_cost_savings(data_df: pd.DataFrame) -> dict:
@@ -380,8 +397,94 @@ def calculate_cost_savings(data_df: pd.DataFrame) -> dict:
         'savings': savings
     }
 
-def batch_ingest(weaviate_client: WeaviateClient, data_df: pd.DataFrame):
-    """Vectoriza y carga los datos en Weaviate de forma eficiente."""
+def build_embedding_text(row) -> str:
+    """Texto exacto que se envía al modelo; el mismo para Excel y PDF, así los vectores en caché se reutilizan."""
+    return optimize_text_for_embedding(generate_vector_text(row))
+
+def embed_texts_cached(texts: list, cache: EmbeddingCache) -> list:
+    """Embeddings para una lista de textos: primero la caché persistente, luego un lote a Gemini para el resto."""
+    hashes = [content_hash(text) for text in texts]
+    vectors = cache.get_many(EMBEDDING_MODEL, hashes)
+
+    missing = list(dict.fromkeys(h for h in hashes if h not in vectors))
+    if missing:
+        text_by_hash = dict(zip(hashes, texts))
+        new_vectors = get_embeddings_batch([text_by_hash[h] for h in missing])
+        fresh = {h: v for h, v in zip(missing, new_vectors) if v}
+        cache.put_many(EMBEDDING_MODEL, fresh)
+        vectors.update(fresh)
+
+    return [vectors.get(h) for h in hashes]
+
+def ingest_objects(collection, items: list, progress=None, chunk_size: int = INGEST_CHUNK_SIZE,
+                   concurrency: int = INGEST_CONCURRENCY) -> dict:
+    """
+    Ingesta masiva: items es una lista de (properties, embedding_text).
+
+    Cada bloque se vectoriza en una sola llamada (con caché) y se inserta con
+    insert_many; hasta `concurrency` bloques se procesan a la vez. progress se
+    llama una vez por bloque terminado (mismo contrato que batch_ingest).
+    """
+    total = len(items)
+    chunks = [items[start:start + chunk_size] for start in range(0, total, chunk_size)]
+    cache = EmbeddingCache()
+
+    def process_chunk(chunk):
+        texts = [text for _, text in chunk]
+        vectors = embed_texts_cached(texts, cache)
+
+        objects, errors = [], []
+        for (properties, text), vector in zip(chunk, vectors):
+            if vector is None:
+                errors.append(f"Sin vector: {properties.get('title', 'N/A')}")
+                continue
+            objects.append(DataObject(properties={**properties, "content_hash": content_hash(text)}, vector=vector))
+
+        if objects:
+            try:
+                result = collection.data.insert_many(objects)
+                for index, error in result.errors.items():
+                    errors.append(f"{objects[index].properties.get('title', 'N/A')}: {error.message}")
+            except Exception as e:
+                errors.extend(f"{obj.properties.get('title', 'N/A')}: {e}" for obj in objects)
+        return len(chunk), len(chunk) - len(errors), errors
+
+    processed = succeeded = failed = 0
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        pending = set()
+        next_chunk = 0
+        while next_chunk < len(chunks) or pending:
+            # Bounded: never more than `concurrency` chunks (and their vectors) in memory
+            while next_chunk < len(chunks) and len(pending) < concurrency:
+                pending.add(executor.submit(process_chunk, chunks[next_chunk]))
+                next_chunk += 1
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                count, ok, errors = future.result()
+                processed += count
+                succeeded += ok
+                failed += count - ok
+                for error in errors:
+                    print(f"⚠️ {error}")
+                if progress:
+                    progress(processed, total, succeeded, failed, "\n".join(errors) if errors else None)
+                elif processed % 500 < chunk_size:
+                    print(f"📦 Progreso: {processed}/{total} productos procesados")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    print(f"💾 Caché de embeddings: {cache.hits} reutilizados, {cache.misses} nuevos")
+    return {"total": total, "succeeded": succeeded, "failed": failed}
+
+def batch_ingest(weaviate_client: WeaviateClient, data_df: pd.DataFrame, progress=None) -> dict:
+    """
+    Vectoriza y carga los datos en Weaviate de forma eficiente.
+
+    progress(processed, total, succeeded, failed, error=None) se llama tras cada
+    bloque (ver ingest_jobs.JobProgress); puede lanzar una excepción para cancelar.
+    """
     
     print("⚙️ Iniciando ingesta por lotes en Weaviate...")
 
@@ -396,53 +499,71 @@ def batch_ingest(weaviate_client: WeaviateClient, data_df: pd.DataFrame):
     else:
         print("🚀 PROCESANDO DATASET COMPLETO")
 
-    # Usar .loc para evitar el warning
-    data_df = data_df.copy()
-    data_df.loc[:, 'vector_text'] = data_df.apply(generate_vector_text, axis=1)
-
-    example_text = data_df['vector_text'].iloc[0]
-    optimized_example = optimize_text_for_embedding(example_text)
+    example_text = generate_vector_text(data_df.iloc[0])
     print(f"✅ Texto del producto generado (ejemplo original):\n{example_text}")
-    print(f"✅ Texto optimizado (ejemplo):\n{optimized_example}")
+    print(f"✅ Texto optimizado (ejemplo):\n{optimize_text_for_embedding(example_text)}")
     print(f"⚙️ {len(data_df)} documentos listos para vectorización.")
     
-    product_collection = weaviate_client.collections.get(WEAVIATE_CLASS_NAME)
-    
-    successful_count = 0
-    failed_count = 0
-    
-    with product_collection.batch.dynamic() as batch:
-        for _, row in tqdm(data_df.iterrows(), total=len(data_df), desc="Ingestando productos"):
-            
-            vector = get_embedding(row['vector_text']) 
-            
-            if vector is None:
-                print(f"⚠️ Saltando producto (vector nulo): {row.get('title', 'N/A')}")
-                failed_count += 1
-                continue 
-
-            data_object = row.drop(['vector_text']).to_dict()
-            
-            # LIMPIAR EL OBJETO PARA WEAVIATE
-            cleaned_object = clean_object_for_weaviate(data_object)
-
-            try:
-                batch.add_object(
-                    properties=cleaned_object,
-                    vector=vector
-                )
-                successful_count += 1
-                if successful_count % 100 == 0:  # Log cada 100 productos
-                    print(f"📦 Progreso: {successful_count}/{len(data_df)} productos procesados")
-            except Exception as e:
-                print(f"❌ Error al añadir objeto: {e}")
-                failed_count += 1
+    items = [
+        (clean_object_for_weaviate(row.to_dict()), build_embedding_text(row))
+        for _, row in data_df.iterrows()
+    ]
+    summary = ingest_objects(weaviate_client.collections.get(WEAVIATE_CLASS_NAME), items, progress)
             
     print(f"\n📊 Resumen de ingesta:")
-    print(f"✅ Objetos exitosos: {successful_count}")
-    print(f"❌ Objetos fallidos: {failed_count}")
+    print(f"✅ Objetos exitosos: {summary['succeeded']}")
+    print(f"❌ Objetos fallidos: {summary['failed']}")
     print(f"💰 Costo estimado: ${cost_info['optimized_cost']:.3f}")
     print(f"💰 Ahorro estimado: ${cost_info['savings']:.3f}")
+    return summary
+
+def ingest_pdf_rows(weaviate_client: WeaviateClient, df: pd.DataFrame, progress=None) -> dict:
+    """
+    Ingesta los productos extraídos de un catálogo PDF (pdf_extractor.process_pdf_catalog).
+    Usa el mismo texto de embedding que el Excel y el mismo pipeline por lotes.
+    """
+    items = []
+    for _, row in df.iterrows():
+        product_data = {
+            "title": str(row.get('title', '')),
+            "code": str(row.get('code', '')),
+            "price": str(row.get('price', '')),
+            "category": str(row.get('category', '')),
+        }
+        for col in df.columns:
+            if col not in product_data and pd.notna(row.get(col)):
+                product_data[col] = str(row.get(col, ''))
+
+        text = build_embedding_text(row) or optimize_text_for_embedding(f"{row.get('title', '')} {row.get('category', '')}")
+        items.append((product_data, text))
+
+    summary = ingest_objects(weaviate_client.collections.get(WEAVIATE_CLASS_NAME), items, progress)
+    print(f"📊 PDF: {summary['succeeded']} de {summary['total']} productos ingeridos, {summary['failed']} con error")
+    return summary
+
+def apply_repairs(weaviate_client: WeaviateClient, data_df: pd.DataFrame, repairs: pd.DataFrame, progress=None) -> dict:
+    """
+    Aplica la lista de reparaciones de data_validator (repair.jsonl): borra los objetos
+    listados y vuelve a ingerir solo las filas del catálogo con acción 'reingest'.
+    Gracias a la caché de embeddings, las filas sin cambios no vuelven a llamar a Gemini.
+    """
+    collection = weaviate_client.collections.get(WEAVIATE_CLASS_NAME)
+
+    uuids = [object_uuid for object_uuids in repairs["uuids"] for object_uuid in object_uuids]
+    deleted = 0
+    for start in range(0, len(uuids), INGEST_CHUNK_SIZE):
+        result = collection.data.delete_many(where=Filter.by_id().contains_any(uuids[start:start + INGEST_CHUNK_SIZE]))
+        deleted += result.successful
+    print(f"🗑️ {deleted} objetos eliminados")
+
+    reingest_keys = set(repairs.loc[repairs["action"] == "reingest", "title_key"])
+    rows = data_df[data_df["title"].map(title_key).isin(reingest_keys)]
+    if rows.empty:
+        summary = {"total": 0, "succeeded": 0, "failed": 0}
+    else:
+        summary = batch_ingest(weaviate_client, rows.reset_index(drop=True), progress=progress)
+    summary["deleted"] = deleted
+    return summary
 
 def verify_ingestion(weaviate_client: WeaviateClient):
     """Verifica que los datos se hayan ingerido correctamente."""
@@ -468,8 +589,12 @@ if __name__ == "__main__":
     weaviate_client = initialize_clients() 
     data_df = load_and_preprocess_data(EXCEL_FILE_PATH)
     create_schema(weaviate_client)
-    batch_ingest(weaviate_client, data_df)
+    summary = batch_ingest(weaviate_client, data_df)
     verify_ingestion(weaviate_client)
     weaviate_client.close()
+    
+    # Las apps en ejecución reconstruyen sus índices derivados del catálogo al ver este registro
+    from ingest_jobs import JobStore
+    JobStore().record_completed("excel", "CLI ingest", f"{summary['succeeded']} ingested, {summary['failed']} failed")
         
     print("--- ✅ Proceso de Ingestión Finalizado ---")
\ No newline at end of file
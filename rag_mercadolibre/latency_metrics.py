@@ -0,0 +1,145 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+LATENCY_WINDOW_S = float(os.getenv("LATENCY_WINDOW_S", "900"))
+LATENCY_MAX_SAMPLES = int(os.getenv("LATENCY_MAX_SAMPLES", "4096"))
+
+# Stages of a chat turn, in display order
+STAGES = [
+    "routing",
+    "lookup",
+    "embedding",
+    "weaviate_query",
+    "local_index",
+    "search_service",
+    "rerank",
+    "formatting",
+    "servientrega",
+    "render",
+    "total",
+]
+STAGE_LABELS = {
+    "routing": "Intent routing",
+    "lookup": "Exact lookup",
+    "embedding": "Query embedding",
+    "weaviate_query": "Weaviate query",
+    "local_index": "Local index",
+    "search_service": "Search service",
+    "rerank": "Rerank",
+    "formatting": "Formatting",
+    "servientrega": "Servientrega lookup",
+    "render": "Render",
+    "total": "Total turn",
+}
+
+class RollingLatencyWindow:
+    """Latency samples of the last `window_s` seconds (bounded), summarized as percentiles."""
+
+    def __init__(self, window_s: float = LATENCY_WINDOW_S, max_samples: int = LATENCY_MAX_SAMPLES):
+        self.window_s = window_s
+        self._samples = deque(maxlen=max_samples)   # (timestamp, seconds, ok)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool = True):
+        with self._lock:
+            self._samples.append((time.time(), seconds, ok))
+
+    def _prune(self, now: float):
+        cutoff = now - self.window_s
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def summary(self) -> dict:
+        with self._lock:
+            self._prune(time.time())
+            samples = list(self._samples)
+
+        if not samples:
+            return {"count": 0, "errors": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        values = np.fromiter((seconds for _, seconds, _ in samples), dtype=np.float64) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "count": len(samples),
+            "errors": sum(1 for _, _, ok in samples if not ok),
+            "mean_ms": float(values.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(values.max()),
+        }
+
+_windows = {stage: RollingLatencyWindow() for stage in STAGES}
+_windows_lock = threading.Lock()
+
+# Per-turn breakdown shown under each chat answer; set by chat_turn()
+_turn_timings = contextvars.ContextVar("turn_timings", default=None)
+
+def record_latency(stage: str, seconds: float, ok: bool = True):
+    """Add a sample to the stage window and to the current turn breakdown, if any."""
+    with _windows_lock:
+        window = _windows.get(stage)
+        if window is None:
+            window = _windows[stage] = RollingLatencyWindow()
+    window.record(seconds, ok)
+
+    timings = _turn_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def time_stage(stage: str):
+    """Time a block; exceptions are recorded as errors and re-raised."""
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        record_latency(stage, time.perf_counter() - start, ok)
+
+@contextmanager
+def chat_turn():
+    """
+    Collect a per-turn stage breakdown into the yielded dict. The context is
+    reset on exit, including exceptions and st.rerun(), so later turns and
+    fragment runs on the same thread don't write into a finished turn.
+    """
+    timings = {}
+    token = _turn_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _turn_timings.reset(token)
+
+def timed_iter(chunks, stage: str):
+    """Yield from a generator, charging only the time spent producing chunks to `stage` (one sample)."""
+    iterator = iter(chunks)
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield chunk
+    finally:
+        record_latency(stage, elapsed)
+
+def latency_summary() -> dict:
+    """Percentile summary per stage, known stages first."""
+    with _windows_lock:
+        windows = dict(_windows)
+    ordered = STAGES + sorted(stage for stage in windows if stage not in STAGES)
+    return {stage: windows[stage].summary() for stage in ordered}
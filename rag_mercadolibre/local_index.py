@@ -0,0 +1,201 @@
+import argparse
+import dataclasses
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from product_hits import PRODUCT_HIT_PROPERTIES, ProductHit
+
+HNSWLIB_AVAILABLE = False
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    pass
+
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "local_index")
+# Below this size exact brute force over the memory-mapped matrix is already sub-millisecond
+HNSW_MIN_ITEMS = 20000
+
+VECTORS_FILE = "vectors.f32"
+ITEMS_FILE = "items.jsonl"
+META_FILE = "meta.json"
+
+def object_vector(obj):
+    """v4 returns named vectors as a dict; unnamed collections use the 'default' key."""
+    vector = obj.vector
+    if isinstance(vector, dict):
+        vector = vector.get("default") or next(iter(vector.values()), None)
+    return vector
+
+def snapshot_collection(collection, directory: str = LOCAL_INDEX_DIR) -> dict:
+    """
+    Stream every object and vector out of the collection with the cursor iterator.
+
+    Vectors are L2-normalized and appended to a raw float32 file (so search is a
+    dot product over a memory map); ids and projected properties go to a JSONL
+    sidecar. The snapshot is written to a temp directory and swapped in at the end.
+    """
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    start = time.time()
+    count = 0
+    dim = None
+    skipped = 0
+
+    with open(os.path.join(tmp_dir, VECTORS_FILE), "wb") as vectors_out, \
+         open(os.path.join(tmp_dir, ITEMS_FILE), "w", encoding="utf-8") as items_out:
+        for obj in collection.iterator(include_vector=True, return_properties=PRODUCT_HIT_PROPERTIES):
+            vector = object_vector(obj)
+            if not vector or (dim is not None and len(vector) != dim):
+                skipped += 1
+                continue
+
+            v = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(v)
+            if not norm:
+                skipped += 1
+                continue
+            dim = len(v)
+
+            vectors_out.write((v / norm).tobytes())
+            items_out.write(json.dumps(
+                {"uuid": str(obj.uuid), "properties": obj.properties}, ensure_ascii=False, default=str
+            ) + "\n")
+            count += 1
+
+            if count % 1000 == 0:
+                print(f"📦 Snapshot: {count} objects")
+
+    meta = {
+        "count": count,
+        "dim": dim,
+        "skipped": skipped,
+        "created_at": time.time(),
+        "seconds": round(time.time() - start, 2),
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    print(f"✅ Snapshot written to {directory}: {count} objects, dim {dim}, {skipped} skipped")
+    return meta
+
+class LocalVectorIndex:
+    """Read-only ANN index loaded from a snapshot; hnswlib when installed and large, else NumPy."""
+
+    def __init__(self, directory: str = LOCAL_INDEX_DIR):
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+
+        count, dim = self.meta["count"], self.meta["dim"]
+        self.vectors = np.memmap(
+            os.path.join(directory, VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, dim)
+        )
+
+        self.hits = []
+        with open(os.path.join(directory, ITEMS_FILE), encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                self.hits.append(ProductHit.from_properties(item["uuid"], item["properties"]))
+        self.positions = {hit.uuid: i for i, hit in enumerate(self.hits)}
+
+        self.hnsw = None
+        if HNSWLIB_AVAILABLE and count >= HNSW_MIN_ITEMS:
+            self.hnsw = hnswlib.Index(space="ip", dim=dim)
+            self.hnsw.init_index(max_elements=count, ef_construction=200, M=16)
+            self.hnsw.add_items(self.vectors, np.arange(count))
+            self.hnsw.set_ef(100)
+
+    @classmethod
+    def load(cls, directory: str = LOCAL_INDEX_DIR):
+        """Return the index, or None when no (non-empty) snapshot has been taken."""
+        meta_path = os.path.join(directory, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            if not json.load(f).get("count"):
+                return None
+        return cls(directory)
+
+    def __len__(self):
+        return len(self.hits)
+
+    def filter_mask(self, filters: dict):
+        """
+        Boolean mask of the products whose fields equal every {"property": value}
+        in filters. Raises ValueError for properties the snapshot does not keep.
+        """
+        unknown = [prop for prop in filters if prop not in ProductHit.__dataclass_fields__]
+        if unknown:
+            raise ValueError(f"Local index cannot filter on {unknown}")
+        return np.fromiter(
+            (all(getattr(hit, prop) == value for prop, value in filters.items()) for hit in self.hits),
+            dtype=bool, count=len(self.hits)
+        )
+
+    def search(self, vector, limit: int, offset: int = 0, exclude_uuid: str = None, filters: dict = None) -> list:
+        """Nearest products by cosine distance, same shape as a Weaviate near_vector page."""
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        mask = self.filter_mask(filters) if filters else None
+        candidates = len(self.hits) if mask is None else int(mask.sum())
+        wanted = min(candidates, offset + limit + (1 if exclude_uuid else 0))
+        if wanted == 0:
+            return []
+
+        if self.hnsw is not None:
+            labels, distances = self.hnsw.knn_query(
+                query, k=wanted, filter=(lambda label: bool(mask[label])) if mask is not None else None
+            )
+            ranked = zip(labels[0], distances[0])
+        else:
+            similarities = self.vectors @ query
+            if mask is not None:
+                similarities = np.where(mask, similarities, -np.inf)
+            top = np.argpartition(-similarities, wanted - 1)[:wanted]
+            top = top[np.argsort(-similarities[top])]
+            ranked = ((i, 1.0 - similarities[i]) for i in top)
+
+        results = []
+        for position, distance in ranked:
+            hit = self.hits[int(position)]
+            if hit.uuid == exclude_uuid:
+                continue
+            results.append(dataclasses.replace(hit, distance=float(distance)))
+        return results[offset:offset + limit]
+
+    def get_vector(self, uuid: str):
+        position = self.positions.get(str(uuid))
+        return None if position is None else np.asarray(self.vectors[position])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot the Weaviate collection into a local fallback index")
+    parser.add_argument("command", choices=["snapshot", "info"])
+    parser.add_argument("--dir", default=LOCAL_INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        from batch_search import WEAVIATE_CLASS_NAME, connect_weaviate
+
+        client = connect_weaviate()
+        try:
+            snapshot_collection(client.collections.get(WEAVIATE_CLASS_NAME), args.dir)
+        finally:
+            client.close()
+    else:
+        index = LocalVectorIndex.load(args.dir)
+        if index is None:
+            print(f"❌ No snapshot found in {args.dir}")
+        else:
+            print(f"📊 {len(index)} products, dim {index.meta['dim']}, "
+                  f"backend {'hnswlib' if index.hnsw is not None else 'numpy'}")
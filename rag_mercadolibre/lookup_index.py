@@ -0,0 +1,160 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from product_hits import PRODUCT_HIT_PROPERTIES, ProductHit
+
+def normalize_lookup_text(text) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    if text is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CatalogLookupIndex:
+    """
+    In-memory prefix + trigram index over product titles, characters and codes.
+
+    Prefix completion is a bisect over sorted normalized keys; fuzzy suggestions
+    fall back to trigram overlap. Exact matches let the chat skip vector search.
+    """
+
+    def __init__(self):
+        self.hits = []
+        self._keys = []              # sorted (normalized_key, display_text)
+        self._exact = defaultdict(list)   # normalized_key -> [hit index]
+        self._trigrams = defaultdict(set) # trigram -> {key index}
+        self.build_seconds = 0.0
+
+    @classmethod
+    def build(cls, records) -> "CatalogLookupIndex":
+        """records: iterable of (ProductHit, code) pairs."""
+        index = cls()
+        start = time.perf_counter()
+        display = {}
+
+        for hit, code in records:
+            hit_index = len(index.hits)
+            index.hits.append(hit)
+            for value in (hit.title, hit.character, code):
+                key = normalize_lookup_text(value)
+                if not key:
+                    continue
+                index._exact[key].append(hit_index)
+                display.setdefault(key, str(value).strip())
+
+        index._keys = sorted(display.items())
+        for key_index, (key, _) in enumerate(index._keys):
+            for gram in trigrams(key):
+                index._trigrams[gram].add(key_index)
+
+        index.build_seconds = time.perf_counter() - start
+        return index
+
+    @classmethod
+    def from_collection(cls, collection) -> "CatalogLookupIndex":
+        """Stream every product once with the cursor iterator and build the index."""
+        schema_properties = {prop.name for prop in collection.config.get().properties}
+        properties = [p for p in PRODUCT_HIT_PROPERTIES if p in schema_properties]
+        has_code = 'code' in schema_properties
+        if has_code:
+            properties.append('code')
+
+        def records():
+            for obj in collection.iterator(return_properties=properties):
+                yield ProductHit.from_properties(obj.uuid, obj.properties), obj.properties.get('code') if has_code else None
+
+        return cls.build(records())
+
+    def __len__(self):
+        return len(self.hits)
+
+    def exact(self, query: str) -> list:
+        """Products whose title, character or code equals the query (after normalization)."""
+        key = normalize_lookup_text(query)
+        return [self.hits[i] for i in self._exact.get(key, [])]
+
+    def suggest(self, text: str, limit: int = 8) -> list:
+        """Typeahead suggestions: prefix matches, or the closest keys by trigram overlap."""
+        key = normalize_lookup_text(text)
+        if not key:
+            return []
+
+        suggestions = []
+        position = bisect.bisect_left(self._keys, (key,))
+        while position < len(self._keys) and len(suggestions) < limit:
+            candidate, label = self._keys[position]
+            if not candidate.startswith(key):
+                break
+            suggestions.append(label)
+            position += 1
+
+        # Fuzzy matching only when nothing starts with the typed text
+        if not suggestions and len(key) >= 3:
+            query_grams = trigrams(key)
+            scores = defaultdict(int)
+            for gram in query_grams:
+                for key_index in self._trigrams.get(gram, ()):
+                    scores[key_index] += 1
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            for key_index, shared in ranked:
+                if len(suggestions) >= limit or shared < len(query_grams) / 2:
+                    break
+                label = self._keys[key_index][1]
+                if label not in suggestions:
+                    suggestions.append(label)
+
+        return suggestions
+
+class BackgroundLookupIndex:
+    """
+    Builds CatalogLookupIndex off the request path, once per catalog generation.
+
+    get() returns None while the index for the current generation is being
+    built, so callers fall back to vector search instead of blocking a chat turn
+    on a full collection scan (or answering from a stale catalog).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._generation = None
+        self._building = None
+
+    def get(self, collection, generation):
+        with self._lock:
+            if self._index is not None and self._generation == generation:
+                return self._index
+            if self._building != generation:
+                self._building = generation
+                threading.Thread(
+                    target=self._build, args=(collection, generation), name="lookup-index-build", daemon=True
+                ).start()
+            return None
+
+    def _build(self, collection, generation):
+        try:
+            index = CatalogLookupIndex.from_collection(collection)
+        except Exception as e:
+            print(f"⚠️ Lookup index build failed: {e}")
+            with self._lock:
+                if self._building == generation:
+                    self._building = None
+            return
+        print(f"🔎 Lookup index built: {len(index)} products in {index.build_seconds * 1000:.0f}ms")
+        with self._lock:
+            if self._building == generation:
+                self._index, self._generation, self._building = index, generation, None
+
+    def invalidate(self):
+        with self._lock:
+            self._index = self._generation = self._building = None
@@ -1,16 +1,31 @@
 import os
 import streamlit as st
 from dotenv import load_dotenv
-import requests
 import re
 import hashlib
 import hmac
 import time
 import subprocess
-from embedding_utils import get_embedding
-import pandas as pd
+import uuid
+from importlib.util import find_spec
+from embedding_utils import get_embedding, get_embedding_batcher_stats
+import numpy as np
+from reranker import RERANK_ENABLED, RERANK_OVERFETCH, get_rerank_stats, rerank_products
+from product_hits import PRODUCT_HIT_PROPERTIES, to_product_hits
+from chat_store import ConversationStore
+from semantic_cache import SemanticQueryCache
+from lookup_index import BackgroundLookupIndex
+from local_index import LocalVectorIndex, snapshot_collection
+from data_validator import iter_source_catalog, latest_report, load_repairs, validate_collection
+from collection_backup import BACKUP_DIR, PYARROW_AVAILABLE, backup_collection, export_properties, list_backups, restore_collection
+from facets import FacetService, extra_terms, is_browse_request, is_category_list_request, match_category
+from analytics_store import AnalyticsStore
+from ingest_jobs import JobStore, start_ingest_job
+from search_client import SEARCH_SERVICE_URL, SearchServiceClient
+from resource_monitor import METRIC_LABELS, PSUTIL_AVAILABLE, ResourceSampler
+from single_flight import get_single_flight, single_flight_stats
+from latency_metrics import STAGE_LABELS, chat_turn, latency_summary, record_latency, time_stage, timed_iter
 
-from servientrega_checker import check_servientrega_status
 
 load_dotenv()
 
@@ -27,6 +42,8 @@ USER_CREDENTIALS = {
 
 SESSION_TIMEOUT = 3600
 
+APP_CSS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "app.css")
+
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
@@ -80,14 +97,12 @@ def login_form():
                 st.error("Invalid username")
 
 def logout_button():
-    if st.sidebar.button("Logout"):
+    if st.button("Logout"):
         st.session_state.authenticated = False
         st.session_state.username = None
         st.session_state.role = None
         st.session_state.login_time = 0
-        st.session_state.messages = [
-            {"role": "assistant", "content": "Hello! I'm your Meli Catalog Assistant. I can help you search for products using semantic search or track your Servientrega shipments. How can I assist you today?"}
-        ]
+        reset_conversation(WELCOME_MESSAGE)
         st.rerun()
 
 def clear_all_data():
@@ -98,12 +113,51 @@ def clear_all_data():
         st.error(f"Error clearing data: {e}")
 
 def reingest_failed_items():
-    st.info("Re-ingesting failed items...")
-    st.success("Failed items re-ingestion completed!")
+    """Queue a repair job from the latest Validate Data repair list."""
+    report = latest_report()
+    if report is None:
+        st.warning("Run Validate Data first to build a repair list")
+        return
+    if not report["repair_count"]:
+        st.success("Latest validation found nothing to repair")
+        return
+    import pandas as pd
+
+    repairs = pd.DataFrame(load_repairs(report["repair_path"]))
+    submit_ingest_job("repair", repairs, label=f"Repair {len(repairs)} titles")
 
 def validate_database():
-    st.info("Validating database...")
-    st.success("Database validation completed!")
+    client, status_msg, has_data = initialize_weaviate_client()
+    if not client:
+        st.error(f"Cannot validate: {status_msg}")
+        return
+    try:
+        with st.spinner("Streaming collection and catalog..."):
+            report = validate_collection(client.collections.get(WEAVIATE_CLASS_NAME), iter_source_catalog())
+    except Exception as e:
+        st.error(f"Validation failed: {e}")
+        return
+
+    summary = (f"{report['collection_count']} products vs {report['source_count']} catalog rows "
+               f"in {report['seconds']}s")
+    if report["ok"]:
+        st.success(f"Database is consistent: {summary}")
+    else:
+        st.warning(f"{report['repair_count']} titles need repair: {summary}")
+
+    st.dataframe(
+        [{"check": name, "count": check["count"]} for name, check in report["checks"].items()],
+        hide_index=True, use_container_width=True
+    )
+    mismatched = [row for row in report["categories"] if row["diff"]]
+    if mismatched:
+        st.write("Category count mismatches:")
+        st.dataframe(mismatched, hide_index=True, use_container_width=True)
+    with open(report["report_path"], "rb") as f:
+        st.download_button("Download Report", f, file_name="validation_report.json",
+                           mime="application/json", key="download_validation_report")
+    if report["repair_count"]:
+        st.caption("Use Re-ingest Failed Items to apply the repair list")
 
 def restart_weaviate():
     st.info("Restarting Weaviate...")
@@ -118,6 +172,8 @@ def restart_weaviate():
         st.error(f"Error restarting Weaviate: {e}")
 
 def check_system_health():
+    import requests
+
     st.info("Checking system health...")
     try:
         response = requests.get(f"http://{WEAVIATE_HOST}:{WEAVIATE_PORT}/v1/.well-known/ready", timeout=5)
@@ -125,10 +181,32 @@ def check_system_health():
             st.success("Weaviate: Healthy")
         else:
             st.error("Weaviate: Not responding")
+    except Exception as e:
+        st.error(f"Weaviate: Not reachable ({e})")
+    
+    sampler = get_resource_sampler()
+    if sampler is None:
+        st.warning("Resource checks unavailable (psutil not installed)")
+        return
+    
+    try:
+        reading = sampler.read()
+        disk, memory = reading["disk_percent"], reading["host_memory_percent"]
+        (st.error if disk >= 95 else st.warning if disk >= 85 else st.success)(f"Disk space: {disk:.0f}% used")
+        (st.error if memory >= 95 else st.warning if memory >= 85 else st.success)(
+            f"Memory: {memory:.0f}% used (app RSS {reading['rss_mb']:.0f} MB)"
+        )
         
-        st.success("Disk space: OK")
-        st.success("Memory: OK")
-        
+        drivers = reading["chromedriver_processes"]
+        # The warm pool keeps up to `size` drivers alive; retired ones may still be quitting
+        from browser_pool import browser_pool_stats
+        pool = browser_pool_stats()
+        expected = pool.get("size", 0) + pool.get("direct", 0) + pool.get("retiring", 0)
+        if drivers > expected:
+            st.warning(f"Tracking browsers: {drivers} chromedriver processes alive, pool accounts for {expected} - possible leak")
+        else:
+            st.success(f"Tracking browsers: {drivers} chromedriver, {reading['chrome_processes']} chrome processes")
+        st.info(f"Open file descriptors: {reading['open_fds']}, sockets: {reading['sockets']}")
     except Exception as e:
         st.error(f"Health check failed: {e}")
 
@@ -140,37 +218,143 @@ def update_api_key(new_key):
 
 def show_usage_statistics():
     st.info("Loading usage statistics...")
+    facets = get_facet_service().cached()
+    analytics = get_analytics_store()
+    analytics.flush()
+    searches_per_day = analytics.searches_per_day()
+    
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Products", "4,195")
+        st.metric("Total Products", f"{facets['total']:,}" if facets else "N/A")
     with col2:
-        st.metric("Active Users", "2")
+        st.metric("Active Users", analytics.active_users())
     with col3:
-        st.metric("Searches Today", "15")
+        st.metric("Searches Today", searches_per_day.get(time.strftime("%Y-%m-%d"), 0))
+    
+    if searches_per_day:
+        st.write("Searches per day:")
+        st.bar_chart(searches_per_day)
+    
+    if facets and facets.get("category"):
+        st.write("Products per category:")
+        st.bar_chart(facets["category"])
 
 def show_search_analytics():
     st.info("Loading search analytics...")
-    st.write("Popular Searches:")
-    st.write("- Action figures")
-    st.write("- Cotton underwear") 
-    st.write("- Marvel products")
-    st.write("Search Success Rate: 92%")
+    analytics = get_analytics_store()
+    analytics.flush()
+    
+    top_searches = analytics.top_searches()
+    st.write("Popular Searches (last 7 days):")
+    if top_searches:
+        for query, count, avg_results in top_searches:
+            st.write(f"- {query} ({count}x, {avg_results or 0:.0f} results avg)")
+    else:
+        st.write("- No searches recorded yet")
+    st.write(f"Zero-result rate: {analytics.zero_result_rate():.0%}")
+    
+    latency = latency_summary()
+    st.write("Search latency (p50 / p95):")
+    for stage in ("embedding", "weaviate_query", "local_index", "formatting"):
+        if latency[stage]["count"]:
+            st.write(f"- {STAGE_LABELS[stage]}: {latency[stage]['p50_ms']:.0f}ms / {latency[stage]['p95_ms']:.0f}ms")
+    
+    rerank_stats = get_rerank_stats()
+    st.write("Reranker:")
+    st.write(f"- Enabled: {'Yes' if RERANK_ENABLED else 'No'}")
+    st.write(f"- Queries reranked: {rerank_stats['reranked']} of {rerank_stats['queries']}")
+    st.write(f"- Added latency: {rerank_stats['avg_ms']:.0f}ms avg, {rerank_stats['last_ms']:.0f}ms last")
+    st.write(f"- Budget fallbacks: {rerank_stats['budget_fallbacks']} ({rerank_stats['skipped_stale']} stale jobs skipped)")
+    st.write(f"- Score cache hit rate: {rerank_stats['cache_hit_rate']:.0%}")
+    
+    cache_stats = get_semantic_cache().stats()
+    st.write("Semantic query cache:")
+    st.write(f"- Entries: {cache_stats['size']} / {cache_stats['capacity']} (threshold {cache_stats['threshold']:.2f})")
+    st.write(f"- Hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} hits, {cache_stats['misses']} misses)")
+    st.write(f"- Evictions: {cache_stats['evictions']}, expired: {cache_stats['expirations']}")
 
 def show_tracking_statistics():
     st.info("Loading tracking statistics...")
-    st.write("Tracking Queries Today: 3")
-    st.write("Success Rate: 100%")
-    st.write("Average Response Time: 2.3s")
+    analytics = get_analytics_store()
+    analytics.flush()
+    tracking = analytics.tracking_summary()
+    if not tracking["total"]:
+        st.write("No tracking queries recorded yet.")
+        return
+    st.write(f"Tracking Queries (last 7 days): {tracking['total']}")
+    st.write(f"Success Rate: {tracking['success_rate']:.0%}")
+    
+    stats = latency_summary()["servientrega"]
+    p95 = f" (p95 {stats['p95_ms'] / 1000:.1f}s)" if stats["count"] else ""
+    st.write(f"Average Response Time: {tracking['avg_ms'] / 1000:.1f}s{p95}")
 
 def show_system_monitor():
     st.info("Loading system monitor...")
+    sampler = get_resource_sampler()
+    reading = (sampler.latest() or sampler.sample()) if sampler else {}
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("CPU Usage", "45%")
+        st.metric("CPU Usage", f"{reading['host_cpu_percent']:.0f}%" if reading else "N/A")
     with col2:
-        st.metric("Memory", "68%")
+        st.metric("Memory", f"{reading['host_memory_percent']:.0f}%" if reading else "N/A")
     with col3:
-        st.metric("Disk", "23%")
+        st.metric("Disk", f"{reading['disk_percent']:.0f}%" if reading else "N/A")
+    
+    st.write("Latency per stage (rolling window):")
+    rows = [
+        {
+            "Stage": STAGE_LABELS.get(stage, stage),
+            "Count": stats["count"],
+            "p50 (ms)": round(stats["p50_ms"], 1),
+            "p95 (ms)": round(stats["p95_ms"], 1),
+            "p99 (ms)": round(stats["p99_ms"], 1),
+            "Errors": stats["errors"],
+        }
+        for stage, stats in latency_summary().items()
+        if stats["count"]
+    ]
+    if rows:
+        st.dataframe(rows, hide_index=True)
+    else:
+        st.write("No chat turns recorded yet.")
+    
+    batcher = get_embedding_batcher_stats()
+    if batcher["enabled"]:
+        st.write(
+            f"Embedding micro-batching: {batcher['items']} queries in {batcher['batches']} calls "
+            f"(avg batch {batcher['avg_batch_size']:.1f}, largest {batcher['largest_batch']}, "
+            f"queue wait {batcher['avg_queue_wait_ms']:.1f}ms, window {batcher['window_ms']:.0f}ms)"
+        )
+    
+    analytics = get_analytics_store().stats()
+    st.write(
+        f"Analytics write-behind: {analytics['flushed']} of {analytics['recorded']} events written, "
+        f"{analytics['pending']} pending, {analytics['dropped']} dropped, {analytics['failed_flushes']} failed flushes"
+    )
+    
+    st.write("Request coalescing (single-flight):")
+    for name, stats in single_flight_stats().items():
+        st.write(
+            f"- {name}: {stats['coalesced']} of {stats['calls']} calls coalesced "
+            f"({stats['coalescing_rate']:.0%}), {stats['in_flight']} in flight"
+        )
+
+    # Imported here so selenium stays out of the app's startup path
+    from browser_pool import browser_pool_stats
+    from servientrega_checker import tracking_provider_stats
+    providers = ", ".join(
+        f"{name} answered {stats['answered']} (avg {stats['avg_ms']:.0f} ms), failed {stats['failed']}"
+        for name, stats in tracking_provider_stats().items()
+    )
+    st.write(f"Tracking providers: {providers}")
+    pool = browser_pool_stats()
+    if pool:
+        st.write(
+            f"Tracking browser pool: {pool['leased']} leased, {pool['idle']} idle of {pool['size']} "
+            f"({pool['leases']} leases, {pool['created']} started, {pool['recycled']} recycled, "
+            f"{pool['health_failures']} failed health checks, {pool['reaped']} reaped; "
+            f"avg acquire {pool['avg_acquire_ms']:.0f} ms)"
+        )
 
 def add_new_user(username, password, role):
     if username and password:
@@ -184,19 +368,75 @@ def list_all_users():
     st.write("- admin (Administrator)")
     st.write("- user (Standard User)")
 
+def format_backup_label(meta: dict) -> str:
+    created = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta["created_at"]))
+    return f"{created} · {meta['count']} products"
+
 def create_backup():
-    st.info("Creating backup...")
-    st.success("Backup created successfully!")
+    if not PYARROW_AVAILABLE:
+        st.error("Backups need pyarrow (pip install pyarrow)")
+        return
+    client, status_msg, has_data = initialize_weaviate_client()
+    if not client:
+        st.error(f"Cannot back up: {status_msg}")
+        return
+    try:
+        with st.spinner("Streaming products and vectors to disk..."):
+            meta = backup_collection(client.collections.get(WEAVIATE_CLASS_NAME))
+        st.success(
+            f"Backup created: {meta['count']} products, {meta['size_bytes'] / 1e6:.1f} MB in {meta['seconds']}s"
+        )
+        if meta["missing_vectors"]:
+            st.warning(f"{meta['missing_vectors']} products had no vector and will need re-embedding after a restore")
+    except Exception as e:
+        st.error(f"Backup failed: {e}")
 
-def restore_backup():
-    st.info("Restoring from backup...")
-    st.success("Backup restored successfully!")
+def restore_backup(backup: dict):
+    if backup is None:
+        st.warning("No backups available yet")
+        return
+    client, status_msg, has_data = initialize_weaviate_client()
+    if not client:
+        st.error(f"Cannot restore: {status_msg}")
+        return
+    try:
+        progress_bar = st.progress(0.0, text="Restoring backup...")
+        summary = restore_collection(
+            client, backup["path"],
+            progress=lambda done, total: progress_bar.progress(done / total if total else 1.0,
+                                                               text=f"Restored {done}/{total}")
+        )
+        get_job_store().record_completed("restore", f"Restore {os.path.basename(backup['path'])}", f"{summary['succeeded']} restored")
+        invalidate_search_caches()
+        st.success(f"Restored {summary['succeeded']} products in {summary['seconds']}s (no embedding calls)")
+        if summary["failed"]:
+            st.warning(f"{summary['failed']} products failed to restore, see the logs")
+    except Exception as e:
+        st.error(f"Restore failed: {e}")
 
 def export_data():
-    st.info("Exporting data...")
-    st.success("Data exported successfully!")
+    if not PYARROW_AVAILABLE:
+        st.error("Exports need pyarrow (pip install pyarrow)")
+        return
+    client, status_msg, has_data = initialize_weaviate_client()
+    if not client:
+        st.error(f"Cannot export: {status_msg}")
+        return
+    try:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        path = os.path.join(BACKUP_DIR, f"catalog-{time.strftime('%Y%m%d-%H%M%S')}.parquet")
+        with st.spinner("Exporting catalog..."):
+            export = export_properties(client.collections.get(WEAVIATE_CLASS_NAME), path)
+        st.success(f"Exported {export['count']} products ({export['size_bytes'] / 1e6:.1f} MB)")
+        with open(path, "rb") as f:
+            st.download_button("Download Parquet", f, file_name=os.path.basename(path),
+                               mime="application/vnd.apache.parquet", key="download_export")
+    except Exception as e:
+        st.error(f"Export failed: {e}")
 
 def run_system_diagnostics():
+    import requests
+
     st.info("Running diagnostics...")
     try:
         response = requests.get(f"http://{WEAVIATE_HOST}:{WEAVIATE_PORT}/v1/.well-known/ready", timeout=5)
@@ -231,9 +471,11 @@ def view_system_logs():
 
 def refresh_cache():
     st.info("Refreshing cache...")
+    invalidate_search_caches()
     st.success("Cache refreshed!")
 
 def refresh_weaviate_count():
+    import requests
     try:
         url = f"http://{WEAVIATE_HOST}:{WEAVIATE_PORT}/v1/objects?class={WEAVIATE_CLASS_NAME}&limit=1"
         response = requests.get(url, timeout=10)
@@ -246,10 +488,10 @@ def refresh_weaviate_count():
         return False, f"Error: {str(e)}"
 
 def quick_weaviate_setup():
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("Weaviate Setup")
+    st.markdown("---")
+    st.markdown("Weaviate Setup")
     
-    if st.sidebar.button("Start Weaviate Service", use_container_width=True):
+    if st.button("Start Weaviate Service", use_container_width=True):
         with st.spinner("Starting Weaviate..."):
             try:
                 result = subprocess.run(
@@ -259,35 +501,26 @@ def quick_weaviate_setup():
                     timeout=30
                 )
                 if result.returncode == 0:
-                    st.sidebar.success("Weaviate started!")
+                    st.success("Weaviate started!")
                     time.sleep(3)
                     st.rerun()
                 else:
-                    st.sidebar.error(f"Failed: {result.stderr}")
+                    st.error(f"Failed: {result.stderr}")
             except Exception as e:
-                st.sidebar.error(f"Error: {e}")
+                st.error(f"Error: {e}")
 
 def admin_sidebar_tools():
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("Admin Tools")
+    st.markdown("---")
+    st.markdown("Admin Tools")
     
-    with st.sidebar.expander("Data Management", expanded=False):
+    with st.expander("Data Management", expanded=False):
         st.markdown("Database Operations")
         
         col1, col2 = st.columns(2)
         
         with col1:
             if st.button("Re-ingest All", use_container_width=True, key="reingest_all"):
-                with st.spinner("Re-ingesting all data..."):
-                    try:
-                        result = subprocess.run(["python", "ingest_weaviate.py"], 
-                                              capture_output=True, text=True)
-                        if result.returncode == 0:
-                            st.success("Data ingestion completed!")
-                        else:
-                            st.error(f"Ingestion failed: {result.stderr}")
-                    except Exception as e:
-                        st.error(f"Error: {e}")
+                submit_ingest_job("excel", label="Re-ingest All")
         
         with col2:
             if st.button("Clear All Data", use_container_width=True, key="clear_all"):
@@ -303,7 +536,13 @@ def admin_sidebar_tools():
         if st.button("Validate Data", use_container_width=True, key="validate_data"):
             validate_database()
     
-    with st.sidebar.expander("System Management", expanded=False):
+    with st.expander("Ingestion Jobs", expanded=False):
+        ingest_jobs_panel()
+    
+    with st.expander("Resources", expanded=False):
+        resource_sparklines()
+    
+    with st.expander("System Management", expanded=False):
         st.markdown("Service Control")
         
         col1, col2 = st.columns(2)
@@ -316,13 +555,16 @@ def admin_sidebar_tools():
             if st.button("System Health", use_container_width=True, key="system_health"):
                 check_system_health()
         
+        if st.button("Snapshot Local Index", use_container_width=True, key="snapshot_local_index"):
+            snapshot_local_index()
+        
         st.markdown("API Configuration")
         new_gemini_key = st.text_input("New Gemini API Key", type="password", 
                                      placeholder="Enter new API key", key="new_api_key")
         if st.button("Update API Key", use_container_width=True, key="update_api_key"):
             update_api_key(new_gemini_key)
     
-    with st.sidebar.expander("Analytics", expanded=False):
+    with st.expander("Analytics", expanded=False):
         st.markdown("Performance Metrics")
         
         if st.button("Show Usage Stats", use_container_width=True, key="usage_stats"):
@@ -337,7 +579,7 @@ def admin_sidebar_tools():
         if st.button("System Monitor", use_container_width=True, key="system_monitor"):
             show_system_monitor()
     
-    with st.sidebar.expander("User Management", expanded=False):
+    with st.expander("User Management", expanded=False):
         st.markdown("User Operations")
         
         with st.form("add_user_form"):
@@ -352,9 +594,14 @@ def admin_sidebar_tools():
         if st.button("List All Users", use_container_width=True, key="list_users"):
             list_all_users()
     
-    with st.sidebar.expander("Backup & Recovery", expanded=False):
+    with st.expander("Backup & Recovery", expanded=False):
         st.markdown("Data Protection")
         
+        backups = list_backups()
+        selected_backup = st.selectbox(
+            "Backup", backups, format_func=format_backup_label, key="selected_backup"
+        ) if backups else None
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -363,12 +610,12 @@ def admin_sidebar_tools():
         
         with col2:
             if st.button("Restore Backup", use_container_width=True, key="restore_backup"):
-                restore_backup()
+                restore_backup(selected_backup)
         
         if st.button("Export Data", use_container_width=True, key="export_data"):
             export_data()
     
-    with st.sidebar.expander("Debug & Maintenance", expanded=False):
+    with st.expander("Debug & Maintenance", expanded=False):
         st.markdown("System Diagnostics")
         
         if st.button("Run Diagnostics", use_container_width=True, key="run_diagnostics"):
@@ -383,24 +630,110 @@ def admin_sidebar_tools():
         if st.button("Refresh Cache", use_container_width=True, key="refresh_cache"):
             refresh_cache()
 
-WEAVIATE_AVAILABLE = False
-try:
-    from weaviate import WeaviateClient
-    from weaviate.connect import ConnectionParams
-    WEAVIATE_AVAILABLE = True
-except ImportError as e:
-    st.sidebar.warning(f"Weaviate client not available: {e}")
+# Only check that the client is installed; weaviate (and grpc) are imported on first connect
+WEAVIATE_AVAILABLE = find_spec("weaviate") is not None
+if not WEAVIATE_AVAILABLE:
+    st.sidebar.warning("Weaviate client not available: No module named 'weaviate'")
 
 WEAVIATE_CLASS_NAME = "MercadoLibreProduct"
 WEAVIATE_HOST = "localhost"
 WEAVIATE_PORT = 8090
 
-if "messages" not in st.session_state:
-    st.session_state["messages"] = [
-        {"role": "assistant", "content": "Hello! I'm your Meli Catalog Assistant. I can help you search for products using semantic search or track your Servientrega shipments. How can I assist you today?"}
-    ]
+# Only the last CHAT_WINDOW_SIZE messages stay in session state and get rendered;
+# every message is also written to the SQLite conversation store for "load earlier"
+CHAT_WINDOW_SIZE = 20
+CHAT_EARLIER_PAGE_SIZE = 20
+
+# Chat messages rerun only this fragment; the diagnostics sidebar refreshes on its own timer
+CHAT_FRAGMENT_KEY = "chat"
+DIAGNOSTICS_REFRESH_S = int(os.getenv("DIAGNOSTICS_REFRESH_S", "30"))
+
+WELCOME_MESSAGE = "Hello! I'm your Meli Catalog Assistant. I can help you search for products using semantic search or track your Servientrega shipments. How can I assist you today?"
+
+@st.cache_resource
+def get_conversation_store():
+    return ConversationStore()
 
+@st.cache_resource
+def get_analytics_store():
+    return AnalyticsStore()
+
+@st.cache_resource
+def get_resource_sampler():
+    if not PSUTIL_AVAILABLE:
+        return None
+    return ResourceSampler().start()
+
+def resource_sparklines():
+    sampler = get_resource_sampler()
+    if sampler is None:
+        st.caption("Install psutil to enable resource sampling")
+        return
+    
+    latest = sampler.latest()
+    if not latest:
+        st.caption("Collecting samples...")
+        return
+    
+    for metric in ("process_cpu_percent", "rss_mb", "open_fds", "sockets", "chromedriver_processes"):
+        series = sampler.series(metric)
+        st.metric(
+            METRIC_LABELS[metric],
+            f"{latest[metric]:.0f}",
+            chart_data=series[~np.isnan(series)],
+            chart_type="line",
+        )
+
+def reset_conversation(greeting: str):
+    st.session_state.conversation_id = uuid.uuid4().hex
+    st.session_state.messages = [{"role": "assistant", "content": greeting}]
+    st.session_state.earlier_messages = []
+    st.session_state.pop("search_cursor", None)
+
+def append_chat_message(role: str, content: str, **extra):
+    message = {"role": role, "content": content, **extra}
+    message["id"] = get_conversation_store().append(st.session_state.conversation_id, message)
+    
+    messages = st.session_state.messages
+    messages.append(message)
+    if len(messages) > CHAT_WINDOW_SIZE:
+        trimmed = messages[:-CHAT_WINDOW_SIZE]
+        del messages[:-CHAT_WINDOW_SIZE]
+        if st.session_state.earlier_messages:
+            # History the user loaded ends where the window began: keep it contiguous
+            st.session_state.earlier_messages.extend(trimmed)
+        # Otherwise older turns are already persisted, drop them from memory
+
+def oldest_loaded_message_id():
+    for msg in st.session_state.earlier_messages + st.session_state.messages:
+        if msg.get("id") is not None:
+            return msg["id"]
+    return None
+
+def load_earlier_messages():
+    oldest_id = oldest_loaded_message_id()
+    if oldest_id is None:
+        return
+    page = get_conversation_store().load_before(
+        st.session_state.conversation_id, oldest_id, CHAT_EARLIER_PAGE_SIZE
+    )
+    st.session_state.earlier_messages = page + st.session_state.earlier_messages
+
+def render_chat_message(msg):
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
+        if msg.get("timings"):
+            st.caption(format_stage_timings(msg["timings"]))
+
+if "messages" not in st.session_state or "conversation_id" not in st.session_state:
+    reset_conversation(WELCOME_MESSAGE)
+
+# Connection/data probes run on every rerun; a short TTL keeps them off the interaction path
+WEAVIATE_STATUS_TTL_S = 10
+
+@st.cache_data(ttl=WEAVIATE_STATUS_TTL_S, show_spinner=False)
 def test_weaviate_connection():
+    import requests
     try:
         url = f"http://{WEAVIATE_HOST}:{WEAVIATE_PORT}/v1/.well-known/ready"
         response = requests.get(url, timeout=10)
@@ -411,7 +744,9 @@ def test_weaviate_connection():
     except Exception as e:
         return False, f"Cannot connect to Weaviate: {str(e)}"
 
+@st.cache_data(ttl=WEAVIATE_STATUS_TTL_S, show_spinner=False)
 def check_weaviate_data():
+    import requests
     try:
         url = f"http://{WEAVIATE_HOST}:{WEAVIATE_PORT}/v1/objects?class={WEAVIATE_CLASS_NAME}&limit=1"
         response = requests.get(url, timeout=10)
@@ -441,17 +776,7 @@ def initialize_weaviate_client():
     data_ok, data_msg = check_weaviate_data()
     
     try:
-        connection_params = ConnectionParams.from_params(
-            http_host=WEAVIATE_HOST,
-            http_port=WEAVIATE_PORT,
-            http_secure=False,
-            grpc_host=WEAVIATE_HOST,
-            grpc_port=50051,
-            grpc_secure=False,
-        )
-        
-        client = WeaviateClient(connection_params)
-        client.connect()
+        client = get_weaviate_client()
         
         if client.is_ready():
             status_msg = f"Connected to {WEAVIATE_HOST}:{WEAVIATE_PORT}"
@@ -461,11 +786,39 @@ def initialize_weaviate_client():
                 status_msg += " - No data"
             return client, status_msg, data_ok
         else:
+            # Closes the stale client through on_release before the next call reconnects
+            get_weaviate_client.clear()
             return None, "Weaviate is not ready", False
             
     except Exception as e:
+        get_weaviate_client.clear()
         return None, f"Connection error: {str(e)}", False
 
+def close_weaviate_client(client):
+    """Release a client dropped from the cache (get_weaviate_client.clear()), so reconnects don't leak sockets."""
+    try:
+        client.close()
+    except Exception as e:
+        print(f"⚠️ Could not close the stale Weaviate client: {e}")
+
+@st.cache_resource(on_release=close_weaviate_client)
+def get_weaviate_client():
+    """One client per process, shared by all sessions and reruns."""
+    from weaviate import WeaviateClient
+    from weaviate.connect import ConnectionParams
+
+    connection_params = ConnectionParams.from_params(
+        http_host=WEAVIATE_HOST,
+        http_port=WEAVIATE_PORT,
+        http_secure=False,
+        grpc_host=WEAVIATE_HOST,
+        grpc_port=50051,
+        grpc_secure=False,
+    )
+    client = WeaviateClient(connection_params)
+    client.connect()
+    return client
+
 def extract_requested_limit(prompt: str, default_limit: int = 8, max_limit: int = 20) -> int:
     """
     Dynamically extract the requested number of products from user prompt.
@@ -521,170 +874,573 @@ def extract_requested_limit(prompt: str, default_limit: int = 8, max_limit: int
     # Default fallback
     return default_limit
 
-def search_products_semantic(client, query: str, limit: int = 10):
+SHOW_MORE_PATTERN = re.compile(
+    r'^\s*(?:please\s+)?(?:(?:show|give|load|see|get)\s+)?(?:me\s+)?(?:(\d+)\s+)?more'
+    r'(?:\s+(?:results|products|items|options))?(?:\s+please)?\s*[.!?]*\s*$'
+    r'|^\s*next\s+page\s*[.!?]*\s*$'
+)
+
+def is_show_more_request(prompt: str) -> bool:
+    """True for follow-ups like "show me more" or "5 more" that carry no new search terms."""
+    return bool(SHOW_MORE_PATTERN.match(prompt.lower()))
+
+# Serve reads from the local snapshot first (single-node deployments)
+LOCAL_INDEX_PRIMARY = os.getenv("LOCAL_INDEX_PRIMARY", "false").lower() == "true"
+
+@st.cache_resource
+def get_local_index():
     try:
-        collection = client.collections.get(WEAVIATE_CLASS_NAME)
-        
-        query_vector = get_embedding(query)
+        index = LocalVectorIndex.load()
+        if index is not None:
+            print(f"📂 Local fallback index loaded: {len(index)} products")
+        return index
+    except Exception as e:
+        print(f"⚠️ Could not load local fallback index: {e}")
+        return None
+
+def search_local_index(query_vector, limit: int, offset: int = 0, filters=None):
+    """
+    Search the local snapshot; None when no snapshot is available or the filters
+    can't be evaluated on it (Weaviate Filter objects), so callers never serve
+    an unfiltered page for a filtered query.
+    """
+    index = get_local_index()
+    if index is None or (filters and not isinstance(filters, dict)):
+        return None
+    with time_stage("local_index"):
+        try:
+            return index.search(query_vector, limit, offset, filters=filters or None)
+        except ValueError as e:
+            print(f"⚠️ Local index can't apply filters {filters}: {e}")
+            return None
+
+def snapshot_local_index():
+    st.info("Snapshotting collection for offline search...")
+    client, status_msg, has_data = initialize_weaviate_client()
+    if not client:
+        st.error(f"Cannot snapshot: {status_msg}")
+        return
+    try:
+        meta = snapshot_collection(client.collections.get(WEAVIATE_CLASS_NAME))
+        get_local_index.clear()
+        st.success(f"Local index saved: {meta['count']} products in {meta['seconds']}s")
+    except Exception as e:
+        st.error(f"Snapshot failed: {e}")
+
+def search_products_semantic(client, query: str, limit: int = 10, rerank: bool = RERANK_ENABLED,
+                             offset: int = 0, query_vector=None, filters=None):
+    """
+    Identical concurrent searches (from any session) share one embedding + Weaviate round-trip.
+    A failure reaches every coalesced caller, so each session reports its own error.
+    """
+    vector_key = hashlib.sha1(np.asarray(query_vector, dtype=np.float32).tobytes()).hexdigest() if query_vector is not None else None
+    key = (query, limit, rerank, offset, vector_key, repr(filters))
+    try:
+        # Callers get their own list; the ProductHits themselves are immutable
+        return list(get_single_flight("search").do(
+            key, _search_products_semantic, client, query, limit, rerank, offset, query_vector, filters
+        ))
+    except Exception as e:
+        st.error(f"Error in semantic search: {e}")
+        return []
+
+def _search_products_semantic(client, query: str, limit: int = 10, rerank: bool = RERANK_ENABLED,
+                              offset: int = 0, query_vector=None, filters=None):
+    """
+    Vector search in Weaviate, failing over to the local snapshot index when
+    Weaviate is down. The local index applies dict filters ({"category": ...})
+    on the snapshot fields; queries with other filters don't fail over.
+    With SEARCH_SERVICE_URL set the search runs in the service (dict filters only).
+    Dict filters are turned into Weaviate filters here.
+    Runs under single-flight: errors are raised, never rendered here.
+    """
+    service = get_search_service()
+    if service is not None:
+        with time_stage("search_service"):
+            return service.search(
+                query, limit, offset=offset, rerank=rerank, vector=query_vector,
+                filters=filters if isinstance(filters, dict) else None
+            )
+    
+    if query_vector is None:
+        with time_stage("embedding"):
+            query_vector = get_embedding(query)
+    if not query_vector:
+        raise RuntimeError("Could not generate embedding for the query")
+    
+    # Over-fetch candidates for the cross-encoder, otherwise use exact limit requested
+    fetch_limit = max(limit, RERANK_OVERFETCH) if rerank else limit
+    
+    results = None
+    if client is None or LOCAL_INDEX_PRIMARY:
+        results = search_local_index(query_vector, fetch_limit, offset, filters)
+    
+    if results is None:
+        try:
+            from batch_search import build_filters
+            collection = client.collections.get(WEAVIATE_CLASS_NAME)
+            with time_stage("weaviate_query"):
+                response = collection.query.near_vector(
+                    near_vector=query_vector,
+                    limit=fetch_limit,
+                    offset=offset,
+                    filters=build_filters(filters),
+                    return_properties=PRODUCT_HIT_PROPERTIES,
+                    return_metadata=["distance"]
+                )
+            results = to_product_hits(response.objects)
+        except Exception as e:
+            results = search_local_index(query_vector, fetch_limit, offset, filters)
+            if results is None:
+                raise
+            print(f"⚠️ Weaviate query failed, served from local index: {e}")
+    
+    if rerank and results:
+        with time_stage("rerank"):
+            results = rerank_products(query, results, limit)
+    
+    return results[:limit]
+
+@st.cache_resource
+def get_search_service():
+    """HTTP client for search_service.py when SEARCH_SERVICE_URL is set, else None (in-process search)."""
+    if not SEARCH_SERVICE_URL:
+        return None
+    print(f"🌐 Using search service at {SEARCH_SERVICE_URL}")
+    return SearchServiceClient(SEARCH_SERVICE_URL)
+
+@st.cache_resource
+def get_semantic_cache():
+    return SemanticQueryCache()
+
+@st.cache_resource
+def get_background_lookup_index():
+    return BackgroundLookupIndex()
+
+def get_lookup_index(client):
+    """The lookup index for the current catalog generation, or None while it builds in the background."""
+    return get_background_lookup_index().get(client.collections.get(WEAVIATE_CLASS_NAME), catalog_generation())
+
+def invalidate_search_caches():
+    """Drop caches derived from the catalog after an ingest."""
+    get_semantic_cache().clear()
+    get_background_lookup_index().invalidate()
+    get_facet_service().invalidate()
+    check_weaviate_data.clear()
+
+def catalog_generation() -> float:
+    return get_job_store().catalog_generation()
+
+@st.cache_resource
+def get_seen_catalog_generation():
+    """Process-wide: the catalog generation the search caches were built for."""
+    return {"generation": None}
+
+def sync_catalog_caches():
+    """
+    Invalidate catalog-derived caches when the job table shows a new ingest,
+    wherever it ran (UI, search service, CLI, restore). One SQLite read per call.
+    """
+    generation = catalog_generation()
+    seen = get_seen_catalog_generation()
+    if seen["generation"] is not None and seen["generation"] != generation:
+        invalidate_search_caches()
+    seen["generation"] = generation
+
+@st.cache_resource
+def get_facet_service():
+    return FacetService()
+
+def get_catalog_facets(client):
+    if client is None:
+        return get_facet_service().cached()
+    try:
+        return get_facet_service().get(client.collections.get(WEAVIATE_CLASS_NAME))
+    except Exception as e:
+        print(f"⚠️ Could not compute facets: {e}")
+        return get_facet_service().cached()
+
+def fetch_category_page(client, category: str, limit: int, offset: int = 0):
+    """Plain filtered listing - no embedding, no ANN. The cursor API ('after') cannot be filtered, so page by offset."""
+    from weaviate.classes.query import Filter
+    
+    collection = client.collections.get(WEAVIATE_CLASS_NAME)
+    with time_stage("weaviate_query"):
+        response = collection.query.fetch_objects(
+            filters=Filter.by_property("category").equal(category),
+            limit=limit,
+            offset=offset,
+            return_properties=PRODUCT_HIT_PROPERTIES
+        )
+    return to_product_hits(response.objects)
+
+def start_category_browse(client, category: str, limit: int, total: int):
+    hits = fetch_category_page(client, category, limit)
+    cursor = {
+        "mode": "browse",
+        "category": category,
+        "query": f"{category} ({total} in catalog)",
+        "query_vector": None,
+        "filters": None,
+        "page_size": limit,
+        "offset": len(hits),
+        "buffer": [],
+        "displayed": hits,
+        "exhausted": len(hits) >= total or len(hits) < limit,
+    }
+    return hits, cursor
+
+def format_category_listing(facets: dict) -> str:
+    response = f"**We have {facets['total']:,} products in {len(facets['category'])} categories:**\n\n"
+    for category, count in facets["category"].items():
+        response += f"- {category}: {count:,}\n"
+    response += "\nAsk for example \"what backpacks do you have?\" to browse a category."
+    return response
+
+def exact_match_search(client, query: str, limit: int):
+    """
+    Fast path for prompts that are exactly a product title, character or code:
+    answer from the in-memory lookup index without embedding or vector search.
+    """
+    if client is None:
+        return [], None
+    
+    try:
+        index = get_lookup_index(client)
+        hits = index.exact(query) if index is not None else []
+    except Exception as e:
+        print(f"⚠️ Lookup index unavailable: {e}")
+        return [], None
+    
+    if not hits:
+        return [], None
+    
+    cursor = {
+        "query": query,
+        "query_vector": None,
+        "filters": None,
+        "page_size": limit,
+        "offset": len(hits),
+        "buffer": hits[limit:],
+        "displayed": hits[:limit],
+        "exhausted": True,
+    }
+    return hits[:limit], cursor
+
+def start_product_search(client, query: str, limit: int, filters=None, rerank: bool = RERANK_ENABLED,
+                         on_preview=None):
+    """
+    Run the first page of a search and return it with a cursor for "show more".
+
+    The cursor keeps the query vector, the filters, the next vector offset and any
+    already-ranked candidates that were not displayed yet, so later pages never
+    recompute the embedding. When a local rerank is about to run, on_preview gets
+    the vector-order first page so the caller can show it while reranking.
+    """
+    fetch_limit = max(limit, RERANK_OVERFETCH) if rerank else limit
+    
+    service = get_search_service()
+    if service is not None:
+        # The service embeds, searches and reranks; keep its query vector for "show more"
+        try:
+            with time_stage("search_service"):
+                candidates, query_vector = service.search(
+                    query, fetch_limit, rerank=rerank, return_vector=True,
+                    filters=filters if isinstance(filters, dict) else None
+                )
+        except Exception as e:
+            st.error(f"Error in semantic search: {e}")
+            return [], None
+    else:
+        with time_stage("embedding"):
+            query_vector = get_embedding(query)
         if not query_vector:
             st.error("Could not generate embedding for the query")
-            return []
+            return [], None
         
-        response = collection.query.near_vector(
-            near_vector=query_vector,
-            limit=limit,  # Use exact limit requested
-            return_metadata=["distance", "score"]
-        )
+        # Paraphrases of a recent query reuse its ranked candidates: no Weaviate round-trip, no rerank
+        semantic_cache = get_semantic_cache()
+        options_key = (limit, repr(filters), rerank)
+        cached = semantic_cache.lookup(query_vector, options_key)
         
-        return response.objects if response.objects else []
-        
-    except Exception as e:
-        st.error(f"Error in semantic search: {e}")
-        return []
+        if cached:
+            entry, similarity = cached
+            candidates = entry["candidates"]
+            # "Show more" must page the ranking these candidates came from, not the paraphrase's
+            query_vector = entry["query_vector"]
+            print(f"♻️ Semantic cache hit for '{query}' (similarity {similarity:.3f})")
+        else:
+            candidates = search_products_semantic(
+                client, query, fetch_limit, rerank=False, query_vector=query_vector, filters=filters
+            )
+            
+            if rerank and candidates:
+                if on_preview is not None:
+                    on_preview(candidates[:limit])
+                with time_stage("rerank"):
+                    candidates = rerank_products(query, candidates, len(candidates))
+            
+            if candidates:
+                semantic_cache.store(
+                    query_vector, options_key, {"candidates": candidates, "query_vector": query_vector}
+                )
     
-def format_product_display(product):
-    props = product.properties
+    cursor = {
+        "query": query,
+        "query_vector": query_vector,
+        "filters": filters,
+        "page_size": limit,
+        "offset": len(candidates),
+        "buffer": candidates[limit:],
+        "displayed": candidates[:limit],
+        "exhausted": len(candidates) < fetch_limit,
+    }
+    return candidates[:limit], cursor
+
+def next_search_page(client, cursor: dict, limit: int = None):
+    """Fetch the next page for a cursor using offset on the cached query vector."""
+    page_size = limit or cursor["page_size"]
+    
+    page = cursor["buffer"][:page_size]
+    cursor["buffer"] = cursor["buffer"][page_size:]
+    
+    missing = page_size - len(page)
+    if missing > 0 and not cursor["exhausted"]:
+        if cursor.get("mode") == "browse":
+            fetched = fetch_category_page(client, cursor["category"], missing, cursor["offset"])
+        else:
+            fetched = search_products_semantic(
+                client,
+                cursor["query"],
+                missing,
+                rerank=False,
+                offset=cursor["offset"],
+                query_vector=cursor["query_vector"],
+                filters=cursor["filters"],
+            )
+        cursor["offset"] += len(fetched)
+        if len(fetched) < missing:
+            cursor["exhausted"] = True
+        page += fetched
+    
+    cursor["displayed"] = cursor["displayed"] + page
+    return page
+
+MORE_LIKE_THIS_PATTERN = re.compile(
+    r'\b(?:more\s+like|similar\s+to)\s+(?:(?:the\s+)?(?:number|no\.?|item|product|result)\s*|#\s*)?(\d{1,2})\b'
+    r'|\blike\s+(?:(?:the\s+)?(?:number|no\.?|item|product|result)\s*|#\s*)(\d{1,2})\b'
+)
+
+def extract_more_like_this_index(prompt: str):
+    """Return the result number in prompts like "similar to number 3", else None."""
+    match = MORE_LIKE_THIS_PATTERN.search(prompt.lower())
+    return int(match.group(1) or match.group(2)) if match else None
+
+@st.cache_resource(max_entries=1024, ttl=3600, show_spinner=False)
+def find_similar_products(_client, object_uuid: str, limit: int):
+    """
+    Products closest to a stored object, using its vector in Weaviate
+    (near_object) - no embedding call. Cached per object id and limit.
+    """
+    if _client is not None:
+        try:
+            collection = _client.collections.get(WEAVIATE_CLASS_NAME)
+            with time_stage("weaviate_query"):
+                response = collection.query.near_object(
+                    near_object=object_uuid,
+                    limit=limit + 1,
+                    return_properties=PRODUCT_HIT_PROPERTIES,
+                    return_metadata=["distance"]
+                )
+            hits = [hit for hit in to_product_hits(response.objects) if hit.uuid != object_uuid]
+            return hits[:limit]
+        except Exception as e:
+            print(f"⚠️ near_object failed, trying local index: {e}")
+    
+    local_index = get_local_index()
+    vector = local_index.get_vector(object_uuid) if local_index is not None else None
+    if vector is None:
+        raise RuntimeError("Product vector not available")
+    with time_stage("local_index"):
+        return local_index.search(vector, limit, exclude_uuid=object_uuid)
+
+def start_similar_search(client, product, limit: int):
+    hits = find_similar_products(client, product.uuid, limit)
+    cursor = {
+        "query": f"similar to {product.title}",
+        "query_vector": None,
+        "filters": None,
+        "page_size": limit,
+        "offset": len(hits),
+        "buffer": [],
+        "displayed": hits,
+        "exhausted": True,
+    }
+    return hits, cursor
+
+def cursor_has_more(cursor) -> bool:
+    return bool(cursor) and (bool(cursor["buffer"]) or not cursor["exhausted"])
     
-    display_text = f"### {props.get('title', 'Product without title')}\n"
+def format_product_display(product):
+    display_text = f"### {product.title}\n"
     
-    if props.get('character'):
-        display_text += f"**Character:** {props['character']}\n"
+    if product.character:
+        display_text += f"**Character:** {product.character}\n"
     
-    if props.get('category'):
-        display_text += f"**Category:** {props['category']}\n"
+    if product.category:
+        display_text += f"**Category:** {product.category}\n"
     
-    if props.get('materials'):
-        display_text += f"**Materials:** {props['materials']}\n"
+    if product.materials:
+        display_text += f"**Materials:** {product.materials}\n"
     
-    if props.get('is_articulated'):
+    if product.is_articulated:
         display_text += "**Type:** Articulated Figure\n"
     
-    if props.get('is_collectible'):
+    if product.is_collectible:
         display_text += "**Collectible:** Yes\n"
     
-    if props.get('height_cm') and props['height_cm'] not in ['nan', 'None']:
-        display_text += f"**Height:** {props['height_cm']}cm\n"
+    if product.height_cm:
+        display_text += f"**Height:** {product.height_cm}cm\n"
     
-    if props.get('weight_g') and props['weight_g'] not in ['nan', 'None']:
-        display_text += f"**Weight:** {props['weight_g']}g\n"
+    if product.weight_g:
+        display_text += f"**Weight:** {product.weight_g}g\n"
     
-    if hasattr(product, 'metadata'):
-        similarity = product.metadata.distance if hasattr(product.metadata, 'distance') else None
-        if similarity:
-            display_text += f"**Relevance:** {similarity:.3f}\n"
+    if product.distance:
+        display_text += f"**Relevance:** {product.distance:.3f}\n"
     
     display_text += "---"
     return display_text
 
-def format_search_results(results, query, requested_limit=8):
+def iter_search_results(results, query, requested_limit=8, start_index=1, has_more=False):
+    """Yield the search response in chunks: header, one chunk per product, then the footer."""
     if not results:
-        return "I didn't find any products matching your search. Try using different terms or asking for fewer products."
+        if start_index > 1:
+            yield f"There are no more products for '{query}'. Try a new search with different terms."
+        else:
+            yield "I didn't find any products matching your search. Try using different terms or asking for fewer products."
+        return
     
     actual_count = len(results)
     
     # Dynamic response based on match between requested and actual
-    if actual_count == requested_limit:
-        response = f"**Here are your {requested_limit} requested products for '{query}':**\n\n"
+    if start_index > 1:
+        yield f"**More products for '{query}' (results {start_index}-{start_index + actual_count - 1}):**\n\n"
+    elif actual_count == requested_limit:
+        yield f"**Here are your {requested_limit} requested products for '{query}':**\n\n"
     elif actual_count < requested_limit:
-        response = f"**Found {actual_count} products for '{query}' (showing all available, requested {requested_limit}):**\n\n"
+        yield f"**Found {actual_count} products for '{query}' (showing all available, requested {requested_limit}):**\n\n"
     else:
-        response = f"**Found {actual_count} products for '{query}' (showing top {requested_limit}):**\n\n"
+        yield f"**Found {actual_count} products for '{query}' (showing top {requested_limit}):**\n\n"
     
     # Show only up to the requested limit
     display_results = results[:requested_limit]
     
-    for i, product in enumerate(display_results, 1):
-        props = product.properties
-        response += f"**{i}. {props.get('title', 'Product without title')}**\n"
+    for i, product in enumerate(display_results, start_index):
+        chunk = f"**{i}. {product.title}**\n"
         
-        if props.get('character'):
-            response += f"   • Character: {props['character']}\n"
-        if props.get('category'):
-            response += f"   • Category: {props['category']}\n"
-        if props.get('materials'):
-            response += f"   • Materials: {props['materials']}\n"
+        if product.character:
+            chunk += f"   • Character: {product.character}\n"
+        if product.category:
+            chunk += f"   • Category: {product.category}\n"
+        if product.materials:
+            chunk += f"   • Materials: {product.materials}\n"
         
-        response += "\n"
+        yield chunk + "\n"
     
     # Add helpful suggestions
+    footer = ""
     if actual_count == 0:
-        response += "💡 **Tip:** Try using broader search terms or check for spelling variations."
+        footer += "💡 **Tip:** Try using broader search terms or check for spelling variations."
     elif actual_count < requested_limit:
-        response += f"💡 **Note:** Only {actual_count} products matched your criteria. Try broader search terms for more results."
+        footer += f"💡 **Note:** Only {actual_count} products matched your criteria. Try broader search terms for more results."
+    elif has_more:
+        footer += "💡 **Tip:** Say \"show me more\" to see the next page of results."
     
-    response += "\nAre you interested in any particular product or would you like to search for something else?"
-    return response
+    footer += "\nAre you interested in any particular product or would you like to search for something else?"
+    yield footer
+
+def format_search_results(results, query, requested_limit=8, start_index=1, has_more=False):
+    return "".join(iter_search_results(results, query, requested_limit, start_index, has_more))
+
+def timed_stream(chunks, timings: dict, turn_start: float):
+    """Pass chunks through to st.write_stream, recording time-to-first-result for the turn."""
+    for chunk in timed_iter(chunks, "formatting"):
+        if "first_result" not in timings:
+            timings["first_result"] = time.perf_counter() - turn_start
+        yield chunk
+
+def format_stage_timings(timings: dict) -> str:
+    labels = {
+        "first_result": "first result",
+        "weaviate_query": "weaviate",
+        "servientrega": "servientrega",
+    }
+    parts = [
+        f"{labels.get(stage, stage.replace('_', ' '))} {seconds * 1000:.0f} ms"
+        for stage, seconds in timings.items()
+    ]
+    return "⏱️ " + " · ".join(parts)
 
-def ingest_dataframe_to_weaviate(df: pd.DataFrame):
+@st.cache_resource
+def get_job_store():
+    return JobStore()
+
+def submit_ingest_job(kind: str, df=None, label: str = None):
+    """Start a background ingestion job (on the search service when configured)."""
+    service = get_search_service()
     try:
-        client, status_msg, has_data = initialize_weaviate_client()
-        
-        if not client:
-            st.error("Cannot connect to Weaviate")
-            return
-        
-        collection = client.collections.get(WEAVIATE_CLASS_NAME)
+        if service is not None and kind == "excel":
+            job = service.start_ingest_job()
+            job_id = job["id"]
+        else:
+            job_id = start_ingest_job(kind, df, label, store=get_job_store())
+        st.success(f"Ingestion job {job_id[:8]} started - follow it under Ingestion Jobs")
+    except Exception as e:
+        st.error(f"Could not start ingestion: {e}")
+
+def format_eta(seconds) -> str:
+    if seconds is None:
+        return "-"
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+@st.fragment(run_every=2)
+def ingest_jobs_panel():
+    """Polls the job table; only this fragment reruns while jobs progress."""
+    store = get_job_store()
+    store.reap_dead_workers()
+    jobs = store.list(5)
+    if not jobs:
+        st.caption("No ingestion jobs yet")
+        return
+    
+    for job in jobs:
+        label = job["label"] or job["kind"]
+        st.markdown(f"**{label}** · `{job['id'][:8]}` · {job['status']}")
         
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        if job["total"]:
+            st.progress(min(job["processed"] / job["total"], 1.0),
+                        text=f"{job['processed']}/{job['total']} rows · {job['succeeded']} ok · {job['failed']} failed")
         
-        ingested_count = 0
-        errors = []
+        if job["status"] == "running":
+            st.caption(f"{job['rows_per_s']:.1f} rows/s · ETA {format_eta(job['eta_s'])}")
+            if st.button("Cancel", key=f"cancel_job_{job['id']}", use_container_width=True):
+                store.request_cancel(job["id"])
+                st.info("Cancel requested")
+        elif job["message"]:
+            st.caption(job["message"])
         
-        for index, row in df.iterrows():
-            try:
-                product_data = {
-                    "title": str(row.get('title', '')),
-                    "code": str(row.get('code', '')),
-                    "price": str(row.get('price', '')),
-                    "category": str(row.get('category', '')),
-                }
-                
-                if 'specifications' in df.columns and pd.notna(row.get('specifications')):
-                    product_data["specifications"] = str(row.get('specifications', ''))
-                
-                for col in df.columns:
-                    if col not in ['title', 'code', 'price', 'category', 'specifications'] and pd.notna(row.get(col)):
-                        product_data[col] = str(row.get(col, ''))
-                
-                description = f"{row.get('title', '')} {row.get('category', '')}"
-                embedding = get_embedding(description)
-                
-                if embedding:
-                    collection.data.insert(
-                        properties=product_data,
-                        vector=embedding
-                    )
-                    ingested_count += 1
-                else:
-                    errors.append(f"Row {index}: No embedding generated")
-                
-                progress = (index + 1) / len(df)
-                progress_bar.progress(progress)
-                status_text.text(f"Processing: {index + 1}/{len(df)} products - {ingested_count} ingested")
-                
-            except Exception as e:
-                errors.append(f"Row {index}: {str(e)}")
-        
-        progress_bar.empty()
-        status_text.empty()
-        
-        if errors:
-            st.warning(f"Completed with {len(errors)} errors out of {len(df)} products")
-            with st.expander("Show Errors"):
-                for error in errors[:10]:
-                    st.error(error)
-        else:
-            st.success(f"Successfully ingested {ingested_count} out of {len(df)} products!")
-            
-    except Exception as e:
-        st.error(f"Ingestion failed: {str(e)}")
+        if job["errors"]:
+            with st.expander(f"Errors ({job['failed']})"):
+                for error in job["errors"][-10:]:
+                    st.text(error)
+
 
 def pdf_upload_section():
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("PDF Catalog Upload")
+    st.markdown("---")
+    st.markdown("PDF Catalog Upload")
     
-    with st.sidebar.expander("Upload Product Catalog", expanded=False):
+    with st.expander("Upload Product Catalog", expanded=False):
         uploaded_file = st.file_uploader(
             "Choose PDF file", 
             type=['pdf'],
@@ -700,6 +1456,7 @@ def pdf_upload_section():
                     with st.spinner("Extracting products from PDF..."):
                         from pdf_extractor import process_pdf_catalog
                         df = process_pdf_catalog(uploaded_file)
+                    st.session_state.pdf_extracted = (uploaded_file.name, df)
                     
                     if len(df) > 0:
                         st.success(f"Extracted {len(df)} products from PDF!")
@@ -739,158 +1496,347 @@ def pdf_upload_section():
                             key="download_csv"
                         )
                         
-                        if st.button("Ingest to Weaviate", use_container_width=True, key="ingest_pdf"):
-                            with st.spinner(f"Ingesting {len(df)} products to Weaviate..."):
-                                try:
-                                    ingest_dataframe_to_weaviate(df)
-                                    
-                                    st.info("Refreshing product count...")
-                                    time.sleep(3)
-                                    success, new_count_msg = refresh_weaviate_count()
-                                    
-                                    if success:
-                                        st.success("Products ingested successfully!")
-                                        st.success(new_count_msg)
-                                        time.sleep(2)
-                                        st.rerun()
-                                    else:
-                                        st.warning("Products ingested but count refresh failed")
-                                        
-                                except Exception as e:
-                                    st.error(f"Error during ingestion: {str(e)}")
                     else:
                         st.warning("No products extracted from PDF")
                         
                 except Exception as e:
                     st.error(f"Error processing PDF: {str(e)}")
+            
+            extracted = st.session_state.get("pdf_extracted")
+            if extracted and extracted[0] == uploaded_file.name and len(extracted[1]) > 0:
+                if st.button(f"Ingest {len(extracted[1])} products to Weaviate", use_container_width=True, key="ingest_pdf"):
+                    submit_ingest_job("pdf", extracted[1], label=uploaded_file.name)
+                    st.session_state.pop("pdf_extracted", None)
 
-def main_app():
-    st.title("Meli Catalog Assistant")
-    
-    st.sidebar.markdown(f"**User:** {st.session_state.username}")
-    st.sidebar.markdown(f"**Role:** {st.session_state.role}")
+def quick_lookup_section(client):
+    st.markdown("### Quick Lookup")
+    typed = st.text_input("Product, character or code", key="quick_lookup",
+                          placeholder="e.g. Batman, Goku...")
+    if not typed:
+        return
     
-    elapsed_time = time.time() - st.session_state.login_time
-    remaining_time = SESSION_TIMEOUT - elapsed_time
-    minutes_remaining = int(remaining_time // 60)
-    st.sidebar.markdown(f"**Session expires in:** {minutes_remaining} minutes")
+    try:
+        index = get_lookup_index(client)
+    except Exception as e:
+        st.caption(f"Lookup unavailable: {e}")
+        return
+    if index is None:
+        st.caption("Lookup index is being built...")
+        return
     
-    if st.session_state.role == "admin":
-        admin_sidebar_tools()
-        pdf_upload_section()
+    suggestions = index.suggest(typed, limit=6)
     
-    st.caption("Ask me about products or track a shipment (e.g.: track 2259180939)")
+    if not suggestions:
+        st.caption("No matches")
+    for i, suggestion in enumerate(suggestions):
+        if st.button(suggestion, key=f"lookup_suggestion_{i}", use_container_width=True):
+            # Runs inside the diagnostics fragment; hand the query to the chat fragment only
+            st.session_state.pending_prompt = suggestion
+            st.rerun(scope=CHAT_FRAGMENT_KEY)
+
+def main_app():
+    st.title("Meli Catalog Assistant")
     
     with st.sidebar:
-        st.title("Diagnostics")
-        
-        st.markdown("### Configuration")
-        st.markdown(f"**Host:** `{WEAVIATE_HOST}:{WEAVIATE_PORT}`")
-        st.markdown(f"**Class:** `{WEAVIATE_CLASS_NAME}`")
-        
-        st.markdown("### Status")
-        connection_ok, connection_msg = test_weaviate_connection()
-        st.markdown(f"**Connection:** {connection_msg}")
+        st.markdown(f"**User:** {st.session_state.username}")
+        st.markdown(f"**Role:** {st.session_state.role}")
         
-        data_ok, data_msg = check_weaviate_data()
-        st.markdown(f"**Data:** {data_msg}")
+        elapsed_time = time.time() - st.session_state.login_time
+        remaining_time = SESSION_TIMEOUT - elapsed_time
+        minutes_remaining = int(remaining_time // 60)
+        st.markdown(f"**Session expires in:** {minutes_remaining} minutes")
         
-        client, client_msg, has_data = initialize_weaviate_client()
+        if st.session_state.role == "admin":
+            admin_panels()
         
-        if client and has_data:
-            st.success("System ready for searches")
-            st.info("Shipment tracking available")
-        elif client and not has_data:
-            st.warning("Connected but no data")
-        else:
-            st.error("System not available")
-            quick_weaviate_setup()
-        
-        st.markdown("### Refresh Tools")
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Refresh All", key="refresh_main", use_container_width=True):
-                st.rerun()
-        with col2:
-            if st.button("Count Only", key="refresh_count", use_container_width=True):
-                with st.spinner("Counting products..."):
-                    success, count_msg = refresh_weaviate_count()
-                    if success:
-                        st.success(count_msg)
-                    else:
-                        st.error(count_msg)
-        
-        st.markdown("---")
-        if st.button("Clear Chat History", use_container_width=True):
-            st.session_state.messages = [
-                {"role": "assistant", "content": "Hello! The history has been cleared. How can I help you now?"}
-            ]
+        diagnostics_panel()
+    
+    st.caption("Ask me about products or track a shipment (e.g.: track 2259180939)")
+    chat_panel()
+
+# Each panel is a fragment: its widgets rerun only that panel, so a chat message
+# no longer re-executes the diagnostics probes or the admin widgets (and vice versa).
+# Fragments can't write to st.sidebar directly; the sidebar ones are called inside `with st.sidebar:`.
+@st.fragment
+def admin_panels():
+    admin_sidebar_tools()
+    pdf_upload_section()
+
+@st.fragment(run_every=DIAGNOSTICS_REFRESH_S)
+def diagnostics_panel():
+    sync_catalog_caches()
+    st.title("Diagnostics")
+    
+    st.markdown("### Configuration")
+    st.markdown(f"**Host:** `{WEAVIATE_HOST}:{WEAVIATE_PORT}`")
+    st.markdown(f"**Class:** `{WEAVIATE_CLASS_NAME}`")
+    
+    st.markdown("### Status")
+    connection_ok, connection_msg = test_weaviate_connection()
+    st.markdown(f"**Connection:** {connection_msg}")
+    
+    data_ok, data_msg = check_weaviate_data()
+    st.markdown(f"**Data:** {data_msg}")
+    
+    client, client_msg, has_data = initialize_weaviate_client()
+    
+    facets = get_catalog_facets(client) if client and has_data else None
+    if facets:
+        st.markdown(f"**Catalog:** {facets['total']:,} products in {len(facets.get('category', {}))} categories")
+    
+    if client and has_data:
+        st.success("System ready for searches")
+        st.info("Shipment tracking available")
+    elif client and not has_data:
+        st.warning("Connected but no data")
+    elif get_local_index() is not None:
+        st.warning(f"Weaviate unavailable - searching local snapshot ({len(get_local_index())} products)")
+        quick_weaviate_setup()
+    else:
+        st.error("System not available")
+        quick_weaviate_setup()
+    
+    if client and has_data:
+        quick_lookup_section(client)
+    
+    st.markdown("### Refresh Tools")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Refresh All", key="refresh_main", use_container_width=True):
             st.rerun()
-        
-        logout_button()
-        
-        st.markdown("### Information")
-        st.markdown("- **Connection:** localhost:8090")
-        st.markdown("- **Embeddings:** Gemini AI")
-        st.markdown("- **Tracking:** Servientrega")
+    with col2:
+        if st.button("Count Only", key="refresh_count", use_container_width=True):
+            with st.spinner("Counting products..."):
+                success, count_msg = refresh_weaviate_count()
+                if success:
+                    st.success(count_msg)
+                else:
+                    st.error(count_msg)
+    
+    st.markdown("---")
+    if st.button("Clear Chat History", use_container_width=True):
+        reset_conversation("Hello! The history has been cleared. How can I help you now?")
+        st.rerun()
+    
+    logout_button()
+    
+    st.markdown("### Information")
+    st.markdown("- **Connection:** localhost:8090")
+    st.markdown("- **Embeddings:** Gemini AI")
+    st.markdown("- **Tracking:** Servientrega")
 
+@st.fragment(key=CHAT_FRAGMENT_KEY)
+def chat_panel():
+    if not check_authentication():
+        # Session expired while chatting: the full app shows the login form
+        st.rerun()
+    
+    client, client_msg, has_data = initialize_weaviate_client()
+    sync_catalog_caches()
+    
+    oldest_id = oldest_loaded_message_id()
+    if oldest_id is not None and get_conversation_store().has_before(st.session_state.conversation_id, oldest_id):
+        st.button("Load earlier messages", key="load_earlier", on_click=load_earlier_messages)
+    
+    for msg in st.session_state.earlier_messages:
+        render_chat_message(msg)
+    
     for msg in st.session_state.messages:
-        with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
+        render_chat_message(msg)
 
-    if prompt := st.chat_input("Type your question or tracking number here..."):
+    prompt = st.chat_input("Type your question or tracking number here...")
+    if not prompt:
+        # Set by the "Show more" button or a lookup suggestion
+        prompt = st.session_state.pop("pending_prompt", None)
+    
+    if prompt:
         
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        append_chat_message("user", prompt)
         st.chat_message("user").write(prompt)
 
-        with st.chat_message("assistant"):
+        turn_start = time.perf_counter()
+        with st.chat_message("assistant"), chat_turn() as timings:
             
-            tracking_number_match = re.search(r'\b(\d{10})\b', prompt)
+            response_chunks = None
+            turn_kind, result_count, turn_ok = "search", None, True
+            
+            with time_stage("routing"):
+                tracking_number_match = re.search(r'\b(\d{10})\b', prompt)
+                similar_index = extract_more_like_this_index(prompt)
+                show_more = is_show_more_request(prompt)
+                browse = is_browse_request(prompt)
             
             if tracking_number_match:
                 tracking_number = tracking_number_match.group(1)
+                turn_kind = "tracking"
                 
                 response_placeholder = st.empty()
                 response_placeholder.info(f"Detected tracking number: **{tracking_number}**. Consulting Servientrega...")
                 
                 with st.spinner(f"Checking shipment status {tracking_number}..."):
                     try:
-                        status_result = check_servientrega_status(tracking_number)
+                        service = get_search_service()
+                        with time_stage("servientrega"):
+                            if service is not None:
+                                status_result = service.track(tracking_number)["status"]
+                            else:
+                                # Selenium is only imported once someone actually tracks a shipment
+                                from servientrega_checker import check_servientrega_status
+                                status_result = check_servientrega_status(tracking_number)
+                        turn_ok = not str(status_result).startswith("ERROR")
                         final_response = f"**Shipment Status {tracking_number}:**\n\n{status_result}"
                         response_placeholder.success("Search completed")
 
                     except Exception as e:
                         final_response = f"There was an error trying to track the shipment {tracking_number}. Please verify the number and try again later.\n\n**Error detail:** {e}"
+                        turn_ok = False
                         response_placeholder.error("Error in the tracking query")
                 
+                render_start = time.perf_counter()
                 st.markdown(final_response)
+                record_latency("render", time.perf_counter() - render_start)
 
             else:
                 response_placeholder = st.empty()
                 
-                if not client or not has_data:
+                if (not client or not has_data) and get_local_index() is None and get_search_service() is None:
                     final_response = "Search service not available. Verify the Weaviate connection."
                     response_placeholder.error("System not available")
+                    turn_ok = False
                 else:
                     response_placeholder.info("Analyzing your request...")
                     
                     try:
-                        # DYNAMIC NUMBER PARSER
-                        requested_limit = extract_requested_limit(prompt)
-                        
-                        with st.spinner(f"Finding {requested_limit} matching products..."):
-                            results = search_products_semantic(client, prompt, requested_limit)
+                        cursor = st.session_state.get("search_cursor")
+                        facets = get_catalog_facets(client) if client and browse else None
+                        category = match_category(prompt, facets.get("category", {})) if facets else None
                         
-                        final_response = format_search_results(results, prompt, requested_limit)
+                        if cursor and similar_index and 1 <= similar_index <= len(cursor["displayed"]):
+                            # Reuse the stored vector of a displayed result - no embedding
+                            product = cursor["displayed"][similar_index - 1]
+                            requested_limit = extract_requested_limit(prompt)
+                            
+                            with st.spinner(f"Finding products similar to {product.title}..."):
+                                results, cursor = start_similar_search(client, product, requested_limit)
+                            
+                            st.session_state.search_cursor = cursor
+                            response_chunks = iter_search_results(results, cursor["query"], requested_limit)
+                            turn_kind, result_count = "similar", len(results)
+                        elif cursor and show_more:
+                            # Next page on the cached query vector - no new embedding
+                            more_match = SHOW_MORE_PATTERN.match(prompt.lower())
+                            page_size = min(int(more_match.group(1)), 20) if more_match and more_match.group(1) else cursor["page_size"]
+                            start_index = len(cursor["displayed"]) + 1
+                            
+                            with st.spinner(f"Loading {page_size} more products..."):
+                                results = next_search_page(client, cursor, page_size)
+                            
+                            response_chunks = iter_search_results(
+                                results, cursor["query"], page_size,
+                                start_index=start_index, has_more=cursor_has_more(cursor)
+                            )
+                            turn_kind, result_count = "show_more", len(results)
+                        elif facets and is_category_list_request(prompt):
+                            final_response = format_category_listing(facets)
+                            turn_kind = "category_list"
+                        elif category and not extra_terms(prompt, category):
+                            # Browse mode: the prompt is only a category, list it without embedding or ANN
+                            requested_limit = extract_requested_limit(prompt)
+                            total = facets["category"][category]
+                            
+                            with st.spinner(f"Listing {category}..."):
+                                results, cursor = start_category_browse(client, category, requested_limit, total)
+                            
+                            st.session_state.search_cursor = cursor
+                            response_chunks = iter_search_results(
+                                results, cursor["query"], requested_limit, has_more=cursor_has_more(cursor)
+                            )
+                            turn_kind, result_count = "browse", len(results)
+                        else:
+                            # DYNAMIC NUMBER PARSER
+                            requested_limit = extract_requested_limit(prompt)
+                            
+                            with time_stage("lookup"):
+                                results, cursor = exact_match_search(client, prompt, requested_limit)
+                            
+                            if not results:
+                                preview_placeholder = st.empty()
+                                
+                                def show_preview(preview):
+                                    # Vector-order hits while the cross-encoder reorders them
+                                    timings.setdefault("first_result", time.perf_counter() - turn_start)
+                                    preview_placeholder.markdown(
+                                        format_search_results(preview, prompt, requested_limit) + "\n\n_Refining the ranking..._"
+                                    )
+                                
+                                with st.spinner(f"Finding {requested_limit} matching products..."):
+                                    # "what Batman figures do you have?" searches within the matched category
+                                    results, cursor = start_product_search(
+                                        client, prompt, requested_limit,
+                                        filters={"category": category} if category else None,
+                                        on_preview=show_preview
+                                    )
+                                preview_placeholder.empty()
+                            
+                            st.session_state.search_cursor = cursor
+                            response_chunks = iter_search_results(
+                                results, prompt, requested_limit, has_more=cursor_has_more(cursor)
+                            )
+                            result_count = len(results)
                         response_placeholder.success("Search completed")
 
                     except Exception as e:
                         final_response = f"An error occurred while performing the search. Error: {e}"
                         response_placeholder.error("Error in search")
+                        turn_ok = False
                 
-                st.markdown(final_response)
+                if response_chunks is not None:
+                    # Stream the formatted products into the message as they are produced
+                    render_start = time.perf_counter()
+                    final_response = st.write_stream(timed_stream(response_chunks, timings, turn_start))
+                    # The stream interleaves formatting with rendering; charge render only for the rest
+                    record_latency("render", time.perf_counter() - render_start - timings.get("formatting", 0.0))
+                else:
+                    render_start = time.perf_counter()
+                    st.markdown(final_response)
+                    record_latency("render", time.perf_counter() - render_start)
 
-            st.session_state.messages.append({"role": "assistant", "content": final_response})
+            record_latency("total", time.perf_counter() - turn_start)
+            get_analytics_store().record(
+                turn_kind,
+                query=prompt,
+                result_count=result_count,
+                success=turn_ok,
+                latency_ms=timings["total"] * 1000,
+                username=st.session_state.username,
+            )
+            st.caption(format_stage_timings(timings))
+            append_chat_message("assistant", final_response, timings=timings)
+
+    last_cursor = st.session_state.get("search_cursor")
+    if last_cursor and last_cursor["displayed"]:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            similar_to = st.selectbox(
+                "More like this",
+                options=range(1, len(last_cursor["displayed"]) + 1),
+                format_func=lambda n: f"{n}. {last_cursor['displayed'][n - 1].title}",
+                key="more_like_this_choice",
+            )
+        with col2:
+            st.button(
+                "Find similar",
+                key="more_like_this",
+                use_container_width=True,
+                on_click=lambda: st.session_state.update(pending_prompt=f"More like number {similar_to}")
+            )
+    
+    if cursor_has_more(last_cursor):
+        st.button(
+            "Show more results",
+            key="show_more",
+            on_click=lambda: st.session_state.update(pending_prompt="Show me more")
+        )
 
     if len(st.session_state.messages) <= 2:
         st.markdown("---")
@@ -911,143 +1857,14 @@ def main_app():
             st.markdown("- Track 2259180939")
             st.markdown("- Status of 2259180939")
 
-def main():
-    st.markdown("""
-    <style>
-    .main {
-        background-color: #1E1E1E;
-        color: #FFFFFF;
-    }
-    .stApp {
-        background-color: #1E1E1E;
-    }
-    
-    .sidebar .sidebar-content {
-        background-color: #000000;
-        color: #FFD700;
-        border-right: 3px solid #FFD700;
-    }
-    
-    .stButton>button {
-        background-color: #FFD700;
-        color: #000000;
-        border: 2px solid #FFD700;
-        border-radius: 8px;
-        font-weight: bold;
-    }
-    .stButton>button:hover {
-        background-color: #FFC400;
-        color: #000000;
-        border: 2px solid #FFC400;
-    }
-    
-    h1, h2, h3 {
-        color: #FFD700;
-        border-bottom: 2px solid #FFD700;
-        padding-bottom: 10px;
-    }
-    
-    .stChatInput>div>div>input {
-        border: 2px solid #B8860B !important;
-        background-color: #2D2D2D !important;
-        color: #FFFFFF !important;
-        font-weight: bold;
-    }
+@st.cache_resource
+def load_app_css() -> str:
+    with open(APP_CSS_PATH, encoding="utf-8") as f:
+        return f"<style>{f.read()}</style>"
 
-    .stChatInput>div>div>input::placeholder {
-        color: #888888 !important;
-        font-weight: normal;
-    }
-
-    .stChatInput>div>div>input:focus {
-        border: 2px solid #FFD700 !important;
-        background-color: #3D3D3D !important;
-        box-shadow: 0 0 8px rgba(255, 215, 0, 0.2) !important;
-    }
-    
-    .streamlit-expanderHeader {
-        background-color: #000000;
-        color: #FFD700;
-        border: 2px solid #FFD700;
-        font-weight: bold;
-    }
-    
-    .stSuccess {
-        background-color: #1E1E1E;
-        color: #4CAF50;
-        border: 2px solid #B8860B;
-        border-left: 6px solid #B8860B;
-    }
-    
-    .stWarning {
-        background-color: #1E1E1E;
-        color: #FF9800;
-        border: 2px solid #B8860B;
-        border-left: 6px solid #B8860B;
-    }
-    
-    .st-bj {
-        background-color: #FFD700 !important;
-        color: #000000 !important;
-    }
-    
-    .stMetric {
-        color: #FFD700;
-    }
-    
-    .sidebar .stMarkdown strong {
-        color: #FFD700;
-    }
-    
-    .stButton>button:contains("Logout") {
-        background-color: #8B4513;
-        color: #FFFFFF;
-        border: 2px solid #8B4513;
-    }
-
-    .stDataFrame {
-        background-color: #1E1E1E !important;
-        color: #FFFFFF !important;
-        border: 1px solid #B8860B !important;
-    }
-
-    .stDataFrame table {
-        background-color: #1E1E1E !important;
-        color: #FFFFFF !important;
-    }
-
-    .stDataFrame th {
-        background-color: #000000 !important;
-        color: #FFD700 !important;
-        border: 1px solid #B8860B !important;
-    }
-
-    .stDataFrame td {
-        background-color: #2D2D2D !important;
-        color: #FFFFFF !important;
-        border: 1px solid #444444 !important;
-    }
-
-    .stChatMessage {
-        background-color: #2D2D2D;
-        border: 1px solid #444444;
-        border-radius: 10px;
-        margin: 5px 0;
-    }
-    
-    .stChatInput>div>div>input {
-        border: 1.5px solid #8B8000 !important;
-        background-color: #2D2D2D !important;
-        color: #FFFFFF !important;
-    }
-
-    .stChatInput>div>div>input:focus {
-        border: 1.5px solid #FFD700 !important;
-        background-color: #3D3D3D !important;
-        box-shadow: 0 0 5px rgba(255, 215, 0, 0.1) !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+def main():
+    # Read once per process; a style-only st.html goes to the event container (no layout slot)
+    st.html(load_app_css())
     
     if not check_authentication():
         login_form()
@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """
+    Collect single-item requests from many threads and run them as one batch call.
+
+    A lone request with no batch call in flight is dispatched at once, so a single
+    user never waits for the window. Otherwise a batch is dispatched `window_s`
+    after its first request arrives, or as soon as `max_batch` requests are queued.
+    `batch_fn` takes a list of items and returns a list of results in the same
+    order; each caller blocks only on its own result.
+    """
+
+    def __init__(self, batch_fn, window_s: float = 0.01, max_batch: int = 32, name: str = "micro-batcher",
+                 flush_when_idle: bool = True):
+        self.batch_fn = batch_fn
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.name = name
+        self.flush_when_idle = flush_when_idle
+        self._pending = []          # (item, future, enqueued_at)
+        self._cond = threading.Condition()
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.total_wait_s = 0.0
+        self.immediate = 0
+
+    def submit(self, item, timeout: float = None):
+        """Queue one item and wait for its result (exceptions of the batch call are re-raised)."""
+        future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._pending.append((item, future, time.perf_counter()))
+            self._cond.notify()
+        return future.result(timeout)
+
+    def _next_batch(self) -> list:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # The dispatcher is the only caller of batch_fn, so nothing is in flight here
+            if self.flush_when_idle and len(self._pending) == 1:
+                self.immediate += 1
+                batch, self._pending = self._pending, []
+                return batch
+            deadline = self._pending[0][2] + self.window_s
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            dispatched_at = time.perf_counter()
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name}: batch returned {len(results)} results for {len(batch)} items")
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            with self._cond:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self.total_wait_s += sum(dispatched_at - enqueued_at for _, _, enqueued_at in batch)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "avg_queue_wait_ms": self.total_wait_s / self.items * 1000 if self.items else 0.0,
+                "immediate": self.immediate,
+                "window_ms": self.window_s * 1000,
+                "max_batch": self.max_batch,
+            }
@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from typing import Optional
+
+# Only the properties the chat formatters read are requested from Weaviate
+PRODUCT_HIT_PROPERTIES = [
+    'title',
+    'character',
+    'category',
+    'materials',
+    'is_articulated',
+    'is_collectible',
+    'height_cm',
+    'weight_g',
+]
+
+@dataclass(frozen=True, slots=True)
+class ProductHit:
+    """Compact, immutable search result kept in session state instead of Weaviate objects."""
+    uuid: str
+    title: str
+    character: Optional[str] = None
+    category: Optional[str] = None
+    materials: Optional[str] = None
+    is_articulated: Optional[bool] = None
+    is_collectible: Optional[bool] = None
+    height_cm: Optional[str] = None
+    weight_g: Optional[str] = None
+    distance: Optional[float] = None
+
+    @classmethod
+    def from_properties(cls, uuid, props: dict, distance: Optional[float] = None) -> "ProductHit":
+        return cls(
+            uuid=str(uuid),
+            title=props.get('title') or 'Product without title',
+            character=props.get('character'),
+            category=props.get('category'),
+            materials=props.get('materials'),
+            is_articulated=props.get('is_articulated'),
+            is_collectible=props.get('is_collectible'),
+            height_cm=_clean_measure(props.get('height_cm')),
+            weight_g=_clean_measure(props.get('weight_g')),
+            distance=distance,
+        )
+
+    @classmethod
+    def from_weaviate(cls, obj) -> "ProductHit":
+        metadata = getattr(obj, 'metadata', None)
+        distance = getattr(metadata, 'distance', None) if metadata else None
+        return cls.from_properties(obj.uuid, obj.properties, distance)
+
+def _clean_measure(value):
+    """Measures were ingested as strings, so missing values may arrive as 'nan'/'None'."""
+    if value is None or str(value).strip() in ('', 'nan', 'None'):
+        return None
+    return str(value)
+
+def to_product_hits(objects) -> list:
+    return [ProductHit.from_weaviate(obj) for obj in objects or []]
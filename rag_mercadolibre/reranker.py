@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Small multilingual cross-encoder: the catalog titles are in Spanish
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_OVERFETCH = int(os.getenv("RERANK_OVERFETCH", "30"))
+RERANK_TIME_BUDGET_S = float(os.getenv("RERANK_TIME_BUDGET_S", "0.35"))
+RERANK_BATCH_SIZE = 16
+RERANK_MAX_LENGTH = 128
+RERANK_CACHE_SIZE = 4096
+
+# Only these properties are shown to the cross-encoder
+RERANK_FIELDS = ['title', 'category', 'materials']
+
+_model = None
+_model_lock = threading.Lock()
+# One worker: scoring is CPU bound and the model is not shared across threads
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+_score_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+RERANK_STATS = {
+    "queries": 0,
+    "reranked": 0,
+    "budget_fallbacks": 0,
+    "skipped_stale": 0,
+    "error_fallbacks": 0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "total_ms": 0.0,
+    "last_ms": 0.0,
+}
+
+def _record(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            RERANK_STATS[key] += value
+
+def get_rerank_stats() -> dict:
+    """Return a snapshot of the reranker counters with derived averages."""
+    with _stats_lock:
+        stats = dict(RERANK_STATS)
+    lookups = stats["cache_hits"] + stats["cache_misses"]
+    stats["avg_ms"] = stats["total_ms"] / stats["queries"] if stats["queries"] else 0.0
+    stats["cache_hit_rate"] = stats["cache_hits"] / lookups if lookups else 0.0
+    return stats
+
+def get_cross_encoder():
+    """Load the cross-encoder once per process, on CPU."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+                print(f"🔄 Loading reranker model: {RERANK_MODEL}")
+                _model = CrossEncoder(RERANK_MODEL, device="cpu", max_length=RERANK_MAX_LENGTH)
+    return _model
+
+def product_rerank_text(product) -> str:
+    """Build the passage the cross-encoder sees for a product."""
+    parts = [str(getattr(product, field)) for field in RERANK_FIELDS if getattr(product, field)]
+    return " | ".join(parts)
+
+def _score_pairs(query: str, passages: list) -> list:
+    key_query = query.strip().lower()
+    scores = [None] * len(passages)
+    missing = []
+
+    with _cache_lock:
+        for i, passage in enumerate(passages):
+            key = (key_query, passage)
+            if key in _score_cache:
+                _score_cache.move_to_end(key)
+                scores[i] = _score_cache[key]
+            else:
+                missing.append(i)
+    _record(cache_hits=len(passages) - len(missing), cache_misses=len(missing))
+
+    if missing:
+        model = get_cross_encoder()
+        predicted = model.predict(
+            [(query, passages[i]) for i in missing],
+            batch_size=RERANK_BATCH_SIZE,
+            show_progress_bar=False,
+        )
+        with _cache_lock:
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                _score_cache[(key_query, passages[i])] = scores[i]
+            while len(_score_cache) > RERANK_CACHE_SIZE:
+                _score_cache.popitem(last=False)
+
+    return scores
+
+def _score_job(query: str, passages: list, deadline: float) -> list:
+    # Jobs queued behind slower ones may start after their caller gave up: skip them
+    # so the single worker only spends time on queries that can still use the scores
+    if time.perf_counter() > deadline:
+        _record(skipped_stale=1)
+        return None
+    return _score_pairs(query, passages)
+
+def _record_fallback(start: float, **deltas) -> float:
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _record(queries=1, total_ms=elapsed_ms, **deltas)
+    with _stats_lock:
+        RERANK_STATS["last_ms"] = elapsed_ms
+    return elapsed_ms
+
+def rerank_products(query: str, products: list, limit: int, time_budget_s: float = RERANK_TIME_BUDGET_S) -> list:
+    """
+    Reorder vector-search candidates with the cross-encoder.
+
+    Falls back to the original vector order when the time budget is
+    exceeded (including a cold model load) or scoring fails.
+    """
+    if not products:
+        return []
+
+    start = time.perf_counter()
+    passages = [product_rerank_text(product) for product in products]
+    future = _executor.submit(_score_job, query, passages, start + time_budget_s)
+
+    try:
+        scores = future.result(timeout=time_budget_s)
+    except FutureTimeoutError:
+        # Drop the job if it hasn't started; a running one finishes and still warms the cache
+        future.cancel()
+        elapsed_ms = _record_fallback(start, budget_fallbacks=1)
+        print(f"⏱️ Rerank budget exceeded ({elapsed_ms:.0f}ms) - using vector order")
+        return products[:limit]
+    except Exception as e:
+        _record_fallback(start, error_fallbacks=1)
+        print(f"⚠️ Rerank failed, using vector order: {e}")
+        return products[:limit]
+    if scores is None:
+        _record_fallback(start, budget_fallbacks=1)
+        return products[:limit]
+
+    ranked = [product for _, product in sorted(
+        zip(scores, products), key=lambda pair: pair[0], reverse=True
+    )]
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _record(queries=1, reranked=1, total_ms=elapsed_ms)
+    with _stats_lock:
+        RERANK_STATS["last_ms"] = elapsed_ms
+    return ranked[:limit]
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from importlib.util import find_spec
+
+import numpy as np
+
+# psutil is imported by the sampler itself, keeping it out of the app's import path
+PSUTIL_AVAILABLE = find_spec("psutil") is not None
+
+RESOURCE_SAMPLE_INTERVAL_S = float(os.getenv("RESOURCE_SAMPLE_INTERVAL_S", "5"))
+# 360 samples at 5s = the last 30 minutes
+RESOURCE_RING_SIZE = int(os.getenv("RESOURCE_RING_SIZE", "360"))
+
+METRICS = [
+    "process_cpu_percent",
+    "host_cpu_percent",
+    "rss_mb",
+    "host_memory_percent",
+    "disk_percent",
+    "open_fds",
+    "sockets",
+    "chrome_processes",
+    "chromedriver_processes",
+]
+METRIC_LABELS = {
+    "process_cpu_percent": "App CPU %",
+    "host_cpu_percent": "Host CPU %",
+    "rss_mb": "RSS (MB)",
+    "host_memory_percent": "Host memory %",
+    "disk_percent": "Disk %",
+    "open_fds": "Open FDs",
+    "sockets": "Sockets",
+    "chrome_processes": "Chrome processes",
+    "chromedriver_processes": "Chromedrivers",
+}
+
+class ResourceSampler:
+    """
+    Background psutil sampler writing into a fixed-size ring buffer (one float
+    column per metric), so memory use is constant however long the app runs.
+    Chrome/chromedriver children of this process are counted to spot leaked
+    tracking browsers.
+    """
+
+    def __init__(self, interval_s: float = RESOURCE_SAMPLE_INTERVAL_S, size: int = RESOURCE_RING_SIZE):
+        if not PSUTIL_AVAILABLE:
+            raise RuntimeError("psutil is not installed")
+        import psutil
+
+        self.interval_s = interval_s
+        self.size = size
+        self._process = psutil.Process()
+        self._timestamps = np.zeros(size, dtype=np.float64)
+        self._values = np.full((size, len(METRICS)), np.nan, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        # First cpu_percent() call only sets the baseline
+        self._process.cpu_percent(None)
+        psutil.cpu_percent(None)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️ Resource sample failed: {e}")
+            self._stopped.wait(self.interval_s)
+
+    def read(self) -> dict:
+        """Take one reading without storing it."""
+        import psutil
+
+        process = self._process
+        with process.oneshot():
+            reading = {
+                "process_cpu_percent": process.cpu_percent(None),
+                "rss_mb": process.memory_info().rss / (1024 * 1024),
+                "open_fds": process.num_fds() if hasattr(process, "num_fds") else process.num_handles(),
+            }
+        try:
+            reading["sockets"] = len(process.net_connections(kind="inet"))
+        except (psutil.AccessDenied, AttributeError):
+            reading["sockets"] = np.nan
+
+        chrome = chromedriver = 0
+        for child in process.children(recursive=True):
+            try:
+                name = child.name().lower()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            if "chromedriver" in name:
+                chromedriver += 1
+            elif "chrome" in name or "chromium" in name:
+                chrome += 1
+        reading["chrome_processes"] = chrome
+        reading["chromedriver_processes"] = chromedriver
+
+        reading["host_cpu_percent"] = psutil.cpu_percent(None)
+        reading["host_memory_percent"] = psutil.virtual_memory().percent
+        reading["disk_percent"] = psutil.disk_usage(os.path.abspath(os.sep)).percent
+        return reading
+
+    def sample(self) -> dict:
+        reading = self.read()
+        with self._lock:
+            self._timestamps[self._next] = time.time()
+            self._values[self._next] = [reading[metric] for metric in METRICS]
+            self._next = (self._next + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+        return reading
+
+    def series(self, metric: str) -> np.ndarray:
+        """Stored values of one metric, oldest first."""
+        column = METRICS.index(metric)
+        with self._lock:
+            order = (np.arange(self._count) + self._next - self._count) % self.size
+            return self._values[order, column].copy()
+
+    def latest(self) -> dict:
+        with self._lock:
+            if not self._count:
+                return {}
+            row = self._values[(self._next - 1) % self.size]
+            return dict(zip(METRICS, row.tolist()))
@@ -0,0 +1,79 @@
+import os
+
+from product_hits import ProductHit
+
+# e.g. http://search_service:8000 - when unset the UI runs searches in-process
+SEARCH_SERVICE_URL = os.getenv("SEARCH_SERVICE_URL", "").rstrip("/")
+SEARCH_SERVICE_TIMEOUT_S = float(os.getenv("SEARCH_SERVICE_TIMEOUT_S", "30"))
+# Servientrega lookups drive a browser and can take close to a minute
+TRACKING_SERVICE_TIMEOUT_S = 120
+
+class SearchServiceError(Exception):
+    pass
+
+class SearchServiceClient:
+    """Thin HTTP client for search_service.py, reusing one keep-alive session."""
+
+    def __init__(self, base_url: str = SEARCH_SERVICE_URL, timeout_s: float = SEARCH_SERVICE_TIMEOUT_S):
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        # Imported here so requests stays out of the app's import path
+        import requests
+        self.session = requests.Session()
+
+    def _request(self, method: str, path: str, timeout_s: float = None, **kwargs) -> dict:
+        import requests
+
+        try:
+            response = self.session.request(
+                method, f"{self.base_url}{path}", timeout=timeout_s or self.timeout_s, **kwargs
+            )
+        except requests.RequestException as e:
+            raise SearchServiceError(f"Search service unreachable: {e}")
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if response.status_code >= 400:
+            raise SearchServiceError(payload.get("error") or f"HTTP {response.status_code}")
+        return payload
+
+    def health(self) -> dict:
+        return self._request("GET", "/health")
+
+    def search(self, query: str, limit: int = 8, offset: int = 0, filters: dict = None,
+               rerank: bool = False, vector=None, return_vector: bool = False):
+        """Return a list of ProductHit, or (hits, query_vector) when return_vector is set."""
+        body = {"query": query, "limit": limit, "offset": offset, "rerank": rerank}
+        if filters:
+            body["filters"] = filters
+        if vector is not None:
+            body["vector"] = list(vector)
+        if return_vector:
+            body["return_vector"] = True
+
+        payload = self._request("POST", "/search", json=body)
+        hits = [ProductHit(**hit) for hit in payload["hits"]]
+        return (hits, payload.get("vector")) if return_vector else hits
+
+    def search_batch(self, queries: list, limit: int = 8, filters: dict = None) -> dict:
+        body = {"queries": list(queries), "limit": limit}
+        if filters:
+            body["filters"] = filters
+        payload = self._request("POST", "/search/batch", json=body)
+        for result in payload["results"]:
+            result["hits"] = [ProductHit(**hit) for hit in result["hits"]]
+        return payload
+
+    def track(self, tracking_number: str) -> dict:
+        return self._request("POST", "/track", timeout_s=TRACKING_SERVICE_TIMEOUT_S,
+                             json={"tracking_number": tracking_number})
+
+    def start_ingest_job(self) -> dict:
+        return self._request("POST", "/ingest/jobs")
+
+    def ingest_job(self, job_id: str) -> dict:
+        return self._request("GET", f"/ingest/jobs/{job_id}")
+
+    def cancel_ingest_job(self, job_id: str) -> dict:
+        return self._request("POST", f"/ingest/jobs/{job_id}/cancel")
@@ -0,0 +1,268 @@
+"""
+Headless ASGI service for search, tracking and ingestion, independent of Streamlit.
+
+Run with several workers and load test it with any HTTP tool, e.g.:
+
+    uvicorn search_service:app --host 0.0.0.0 --port 8000 --workers 4
+    hey -n 2000 -c 50 -m POST -T application/json -d '{"query": "batman figure"}' http://localhost:8000/search
+"""
+import asyncio
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+
+import weaviate
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from batch_search import WEAVIATE_CLASS_NAME, build_filters
+from browser_pool import browser_pool_stats, get_browser_pool
+from embedding_utils import get_embedding_async, get_embeddings_batch_async
+from ingest_jobs import JobStore, start_ingest_job
+from product_hits import PRODUCT_HIT_PROPERTIES, to_product_hits
+from reranker import RERANK_ENABLED, RERANK_OVERFETCH, rerank_products
+from servientrega_checker import check_servientrega_status, tracking_provider_stats
+from tracking_providers import TRACKING_PROVIDERS
+
+SERVICE_WEAVIATE_HOST = os.getenv("WEAVIATE_HOST_DOCKER", "localhost")
+SERVICE_WEAVIATE_PORT = int(os.getenv("WEAVIATE_PORT_DOCKER", "8090"))
+SERVICE_WEAVIATE_GRPC_PORT = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))
+
+SEARCH_MAX_LIMIT = 50
+BATCH_MAX_QUERIES = 100
+BATCH_QUERY_CONCURRENCY = 16
+# A lookup may fall back to a headless Chrome, so only a few may run per worker
+TRACKING_CONCURRENCY = int(os.getenv("TRACKING_CONCURRENCY", "2"))
+TRACKING_NUMBER_PATTERN = re.compile(r"^\d{10}$")
+
+class RequestError(Exception):
+    pass
+
+def error_response(message: str, status_code: int = 400) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status_code)
+
+async def read_json(request) -> dict:
+    try:
+        body = await request.json()
+    except Exception:
+        raise RequestError("Body must be JSON")
+    if not isinstance(body, dict):
+        raise RequestError("Body must be a JSON object")
+    return body
+
+def parse_limit(body: dict) -> int:
+    try:
+        limit = int(body.get("limit", 8))
+    except (TypeError, ValueError):
+        raise RequestError("limit must be an integer")
+    return max(1, min(limit, SEARCH_MAX_LIMIT))
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.weaviate = weaviate.use_async_with_local(
+        host=SERVICE_WEAVIATE_HOST,
+        port=SERVICE_WEAVIATE_PORT,
+        grpc_port=SERVICE_WEAVIATE_GRPC_PORT,
+    )
+    try:
+        await app.state.weaviate.connect()
+        print(f"✅ Search service connected to Weaviate at {SERVICE_WEAVIATE_HOST}:{SERVICE_WEAVIATE_PORT}")
+    except Exception as e:
+        print(f"⚠️ Weaviate not reachable at startup: {e}")
+    app.state.tracking_slots = asyncio.Semaphore(TRACKING_CONCURRENCY)
+    # Start the fallback tracking browsers now so the first /track that needs one doesn't pay for Chrome startup
+    browser_pool = get_browser_pool() if "selenium" in TRACKING_PROVIDERS else None
+    app.state.job_store = JobStore()
+    try:
+        yield
+    finally:
+        await app.state.weaviate.close()
+        if browser_pool is not None:
+            await asyncio.to_thread(browser_pool.close)
+
+async def query_vector(app, vector, limit: int, offset: int = 0, filters=None) -> list:
+    collection = app.state.weaviate.collections.get(WEAVIATE_CLASS_NAME)
+    response = await collection.query.near_vector(
+        near_vector=vector,
+        limit=limit,
+        offset=offset,
+        filters=filters,
+        return_properties=PRODUCT_HIT_PROPERTIES,
+        return_metadata=["distance"]
+    )
+    return to_product_hits(response.objects)
+
+async def health(request):
+    try:
+        ready = await request.app.state.weaviate.is_ready()
+    except Exception:
+        ready = False
+    return JSONResponse({"status": "ok" if ready else "degraded", "weaviate": ready,
+                         "tracking_providers": tracking_provider_stats(),
+                         "tracking_browsers": browser_pool_stats()},
+                        status_code=200 if ready else 503)
+
+async def search(request):
+    """
+    POST {"query", "limit"?, "offset"?, "filters"? {"prop": value}, "rerank"?,
+    "vector"? (skip embedding), "return_vector"?} -> {"hits", "took_ms", "vector"?}
+    """
+    start = time.perf_counter()
+    try:
+        body = await read_json(request)
+        query = str(body.get("query") or "").strip()
+        vector = body.get("vector")
+        if not query and not vector:
+            raise RequestError("query is required")
+        limit = parse_limit(body)
+        offset = max(0, int(body.get("offset", 0)))
+        rerank = bool(body.get("rerank", RERANK_ENABLED)) and bool(query)
+        filters = build_filters(body.get("filters"))
+    except (RequestError, TypeError, ValueError) as e:
+        return error_response(str(e))
+
+    if not vector:
+        vector = await get_embedding_async(query)
+        if not vector:
+            return error_response("Could not generate embedding for the query", 502)
+
+    fetch_limit = max(limit, RERANK_OVERFETCH) if rerank else limit
+    try:
+        hits = await query_vector(request.app, vector, fetch_limit, offset, filters)
+    except Exception as e:
+        return error_response(f"Weaviate query failed: {e}", 503)
+
+    if rerank and hits:
+        # The cross-encoder is CPU bound; keep it off the event loop
+        hits = await asyncio.to_thread(rerank_products, query, hits, limit)
+
+    payload = {
+        "query": query,
+        "hits": [asdict(hit) for hit in hits[:limit]],
+        "took_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    if body.get("return_vector"):
+        payload["vector"] = list(vector)
+    return JSONResponse(payload)
+
+async def search_batch(request):
+    """POST {"queries": [...], "limit"?, "filters"?} -> same shape as batch_search.search_products_batch."""
+    start = time.perf_counter()
+    try:
+        body = await read_json(request)
+        queries = body.get("queries")
+        if not isinstance(queries, list) or not queries:
+            raise RequestError("queries must be a non-empty list")
+        if len(queries) > BATCH_MAX_QUERIES:
+            raise RequestError(f"At most {BATCH_MAX_QUERIES} queries per batch")
+        queries = [str(query) for query in queries]
+        limit = parse_limit(body)
+        filters = build_filters(body.get("filters"))
+    except (RequestError, TypeError, ValueError) as e:
+        return error_response(str(e))
+
+    vectors = await get_embeddings_batch_async(queries)
+    embed_s = time.perf_counter() - start
+
+    slots = asyncio.Semaphore(BATCH_QUERY_CONCURRENCY)
+
+    async def run_query(query, vector):
+        if not vector:
+            return {"query": query, "hits": [], "error": "no embedding"}
+        async with slots:
+            try:
+                hits = await query_vector(request.app, vector, limit, filters=filters)
+                return {"query": query, "hits": [asdict(hit) for hit in hits], "error": None}
+            except Exception as e:
+                return {"query": query, "hits": [], "error": str(e)}
+
+    query_start = time.perf_counter()
+    results = await asyncio.gather(*(run_query(q, v) for q, v in zip(queries, vectors)))
+    query_s = time.perf_counter() - query_start
+
+    total_s = time.perf_counter() - start
+    stats = {
+        "queries": len(queries),
+        "errors": sum(1 for r in results if r["error"]),
+        "zero_results": sum(1 for r in results if not r["error"] and not r["hits"]),
+        "embed_s": round(embed_s, 3),
+        "query_s": round(query_s, 3),
+        "total_s": round(total_s, 3),
+        "qps": round(len(queries) / total_s, 2) if total_s > 0 else 0.0,
+    }
+    return JSONResponse({"results": results, "stats": stats})
+
+async def track(request):
+    """POST {"tracking_number": "0123456789"} -> {"tracking_number", "status", "ok", "took_ms"}"""
+    start = time.perf_counter()
+    try:
+        body = await read_json(request)
+    except RequestError as e:
+        return error_response(str(e))
+    tracking_number = str(body.get("tracking_number", "")).strip()
+    if not TRACKING_NUMBER_PATTERN.match(tracking_number):
+        return error_response("tracking_number must be 10 digits")
+
+    async with request.app.state.tracking_slots:
+        status = await asyncio.to_thread(check_servientrega_status, tracking_number)
+
+    return JSONResponse({
+        "tracking_number": tracking_number,
+        "status": status,
+        "ok": not str(status).startswith("ERROR"),
+        "took_ms": round((time.perf_counter() - start) * 1000, 1),
+    })
+
+async def ingest_jobs(request):
+    """POST {"kind"?: "excel"} starts a background ingest job (ingest_jobs.py); GET lists recent jobs."""
+    store = request.app.state.job_store
+    if request.method == "GET":
+        await asyncio.to_thread(store.reap_dead_workers)
+        return JSONResponse({"jobs": await asyncio.to_thread(store.list, 20)})
+
+    try:
+        body = await request.json() if await request.body() else {}
+    except Exception:
+        return error_response("Body must be JSON")
+    kind = body.get("kind", "excel")
+    if kind != "excel":
+        return error_response("Only 'excel' jobs can be started over HTTP")
+
+    try:
+        job_id = await asyncio.to_thread(start_ingest_job, kind, None, body.get("label"), store)
+    except RuntimeError as e:
+        return error_response(str(e), 409)
+    return JSONResponse(store.get(job_id), status_code=202)
+
+async def ingest_job(request):
+    job = await asyncio.to_thread(request.app.state.job_store.get, request.path_params["job_id"])
+    if job is None:
+        return error_response("Unknown job", 404)
+    return JSONResponse(job)
+
+async def cancel_ingest_job(request):
+    job_id = request.path_params["job_id"]
+    if not await asyncio.to_thread(request.app.state.job_store.request_cancel, job_id):
+        return error_response("Job is not active", 409)
+    return JSONResponse({"id": job_id, "cancel_requested": True}, status_code=202)
+
+app = Starlette(
+    routes=[
+        Route("/health", health),
+        Route("/search", search, methods=["POST"]),
+        Route("/search/batch", search_batch, methods=["POST"]),
+        Route("/track", track, methods=["POST"]),
+        Route("/ingest/jobs", ingest_jobs, methods=["GET", "POST"]),
+        Route("/ingest/jobs/{job_id}", ingest_job),
+        Route("/ingest/jobs/{job_id}/cancel", cancel_ingest_job, methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("SEARCH_SERVICE_PORT", "8000")))
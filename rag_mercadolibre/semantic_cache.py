@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+SEMANTIC_CACHE_CAPACITY = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "512"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL_S = float(os.getenv("SEMANTIC_CACHE_TTL_S", "3600"))
+
+class SemanticQueryCache:
+    """
+    Reuse search results for paraphrased queries.
+
+    Query vectors are kept L2-normalized in a fixed-size float32 matrix, so a
+    lookup is one matrix-vector product (brute force is exact and fast at this
+    size). Entries only match when their search options (limit, filters, rerank)
+    are identical; the least recently used entry is evicted when full.
+    """
+
+    def __init__(self, capacity: int = SEMANTIC_CACHE_CAPACITY,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl_s: float = SEMANTIC_CACHE_TTL_S):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._entries = [None] * capacity
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def lookup(self, vector, options_key):
+        """Return (value, similarity) for the closest cached query above the threshold, else None."""
+        query = self._normalize(vector)
+        now = time.time()
+
+        with self._lock:
+            if self._size == 0 or self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors[:self._size] @ query
+            for slot in np.argsort(-similarities):
+                similarity = float(similarities[slot])
+                if similarity < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if entry is None or entry["options_key"] != options_key:
+                    continue
+                if now - entry["created_at"] > self.ttl_s:
+                    self._drop(slot)
+                    self.expirations += 1
+                    continue
+                self._last_used[slot] = now
+                self.hits += 1
+                return entry["value"], similarity
+
+            self.misses += 1
+            return None
+
+    def store(self, vector, options_key, value):
+        query = self._normalize(vector)
+        now = time.time()
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self._vectors = np.zeros((self.capacity, query.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.capacity
+                self._size = 0
+
+            if self._size < self.capacity:
+                slot = self._size
+                self._size += 1
+            else:
+                # Free slots left by expirations are zeroed and have last_used == 0
+                slot = int(np.argmin(self._last_used[:self._size]))
+                if self._entries[slot] is not None:
+                    self.evictions += 1
+
+            self._vectors[slot] = query
+            self._entries[slot] = {"options_key": options_key, "value": value, "created_at": now}
+            self._last_used[slot] = now
+
+    def _drop(self, slot):
+        self._entries[slot] = None
+        self._vectors[slot] = 0.0
+        self._last_used[slot] = 0.0
+
+    def clear(self):
+        with self._lock:
+            self._vectors = None
+            self._entries = [None] * self.capacity
+            self._last_used[:] = 0.0
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": sum(1 for entry in self._entries[:self._size] if entry is not None),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
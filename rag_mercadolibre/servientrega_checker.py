@@ -1,55 +1,88 @@
-import time 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, NoSuchWindowException
 
+from browser_pool import BrowserPoolTimeout, get_browser_pool
+from single_flight import get_single_flight
+from tracking_providers import (
+    SERVIENTREGA_TRACKING_URL,
+    STATUS_LABEL_ID,
+    TRACKING_PROVIDERS,
+    HttpTrackingProvider,
+    TrackingProviderChain,
+)
+
+_tracking_flight = get_single_flight("servientrega")
+
+STATUS_H1_XPATH = "//div[@class='tittle_cotizador']/div[1]/h1"
+
+class SeleniumTrackingProvider:
+    """Fallback: render the results page in a pooled browser. Always answers (errors as "ERROR: ..." text)."""
+    name = "selenium"
+
+    def lookup(self, tracking_number) -> str:
+        return _check_status_in_browser(tracking_number)
+
+TRACKING_PROVIDER_CLASSES = {
+    "http": HttpTrackingProvider,
+    "selenium": SeleniumTrackingProvider,
+}
+
+def _build_provider_chain() -> TrackingProviderChain:
+    unknown = [name for name in TRACKING_PROVIDERS if name not in TRACKING_PROVIDER_CLASSES]
+    if unknown or not TRACKING_PROVIDERS:
+        raise ValueError(f"TRACKING_PROVIDERS must list {sorted(TRACKING_PROVIDER_CLASSES)}, got {TRACKING_PROVIDERS}")
+    return TrackingProviderChain([TRACKING_PROVIDER_CLASSES[name]() for name in TRACKING_PROVIDERS])
+
+_provider_chain = _build_provider_chain()
+
 def check_servientrega_status(tracking_number):
     """
-    Automates the browser to check the Servientrega tracking status 
-    by navigating directly to the results URL.
+    Check the Servientrega tracking status through the TRACKING_PROVIDERS chain:
+    plain HTTP first when SERVIENTREGA_API_URL is set, the browser when that
+    can't read it (or as the only provider). Concurrent lookups of the same
+    number share one lookup.
     """
+    return _tracking_flight.do(str(tracking_number), _provider_chain.lookup, tracking_number)
+
+def tracking_provider_stats() -> dict:
+    return _provider_chain.stats()
+
+def read_tracking_status(driver, url, timeout=45):
+    """Load the results page in a (pooled) driver and return the status text."""
+    # 1. DIRECT NAVIGATION: Go straight to the results page
+    driver.get(url)
     
-    url = f"https://mobile.servientrega.com/WebSitePortal/RastreoEnvioDetalle.html?Guia={tracking_number}"
+    # 2. Wait for the status text to appear (45s max timeout)
+    status_element = WebDriverWait(driver, timeout).until( 
+        EC.visibility_of_element_located((By.ID, STATUS_LABEL_ID))
+    )
     
-    # Configuration for running the Chrome browser
-    options = ChromeOptions() 
+    # 3. Extract the status text
+    status_text = status_element.text.strip()
     
-    options.add_argument('--headless')      
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument("--window-size=1920,1080")
+    if not status_text:
+         # Fallback to checking the parent H1 element
+         status_text = driver.find_element(By.XPATH, STATUS_H1_XPATH).text.strip()
     
-    # Initialize the WebDriver
-    driver = webdriver.Chrome(options=options) 
+    return status_text
+
+def _check_status_in_browser(tracking_number):
+    """
+    Checks the Servientrega tracking status in a warm browser leased from the
+    pool, navigating directly to the results URL.
+    """
+    url = SERVIENTREGA_TRACKING_URL.format(tracking_number=tracking_number)
 
     try:
         print(f"Checking tracking number: {tracking_number}...")
-        
-        # 1. DIRECT NAVIGATION: Go straight to the results page
-        driver.get(url)
-        
-        # --- Locators confirmed from HTML inspection ---
-        STATUS_LABEL_ID = "lblEstadoActual" 
-        
-        # 2. Wait for the status text to appear (45s max timeout)
-        status_element = WebDriverWait(driver, 45).until( 
-            EC.visibility_of_element_located((By.ID, STATUS_LABEL_ID))
-        )
-        
-        # 3. Extract the status text
-        status_text = status_element.text.strip()
-        
-        if not status_text:
-             # Fallback to checking the parent H1 element
-             h1_xpath = "//div[@class='tittle_cotizador']/div[1]/h1"
-             h1_element = driver.find_element(By.XPATH, h1_xpath)
-             status_text = h1_element.text.strip()
-        
-        return status_text
+        # A lookup that breaks the driver (WebDriver/session error) hands it back for recycling, not reuse
+        with get_browser_pool().lease() as driver:
+            return read_tracking_status(driver, url)
 
+    except BrowserPoolTimeout:
+        return "ERROR: All tracking browsers are busy. Please try again in a moment."
     except TimeoutException:
         return "ERROR: Status check timed out. Tracking information took too long to load or site structure changed."
     except NoSuchElementException:
@@ -58,8 +91,6 @@ def check_servientrega_status(tracking_number):
         return "ERROR: Browser window closed unexpectedly. Check if Chrome is installed correctly."
     except Exception as e:
         return f"ERROR: An unknown error occurred - {e}"
-    finally:
-        driver.quit()
 
 # --- TESTING BLOCK ---
 
@@ -0,0 +1,181 @@
+"""
+Tracking providers for Servientrega lookups, tried in order until one answers.
+
+  http      plain HTTP, no browser: the JSON endpoint behind the results page
+            when SERVIENTREGA_API_URL is set, otherwise the results page HTML
+            parsed for the lblEstadoActual label (milliseconds)
+  selenium  the results page rendered in a pooled headless Chrome (seconds),
+            see servientrega_checker
+
+A provider raises TrackingProviderError when it cannot read the status (no
+endpoint reply, or a page that fills the label client-side), which hands the
+lookup to the next provider. The live results page fills the label client-side,
+so http is only in the default chain when SERVIENTREGA_API_URL is set.
+"""
+import os
+import threading
+import time
+from html.parser import HTMLParser
+
+import requests
+
+SERVIENTREGA_TRACKING_URL = os.getenv(
+    "SERVIENTREGA_TRACKING_URL",
+    "https://mobile.servientrega.com/WebSitePortal/RastreoEnvioDetalle.html?Guia={tracking_number}",
+)
+# The backend call the results page makes, with {tracking_number}; undocumented, so there is no default
+SERVIENTREGA_API_URL = os.getenv("SERVIENTREGA_API_URL", "")
+SERVIENTREGA_API_STATUS_FIELDS = [
+    field.strip() for field in os.getenv("SERVIENTREGA_API_STATUS_FIELDS", "EstadoActual,estadoActual,Estado,estado").split(",")
+    if field.strip()
+]
+TRACKING_HTTP_TIMEOUT_S = float(os.getenv("TRACKING_HTTP_TIMEOUT_S", "10"))
+TRACKING_PROVIDERS = [
+    name.strip() for name in os.getenv("TRACKING_PROVIDERS", "http,selenium" if SERVIENTREGA_API_URL else "selenium").split(",")
+    if name.strip()
+]
+
+# --- Locators confirmed from HTML inspection ---
+STATUS_LABEL_ID = "lblEstadoActual"
+# Elements without an end tag; they must not count towards the label's nesting depth
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+})
+
+class TrackingProviderError(Exception):
+    pass
+
+class _StatusLabelParser(HTMLParser):
+    """Collects the text inside the element with id=STATUS_LABEL_ID."""
+
+    def __init__(self):
+        super().__init__()
+        self.found = False
+        self.parts = []
+        self._depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            if self._depth and tag == "br":
+                self.parts.append(" ")
+            return
+        if self._depth:
+            self._depth += 1
+        elif dict(attrs).get("id") == STATUS_LABEL_ID:
+            self.found = True
+            self._depth = 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/>, <img ... />: no content and no end tag to balance
+        if self._depth:
+            if tag == "br":
+                self.parts.append(" ")
+        elif dict(attrs).get("id") == STATUS_LABEL_ID:
+            self.found = True
+
+    def handle_endtag(self, tag):
+        if self._depth and tag not in VOID_ELEMENTS:
+            self._depth -= 1
+
+    def handle_data(self, data):
+        if self._depth:
+            self.parts.append(data)
+
+def parse_status_html(html: str) -> str:
+    """Status label text of a results page, "" if the label is empty; raises if there is no label."""
+    parser = _StatusLabelParser()
+    parser.feed(html)
+    parser.close()
+    if not parser.found:
+        raise TrackingProviderError(f"No {STATUS_LABEL_ID} element in the page")
+    return " ".join("".join(parser.parts).split())
+
+def find_status_field(data, fields=SERVIENTREGA_API_STATUS_FIELDS):
+    """First non-empty string under one of fields, searching nested dicts/lists breadth-first."""
+    queue = [data]
+    while queue:
+        node = queue.pop(0)
+        if isinstance(node, dict):
+            for field in fields:
+                value = node.get(field)
+                if isinstance(value, str) and value.strip():
+                    return value.strip()
+            queue.extend(node.values())
+        elif isinstance(node, list):
+            queue.extend(node)
+    return None
+
+class HttpTrackingProvider:
+    name = "http"
+
+    def __init__(self, page_url: str = SERVIENTREGA_TRACKING_URL, api_url: str = SERVIENTREGA_API_URL,
+                 timeout_s: float = TRACKING_HTTP_TIMEOUT_S):
+        self.page_url = page_url
+        self.api_url = api_url
+        self.timeout_s = timeout_s
+        # Keep-alive across lookups: the handshake is most of a millisecond-scale lookup
+        self._session = requests.Session()
+
+    def _get(self, url: str):
+        try:
+            response = self._session.get(url, timeout=self.timeout_s)
+        except requests.RequestException as e:
+            raise TrackingProviderError(f"HTTP request failed: {e}")
+        if response.status_code >= 400:
+            raise TrackingProviderError(f"HTTP {response.status_code} from {url}")
+        return response
+
+    def lookup(self, tracking_number) -> str:
+        if self.api_url:
+            response = self._get(self.api_url.format(tracking_number=tracking_number))
+            try:
+                data = response.json()
+            except ValueError:
+                raise TrackingProviderError("Tracking API did not return JSON")
+            status = find_status_field(data)
+            if not status:
+                raise TrackingProviderError("No status field in the tracking API reply")
+            return status
+
+        status = parse_status_html(self._get(self.page_url.format(tracking_number=tracking_number)).text)
+        if not status:
+            raise TrackingProviderError("Status is rendered client-side")
+        return status
+
+class TrackingProviderChain:
+    """Asks each provider in turn; the first that doesn't raise TrackingProviderError answers."""
+
+    def __init__(self, providers: list):
+        self.providers = providers
+        self._lock = threading.Lock()
+        self._stats = {provider.name: {"answered": 0, "failed": 0, "total_s": 0.0} for provider in providers}
+
+    def lookup(self, tracking_number) -> str:
+        last_error = None
+        for provider in self.providers:
+            start = time.perf_counter()
+            try:
+                status = provider.lookup(tracking_number)
+            except TrackingProviderError as e:
+                last_error = e
+                with self._lock:
+                    self._stats[provider.name]["failed"] += 1
+                print(f"⚠️ Tracking provider {provider.name} failed for {tracking_number}: {e}")
+                continue
+            with self._lock:
+                stats = self._stats[provider.name]
+                stats["answered"] += 1
+                stats["total_s"] += time.perf_counter() - start
+            return status
+        return f"ERROR: No tracking provider could read the status - {last_error}"
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "answered": stats["answered"],
+                    "failed": stats["failed"],
+                    "avg_ms": stats["total_s"] / stats["answered"] * 1000 if stats["answered"] else 0.0,
+                }
+                for name, stats in self._stats.items()
+            }
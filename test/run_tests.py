@@ -38,6 +38,10 @@ def run_tests():
         test_authentication = import_from_path("test_authentication", "test_authentication.py")
         test_main_app = import_from_path("test_main_app", "test_main_app.py")
         test_admin_features = import_from_path("test_admin_features", "test_admin_features.py")
+        test_tracking_providers = import_from_path("test_tracking_providers", "test_tracking_providers.py")
+        test_semantic_cache = import_from_path("test_semantic_cache", "test_semantic_cache.py")
+        test_facets = import_from_path("test_facets", "test_facets.py")
+        test_local_index = import_from_path("test_local_index", "test_local_index.py")
         
         print("✅ All test modules imported successfully")
     except Exception as e:
@@ -52,6 +56,10 @@ def run_tests():
     suite.addTests(loader.loadTestsFromModule(test_authentication))
     suite.addTests(loader.loadTestsFromModule(test_main_app))
     suite.addTests(loader.loadTestsFromModule(test_admin_features))
+    suite.addTests(loader.loadTestsFromModule(test_tracking_providers))
+    suite.addTests(loader.loadTestsFromModule(test_semantic_cache))
+    suite.addTests(loader.loadTestsFromModule(test_facets))
+    suite.addTests(loader.loadTestsFromModule(test_local_index))
     
     print(f"📊 Loaded {suite.countTestCases()} test cases")
     
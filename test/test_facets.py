@@ -0,0 +1,48 @@
+# tests/test_facets.py
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "rag_mercadolibre"))
+
+from facets import CATEGORY_SYNONYMS, extra_terms, is_browse_request, is_category_list_request, match_category
+
+CATEGORIES = list(CATEGORY_SYNONYMS)
+
+class TestBrowseRouting(unittest.TestCase):
+    def assertSearchInCategory(self, prompt, category, terms):
+        self.assertTrue(is_browse_request(prompt))
+        self.assertEqual(match_category(prompt, CATEGORIES), category)
+        self.assertEqual(extra_terms(prompt, category), terms)
+
+    def test_character_figures_search_within_the_category(self):
+        self.assertSearchInCategory("what Batman figures do you have?", "Figuras de accion", ["batman"])
+        self.assertSearchInCategory("show me all Goku figures", "Figuras de accion", ["goku"])
+
+    def test_brand_and_material_search_within_the_category(self):
+        self.assertSearchInCategory("que relojes casio tienen", "Relojes de pulso", ["casio"])
+        self.assertSearchInCategory("list cotton boxers", "Calzoncillos", ["cotton"])
+        self.assertSearchInCategory("which Marvel watches are available", "Relojes de pulso", ["marvel"])
+
+    def test_prompt_without_category_is_not_a_listing(self):
+        prompt = "Show me all products for Naruto"
+        self.assertTrue(is_browse_request(prompt))
+        self.assertIsNone(match_category(prompt, CATEGORIES))
+        self.assertFalse(is_category_list_request(prompt))
+
+    def test_plain_category_prompt_is_a_listing(self):
+        self.assertSearchInCategory("what backpacks do you have?", "Morrales", [])
+        self.assertSearchInCategory("que morrales tienen", "Morrales", [])
+        self.assertSearchInCategory("show me all watches", "Relojes de pulso", [])
+
+    def test_es_plurals_are_singularized(self):
+        self.assertEqual(match_category("watches", CATEGORIES), "Relojes de pulso")
+        self.assertEqual(match_category("relojes", CATEGORIES), "Relojes de pulso")
+        self.assertEqual(match_category("pantalones", CATEGORIES), "Pantalones deportivos")
+
+    def test_category_list_request(self):
+        self.assertTrue(is_category_list_request("what categories do you have?"))
+        self.assertFalse(is_browse_request("batman figure with lights"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# tests/test_local_index.py
+import shutil
+import sys
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "rag_mercadolibre"))
+
+from local_index import LocalVectorIndex, snapshot_collection
+
+# (title, category, vector): the watches sit closest to the query, the figures in the filtered category
+PRODUCTS = [
+    ("Batman watch", "Relojes de pulso", [1.0, 0.0, 0.0]),
+    ("Goku watch", "Relojes de pulso", [0.95, 0.05, 0.0]),
+    ("Batman figure", "Figuras de accion", [0.7, 0.3, 0.0]),
+    ("Goku figure", "Figuras de accion", [0.5, 0.5, 0.0]),
+    ("Naruto figure", "Figuras de accion", [0.0, 0.0, 1.0]),
+]
+QUERY = [1.0, 0.0, 0.0]
+
+class FakeCollection:
+    """Just the cursor iterator snapshot_collection reads."""
+
+    def iterator(self, include_vector, return_properties):
+        for title, category, vector in PRODUCTS:
+            yield SimpleNamespace(uuid=uuid.uuid4(), vector=vector, properties={"title": title, "category": category})
+
+class TestLocalIndexFilters(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        snapshot_collection(FakeCollection(), f"{cls.directory}/index")
+        cls.index = LocalVectorIndex.load(f"{cls.directory}/index")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def test_unfiltered_query_ranks_the_whole_snapshot(self):
+        titles = [hit.title for hit in self.index.search(QUERY, 2)]
+        self.assertEqual(titles, ["Batman watch", "Goku watch"])
+
+    def test_category_filter_only_returns_that_category(self):
+        hits = self.index.search(QUERY, 5, filters={"category": "Figuras de accion"})
+        self.assertEqual([hit.title for hit in hits], ["Batman figure", "Goku figure", "Naruto figure"])
+        self.assertTrue(all(hit.category == "Figuras de accion" for hit in hits))
+
+    def test_filtered_pages_continue_within_the_filter(self):
+        page = self.index.search(QUERY, 2, offset=1, filters={"category": "Figuras de accion"})
+        self.assertEqual([hit.title for hit in page], ["Goku figure", "Naruto figure"])
+
+    def test_filter_without_matches_is_empty(self):
+        self.assertEqual(self.index.search(QUERY, 5, filters={"category": "Medias"}), [])
+
+    def test_filter_on_a_field_not_in_the_snapshot_raises(self):
+        with self.assertRaises(ValueError):
+            self.index.search(QUERY, 5, filters={"is_bobblehead": True})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# tests/test_semantic_cache.py
+import sys
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "rag_mercadolibre"))
+
+from semantic_cache import SemanticQueryCache
+
+OPTIONS = (8, "None", False)
+
+def unit(*components):
+    vector = np.zeros(8, dtype=np.float32)
+    vector[:len(components)] = components
+    return vector / np.linalg.norm(vector)
+
+class TestSemanticQueryCache(unittest.TestCase):
+    def test_paraphrase_above_threshold_hits(self):
+        cache = SemanticQueryCache(capacity=4, threshold=0.9, ttl_s=60)
+        cache.store(unit(1.0, 0.0), OPTIONS, "batman")
+        value, similarity = cache.lookup(unit(1.0, 0.2), OPTIONS)
+        self.assertEqual(value, "batman")
+        self.assertGreaterEqual(similarity, 0.9)
+
+    def test_query_below_threshold_misses(self):
+        cache = SemanticQueryCache(capacity=4, threshold=0.9, ttl_s=60)
+        cache.store(unit(1.0, 0.0), OPTIONS, "batman")
+        self.assertIsNone(cache.lookup(unit(1.0, 1.0), OPTIONS))  # cosine 0.707
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_different_options_miss(self):
+        cache = SemanticQueryCache(capacity=4, threshold=0.9, ttl_s=60)
+        cache.store(unit(1.0, 0.0), OPTIONS, "batman")
+        self.assertIsNone(cache.lookup(unit(1.0, 0.0), (5, "None", False)))
+
+    def test_expired_entry_is_dropped(self):
+        cache = SemanticQueryCache(capacity=4, threshold=0.9, ttl_s=0.05)
+        cache.store(unit(1.0, 0.0), OPTIONS, "batman")
+        time.sleep(0.1)
+        self.assertIsNone(cache.lookup(unit(1.0, 0.0), OPTIONS))
+        stats = cache.stats()
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["size"], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = SemanticQueryCache(capacity=2, threshold=0.9, ttl_s=60)
+        cache.store(unit(1.0), OPTIONS, "first")
+        time.sleep(0.01)
+        cache.store(unit(0.0, 1.0), OPTIONS, "second")
+        time.sleep(0.01)
+        self.assertIsNotNone(cache.lookup(unit(1.0), OPTIONS))  # "first" is now the most recent
+        time.sleep(0.01)
+        cache.store(unit(0.0, 0.0, 1.0), OPTIONS, "third")
+
+        self.assertEqual(cache.lookup(unit(1.0), OPTIONS)[0], "first")
+        self.assertIsNone(cache.lookup(unit(0.0, 1.0), OPTIONS))
+        self.assertEqual(cache.lookup(unit(0.0, 0.0, 1.0), OPTIONS)[0], "third")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_clear_empties_the_cache(self):
+        cache = SemanticQueryCache(capacity=2, threshold=0.9, ttl_s=60)
+        cache.store(unit(1.0), OPTIONS, "first")
+        cache.clear()
+        self.assertIsNone(cache.lookup(unit(1.0), OPTIONS))
+
+if __name__ == "__main__":
+    unittest.main()
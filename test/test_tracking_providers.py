@@ -0,0 +1,150 @@
+# tests/test_tracking_providers.py
+import json
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "rag_mercadolibre"))
+
+from tracking_providers import (
+    HttpTrackingProvider,
+    TrackingProviderChain,
+    TrackingProviderError,
+    parse_status_html,
+)
+
+KNOWN_NUMBER = "2259180939"
+KNOWN_STATUS = "ENTREGADO"
+
+# Variant 1: status rendered server-side into the label
+STATIC_PAGE = """<html><body><div class="tittle_cotizador"><div><h1>
+<span id="lblEstadoActual">{status}</span></h1></div></div></body></html>"""
+
+# Variant 2: empty label filled by a script from the backend call
+DYNAMIC_PAGE = """<html><body><div class="tittle_cotizador"><div><h1>
+<span id="lblEstadoActual"></span></h1></div></div>
+<script>fetch("/api/tracking/" + guia).then(function (r) { return r.json(); })</script></body></html>"""
+
+class StubServientregaHandler(BaseHTTPRequestHandler):
+    """Mimics the results page (both variants) and the JSON call behind it."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        number = parse_qs(url.query).get("Guia", [""])[0]
+        if url.path == "/static/RastreoEnvioDetalle.html":
+            self._reply(200, "text/html", STATIC_PAGE.format(status=KNOWN_STATUS if number == KNOWN_NUMBER else ""))
+        elif url.path == "/dynamic/RastreoEnvioDetalle.html":
+            self._reply(200, "text/html", DYNAMIC_PAGE)
+        elif url.path.startswith("/api/tracking/"):
+            if url.path.rsplit("/", 1)[-1] == KNOWN_NUMBER:
+                body = {"Results": [{"NumeroGuia": KNOWN_NUMBER, "EstadoActual": KNOWN_STATUS}]}
+                self._reply(200, "application/json", json.dumps(body))
+            else:
+                self._reply(404, "application/json", json.dumps({"Message": "Guia no encontrada"}))
+        else:
+            self._reply(404, "text/plain", "not found")
+
+    def _reply(self, status, content_type, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class RecordingProvider:
+    """Stands in for the browser fallback so the chain can be tested without Chrome."""
+    name = "selenium"
+
+    def __init__(self):
+        self.calls = []
+
+    def lookup(self, tracking_number):
+        self.calls.append(tracking_number)
+        return "EN TRANSITO"
+
+class TestTrackingProviders(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubServientregaHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def page_provider(self, variant):
+        return HttpTrackingProvider(
+            page_url=f"{self.base_url}/{variant}/RastreoEnvioDetalle.html?Guia={{tracking_number}}",
+            api_url="",
+            timeout_s=5,
+        )
+
+    def api_provider(self):
+        return HttpTrackingProvider(
+            page_url=f"{self.base_url}/dynamic/RastreoEnvioDetalle.html?Guia={{tracking_number}}",
+            api_url=f"{self.base_url}/api/tracking/{{tracking_number}}",
+            timeout_s=5,
+        )
+
+    def test_static_page_is_parsed_without_a_browser(self):
+        provider = self.page_provider("static")
+        provider.lookup(KNOWN_NUMBER)  # open the keep-alive connection
+        start = time.perf_counter()
+        status = provider.lookup(KNOWN_NUMBER)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.assertEqual(status, KNOWN_STATUS)
+        self.assertLess(elapsed_ms, 500)
+
+    def test_json_api_is_used_when_configured(self):
+        self.assertEqual(self.api_provider().lookup(KNOWN_NUMBER), KNOWN_STATUS)
+
+    def test_client_rendered_page_raises(self):
+        with self.assertRaises(TrackingProviderError):
+            self.page_provider("dynamic").lookup(KNOWN_NUMBER)
+
+    def test_unknown_number_raises(self):
+        with self.assertRaises(TrackingProviderError):
+            self.api_provider().lookup("0000000000")
+        with self.assertRaises(TrackingProviderError):
+            self.page_provider("static").lookup("0000000000")
+
+    def test_page_without_status_label_raises(self):
+        with self.assertRaises(TrackingProviderError):
+            parse_status_html("<html><body><h1>Mantenimiento</h1></body></html>")
+
+    def test_void_elements_inside_the_label_are_ignored(self):
+        self.assertEqual(parse_status_html('<span id="lblEstadoActual">A<br>B</span>x'), "A B")
+        self.assertEqual(parse_status_html('<span id="lblEstadoActual">A<img src="i.png">B<br/></span>x'), "AB")
+
+    def test_chain_answers_from_http_without_fallback(self):
+        fallback = RecordingProvider()
+        chain = TrackingProviderChain([self.page_provider("static"), fallback])
+        self.assertEqual(chain.lookup(KNOWN_NUMBER), KNOWN_STATUS)
+        self.assertEqual(fallback.calls, [])
+        self.assertEqual(chain.stats()["http"]["answered"], 1)
+
+    def test_chain_falls_back_when_http_cannot_read_status(self):
+        fallback = RecordingProvider()
+        chain = TrackingProviderChain([self.page_provider("dynamic"), fallback])
+        self.assertEqual(chain.lookup(KNOWN_NUMBER), "EN TRANSITO")
+        self.assertEqual(fallback.calls, [KNOWN_NUMBER])
+        stats = chain.stats()
+        self.assertEqual(stats["http"]["failed"], 1)
+        self.assertEqual(stats["selenium"]["answered"], 1)
+
+    def test_chain_reports_error_when_every_provider_fails(self):
+        chain = TrackingProviderChain([self.page_provider("dynamic")])
+        self.assertTrue(chain.lookup(KNOWN_NUMBER).startswith("ERROR:"))
+
+if __name__ == "__main__":
+    unittest.main()